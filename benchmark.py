@@ -0,0 +1,259 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import datetime
+
+import pandas as pd
+import pycountry
+
+import lambda_function
+import earthquake_history
+import dashboard_data
+from event_schema import bytes_per_event
+from item_profiles import PROFILES, persisted_items, read_capacity_units, write_capacity_units
+from local_dynamodb import LocalTable
+from storage import DynamoDBBackend, DuckDBBackend, EventFilter
+from gutenberg_richter import GutenbergRichterCache, gutenberg_richter, rolling_windows
+from parallel_transform import parallel_transform
+from region_resolver import lookup_regions
+from time_partition import INDEX_NAME
+from build_region_lookup import US_STATE_ABBR, US_STATE_NAMES
+from synthetic_usgs import generate_payload, SYNTHETIC_END
+
+# Benchmark harness for the ingestion pipeline stages and the dashboard
+# aggregations. Runs against a seeded synthetic USGS payload and an in-memory
+# DynamoDB stand-in, so results only depend on the code and the machine.
+#
+#   python benchmark.py --sizes 1000 20000 --save baseline.json
+#   python benchmark.py --sizes 1000 20000 --baseline baseline.json --threshold 0.2
+#   python benchmark.py --sizes 100000 --parallel 1 2 4 8
+
+DEFAULT_SIZES = [1000, 20000, 100000]
+DEFAULT_THRESHOLD = 0.25
+# Differences below this many seconds are treated as timer noise
+NOISE_FLOOR_SECONDS = 0.005
+
+# Runs fn(*args) `repeat` times on fresh inputs and returns (result, best time)
+def time_stage(fn, make_args, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        args = make_args()
+        start = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+# The dashboard frame as it was built before event_schema, kept as the
+# reference point for the memory numbers
+def legacy_dashboard_frame(table):
+    df = pd.DataFrame(dashboard_data.scan_items(table))
+    df['date'] = pd.to_datetime(df['date']).dt.date
+    float_columns = ['rms_amplitude', 'magnitude', 'mmi_intensity', 'latitude', 'longitude', 'azimuthal_gap', 'depth_km', 'felt_reports']
+    df[float_columns] = df.reindex(columns=float_columns).astype(float)
+    return df
+
+# Share of events whose place string needed the reverse geocoder with the
+# exact-match country/state lookup the pipelines used before region_lookup
+def legacy_fallback_rate(location):
+    names = {country.name for country in pycountry.countries} | US_STATE_ABBR | US_STATE_NAMES
+    regions = location.astype("string").str.extract(r",\s*(.*)$", expand=False)
+    return float((regions.notna() & ~regions.isin(names)).mean())
+
+# Times the backfill transformation (with geocoder fallback) in-process and
+# over process pools of the given sizes
+def time_parallel(cleaned, worker_counts, repeat, timings):
+    earthquake_history.warm_geocoder()
+    for workers in worker_counts:
+        _, timings[f"backfill_transformation_{workers}_workers"] = time_stage(
+            lambda df: parallel_transform(df, earthquake_history.data_processing_transformation,
+                                          setup=earthquake_history.warm_geocoder, workers=workers),
+            lambda: (cleaned.copy(),), repeat)
+
+# Times the dashboard queries on both storage backends: pandas aggregations
+# over the loaded window (DynamoDB) and SQL pushed down to DuckDB
+def time_backends(processed, table, window, start_date, end_date, repeat, timings):
+    duckdb = DuckDBBackend(":memory:")
+    _, timings["duckdb_save"] = time_stage(duckdb.save, lambda: (processed,), repeat)
+    dynamodb = DynamoDBBackend(table)
+    dynamodb.regions(EventFilter(*window))  # loads the window once, as a dashboard run does
+
+    selection = EventFilter(start_date, end_date)
+    for name, backend in (("dynamodb", dynamodb), ("duckdb", duckdb)):
+        for query in ("kpis", "hotspots", "alert_counts", "monthly_trend"):
+            _, timings[f"{name}_{query}"] = time_stage(
+                getattr(backend, query), lambda: (selection,), repeat)
+
+# Item size and capacity units of the events under every storage profile:
+# bytes and WCU per item written, RCU of the dashboard window query, and the
+# time to load (and rehydrate) the window
+def measure_profiles(processed, window, timings):
+    storage = {}
+    for profile in PROFILES:
+        table = LocalTable("earthquakes", indexes={INDEX_NAME: ("time_bucket", "time_epoch")})
+        for item in persisted_items(processed, profile):
+            table.put_item(Item=item)
+        sizes = list(table.sizes.values())
+        storage[f"{profile}_bytes_per_item"] = sum(sizes) / len(sizes)
+        storage[f"{profile}_wcu_per_item"] = sum(write_capacity_units(size) for size in sizes) / len(sizes)
+        table.read_bytes = 0
+        _, timings[f"dashboard_load_events_{profile}"] = time_stage(
+            dashboard_data.load_events, lambda: (table, *window), 1)
+        storage[f"{profile}_window_query_rcu"] = read_capacity_units(table.read_bytes)
+    return storage
+
+# Times the Gutenberg-Richter fits over every event: all grid cells at once,
+# 90-day windows every 30 days per country, and a call the cache answers
+def time_gutenberg_richter(transformed, repeat, timings):
+    whole = [(int(transformed["time_epoch"].min()), int(transformed["time_epoch"].max()) + 1)]
+    _, timings["gutenberg_richter_cells"] = time_stage(
+        gutenberg_richter, lambda: (transformed, whole, "cell"), repeat)
+    _, timings["gutenberg_richter_rolling"] = time_stage(
+        gutenberg_richter, lambda: (transformed, rolling_windows(*whole[0], 90, 30), "country"), repeat)
+    cache = GutenbergRichterCache()
+    cache.get(transformed, whole, "cell")
+    _, timings["gutenberg_richter_cached"] = time_stage(
+        cache.get, lambda: (transformed, whole, "cell"), repeat)
+
+# Times every pipeline stage and dashboard aggregation for one payload size
+def run_size(n_events, seed, repeat, worker_counts=()):
+    timings = {}
+    payload = generate_payload(n_events, seed=seed)
+
+    cleaned, timings["clean_data"] = time_stage(
+        lambda_function.clean_data, lambda: (payload,), repeat)
+    transformed, timings["data_processing_transformation"] = time_stage(
+        lambda_function.data_processing_transformation, lambda: (cleaned.copy(),), repeat)
+    processed, timings["process_data_for_dynamodb"] = time_stage(
+        lambda_function.process_data_for_dynamodb, lambda: (transformed.copy(),), repeat)
+    if worker_counts:
+        time_parallel(cleaned, worker_counts, repeat, timings)
+
+    table = LocalTable("earthquakes", indexes={INDEX_NAME: ("time_bucket", "time_epoch")})
+    _, timings["save_to_dynamodb"] = time_stage(
+        lambda df: table.put_df(df), lambda: (processed,), repeat)
+
+    # Dashboard defaults: the last month of data, all regions, full magnitude range
+    end_date = SYNTHETIC_END.date()
+    start_date = end_date - datetime.timedelta(days=31)
+    window = dashboard_data.dashboard_window(start_date, end_date)
+
+    table.read_bytes = 0
+    _, timings["dashboard_scan_items"] = time_stage(
+        dashboard_data.scan_items, lambda: (table,), 1)
+    read_bytes = {"dashboard_scan": table.read_bytes}
+
+    table.read_bytes = 0
+    df, timings["dashboard_load_events"] = time_stage(
+        dashboard_data.load_events, lambda: (table, *window), 1)
+    read_bytes["dashboard_window_query"] = table.read_bytes
+    # reads of the selected month alone, to show reads follow the window size
+    table.read_bytes = 0
+    dashboard_data.load_events(table, start_date, end_date)
+    read_bytes["selected_range_query"] = table.read_bytes
+    min_mag, max_mag = df['magnitude'].min(), df['magnitude'].max()
+    filtered, timings["dashboard_filter_data"] = time_stage(
+        dashboard_data.filter_data,
+        lambda: (df, "All", "All", start_date, end_date, min_mag, max_mag), repeat)
+    _, timings["dashboard_hotspot_counts"] = time_stage(
+        dashboard_data.hotspot_counts, lambda: (filtered,), repeat)
+    _, timings["dashboard_monthly_counts"] = time_stage(
+        dashboard_data.monthly_counts,
+        lambda: (df, end_date, "All", "All", min_mag, max_mag), repeat)
+
+    time_backends(processed, table, window, start_date, end_date, repeat, timings)
+    time_gutenberg_richter(transformed, repeat, timings)
+    storage = measure_profiles(processed, window, timings)
+
+    memory = {
+        "pipeline_transformed": bytes_per_event(transformed),
+        "dashboard_legacy": bytes_per_event(legacy_dashboard_frame(table)),
+        "dashboard_typed": bytes_per_event(df),
+    }
+    rates = {
+        "legacy_geocoder_fallback": legacy_fallback_rate(cleaned["location"]),
+        "geocoder_fallback": float((lookup_regions(cleaned["location"]) < 0).mean()),
+    }
+    return {"events": n_events, "seconds": timings, "bytes_per_event": memory, "rates": rates,
+            "read_bytes": read_bytes, "storage": storage}
+
+# Returns a list of (size, metric, baseline, current) that got worse than allowed
+def find_regressions(baseline, current, threshold):
+    regressions = []
+    for size, result in current["results"].items():
+        if size not in baseline["results"]:
+            continue
+        for section, noise_floor in (("seconds", NOISE_FLOOR_SECONDS), ("bytes_per_event", 0), ("rates", 0.001),
+                                     ("read_bytes", 0), ("storage", 0)):
+            base_values = baseline["results"][size].get(section, {})
+            for stage, value in result.get(section, {}).items():
+                if stage not in base_values:
+                    continue
+                allowed = base_values[stage] * (1 + threshold)
+                if value > allowed and value - base_values[stage] > noise_floor:
+                    regressions.append((size, f"{section}.{stage}", base_values[stage], value))
+    return regressions
+
+def print_results(results):
+    for size, result in results["results"].items():
+        print(f"\n{int(size):,} events")
+        for stage, seconds in result["seconds"].items():
+            print(f"  {stage:<34} {seconds * 1000:10.1f} ms")
+        for frame, size_bytes in result["bytes_per_event"].items():
+            print(f"  {frame:<34} {size_bytes:10.0f} bytes/event")
+        for name, rate in result.get("rates", {}).items():
+            print(f"  {name:<34} {rate:10.2%}")
+        for name, size_bytes in result.get("read_bytes", {}).items():
+            print(f"  {name:<34} {size_bytes / 1024:10.0f} KiB read")
+        for name, value in result.get("storage", {}).items():
+            print(f"  {name:<34} {value:10.1f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the earthquake pipeline and dashboard")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", help="write the results as a JSON baseline")
+    parser.add_argument("--baseline", help="compare against a saved JSON baseline")
+    parser.add_argument("--parallel", type=int, nargs="+", default=[], metavar="WORKERS",
+                        help="also time the backfill transformation with these pool sizes")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown as a fraction of the baseline (default 0.25)")
+    args = parser.parse_args(argv)
+
+    results = {
+        "meta": {
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "results": {},
+    }
+    for n_events in args.sizes:
+        results["results"][str(n_events)] = run_size(n_events, args.seed, args.repeat, args.parallel)
+    print_results(results)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved results to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(baseline, results, args.threshold)
+        if regressions:
+            print(f"\nRegressions over {args.threshold:.0%}:")
+            for size, metric, before, after in regressions:
+                print(f"  {size} events {metric}: {before:.4g} -> {after:.4g}")
+            return 1
+        print(f"\nNo regressions over {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
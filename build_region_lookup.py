@@ -0,0 +1,169 @@
+import argparse
+import pprint
+
+import pandas as pd
+import pycountry
+import pycountry_convert as pc
+
+from region_resolver import normalize_region_names
+
+# Generates region_lookup.py, the country/continent table used by
+# region_resolver. pycountry and pycountry_convert are only needed here, at
+# build time; the pipelines just import the generated module.
+#
+#   python build_region_lookup.py            (writes region_lookup.py)
+
+OUTPUT = "region_lookup.py"
+
+US_STATE_ABBR = {
+    "AK", "AL", "AR", "AZ", "CA", "CO", "CT", "DE", "FL", "GA", "HI", "IA",
+    "ID", "IL", "IN", "KS", "KY", "LA", "MA", "MD", "ME", "MI", "MN", "MO",
+    "MS", "MT", "NC", "ND", "NE", "NH", "NJ", "NM", "NV", "NY", "OH", "OK",
+    "OR", "PA", "RI", "SC", "SD", "TN", "TX", "UT", "VA", "VT", "WA", "WI",
+    "WV", "WY", "DC", "AS", "GU", "MP", "PR", "VI"}
+
+US_STATE_NAMES = {
+    "Alabama", "Alaska", "Arizona", "Arkansas", "California", "Colorado",
+    "Connecticut", "Delaware", "Florida", "Georgia", "Hawaii", "Idaho",
+    "Illinois", "Indiana", "Iowa", "Kansas", "Kentucky", "Louisiana",
+    "Maine", "Maryland", "Massachusetts", "Michigan", "Minnesota",
+    "Mississippi", "Missouri", "Montana", "Nebraska", "Nevada", "New Hampshire",
+    "New Jersey", "New Mexico", "New York", "North Carolina", "North Dakota",
+    "Ohio", "Oklahoma", "Oregon", "Pennsylvania", "Rhode Island", "South Carolina",
+    "South Dakota", "Tennessee", "Texas", "Utah", "Vermont", "Virginia",
+    "Washington", "West Virginia", "Wisconsin", "Wyoming"}
+
+# Everyday names that differ from the pycountry name, as used in USGS places
+COUNTRY_ALIASES = {
+    "Bolivia": "BO", "Brunei": "BN", "Burma": "MM", "Cape Verde": "CV",
+    "Czech Republic": "CZ", "Democratic Republic of the Congo": "CD",
+    "East Timor": "TL", "Iran": "IR", "Ivory Coast": "CI", "Laos": "LA",
+    "Macedonia": "MK", "Micronesia": "FM", "Moldova": "MD", "North Korea": "KP",
+    "Palestine": "PS", "Republic of the Congo": "CG", "Russia": "RU",
+    "South Korea": "KR", "Syria": "SY", "Taiwan": "TW", "Tanzania": "TZ",
+    "Turkey": "TR", "U.S. Virgin Islands": "VI", "UK": "GB", "Vatican City": "VA",
+    "Venezuela": "VE", "Vietnam": "VN", "Wallis and Futuna": "WF",
+}
+
+# Flinn-Engdahl style region names that USGS uses without a country suffix.
+# "<name> region" and direction qualifiers ("south of the ...") are handled
+# by normalize_region_names, so only the bare names are listed.
+FLINN_ENGDAHL_REGIONS = {
+    "Fiji Islands": "FJ", "Kermadec Islands": "NZ", "Tonga Islands": "TO",
+    "Samoa Islands": "WS", "Vanuatu Islands": "VU", "Loyalty Islands": "NC",
+    "Santa Cruz Islands": "SB", "Solomon Islands": "SB", "New Britain": "PG",
+    "New Ireland": "PG", "Bougainville": "PG", "Admiralty Islands": "PG",
+    "Bismarck Sea": "PG", "Solomon Sea": "PG", "Banda Sea": "ID",
+    "Molucca Sea": "ID", "Celebes Sea": "ID", "Flores Sea": "ID", "Java Sea": "ID",
+    "Sumatra": "ID", "Java": "ID", "Sulawesi": "ID", "Minahasa": "ID",
+    "Halmahera": "ID", "Seram": "ID", "Sumba": "ID", "Sumbawa": "ID",
+    "Talaud Islands": "ID", "Kepulauan Talaud": "ID", "Timor": "TL",
+    "Mindanao": "PH", "Luzon": "PH", "Samar": "PH", "Leyte": "PH",
+    "Philippine Islands": "PH", "Taiwan": "TW", "Kuril Islands": "RU",
+    "Kamchatka": "RU", "Komandorskiye Ostrova": "RU", "Sea of Okhotsk": "RU",
+    "Sakhalin": "RU", "Hokkaido": "JP", "Honshu": "JP", "Kyushu": "JP",
+    "Shikoku": "JP", "Ryukyu Islands": "JP", "Izu Islands": "JP",
+    "Bonin Islands": "JP", "Volcano Islands": "JP", "Mariana Islands": "MP",
+    "Northern Mariana Islands": "MP", "Guam": "GU", "Andaman Islands": "IN",
+    "Nicobar Islands": "IN", "Aleutian Islands": "US", "Andreanof Islands": "US",
+    "Fox Islands": "US", "Rat Islands": "US", "Near Islands": "US",
+    "Alaska Peninsula": "US", "Gulf of Alaska": "US", "Kodiak Island": "US",
+    "Unimak Island": "US", "Hawaii": "US", "Gulf of California": "MX",
+    "Baja California": "MX", "Revilla Gigedo Islands": "MX",
+    "Galapagos Islands": "EC", "Easter Island": "CL",
+    "Juan Fernandez Islands": "CL", "South Sandwich Islands": "GS",
+    "South Georgia Island": "GS", "Scotia Sea": "GS", "Macquarie Island": "AU",
+    "Balleny Islands": "AQ", "Prince Edward Islands": "ZA", "Azores Islands": "PT",
+    "Azores": "PT", "Madeira Islands": "PT", "Canary Islands": "ES", "Crete": "GR",
+    "Dodecanese Islands": "GR", "Aegean Sea": "GR", "Ionian Sea": "GR",
+    "Sicily": "IT", "Jan Mayen Island": "SJ", "Svalbard": "SJ", "Tibet": "CN",
+    "Xizang": "CN", "Sichuan": "CN", "Yunnan": "CN", "Xinjiang": "CN",
+    "Hindu Kush": "AF", "Kashmir": "IN", "Virgin Islands": "VI",
+    "Tristan da Cunha": "SH", "Ascension Island": "SH", "Bouvet Island": "BV",
+}
+
+# Oceanic features with no country. These resolved to "Unknown" before (the
+# place string has no comma), and mapping them explicitly keeps them away
+# from the geocoder, which would pick the nearest coastal town.
+OCEANIC_REGIONS = [
+    "Mid-Atlantic Ridge", "North Atlantic Ocean", "South Atlantic Ocean",
+    "East Pacific Rise", "Pacific-Antarctic Ridge", "Southern East Pacific Rise",
+    "Central East Pacific Rise", "Northern East Pacific Rise",
+    "Mid-Indian Ridge", "Southwest Indian Ridge", "Southeast Indian Ridge",
+    "Carlsberg Ridge", "Indian Ocean Triple Junction", "Owen Fracture Zone",
+    "Chile Rise", "Galapagos Triple Junction", "Easter Island Microplate",
+    "Reykjanes Ridge", "Knipovich Ridge", "Gakkel Ridge", "Arctic Ocean",
+    "Southern Ocean", "Drake Passage", "Caspian Sea", "Blanco Fracture Zone",
+    "Gorda Ridge", "Juan de Fuca Ridge", "Explorer Ridge",
+]
+
+# pycountry_convert has no continent for these codes
+CONTINENT_OVERRIDES = {
+    "AQ": "AN", "BV": "AN", "HM": "AN", "TF": "AN", "GS": "AN", "EH": "AF",
+    "PN": "OC", "UM": "OC", "SX": "NA", "TL": "AS", "VA": "EU",
+}
+
+UNKNOWN = "Unknown"
+
+def continent_of(alpha_2):
+    if alpha_2 in CONTINENT_OVERRIDES:
+        return CONTINENT_OVERRIDES[alpha_2]
+    try:
+        return pc.country_alpha2_to_continent_code(alpha_2)
+    except KeyError:
+        return UNKNOWN
+
+# Builds the table: country names, their continent, and the region name and
+# alpha-2 indexes into them
+def build_tables():
+    countries = sorted(pycountry.countries, key=lambda c: c.name)
+    names = [c.name for c in countries] + [UNKNOWN]
+    continent_codes = [continent_of(c.alpha_2) for c in countries] + [UNKNOWN]
+    continents = sorted(set(continent_codes) - {UNKNOWN}) + [UNKNOWN]
+
+    unknown = len(names) - 1
+    alpha2 = {c.alpha_2: i for i, c in enumerate(countries)}
+    us = alpha2["US"]
+
+    # Earlier sources win: exact pycountry names first (as the pipelines
+    # always did), so e.g. "Georgia" stays the country and not the state
+    region_sources = []
+    region_sources += [(c.name, i) for i, c in enumerate(countries)]
+    region_sources += [(name, alpha2[code]) for name, code in COUNTRY_ALIASES.items()]
+    region_sources += [(getattr(c, "common_name"), i) for i, c in enumerate(countries)
+                       if hasattr(c, "common_name")]
+    region_sources += [(getattr(c, "official_name"), i) for i, c in enumerate(countries)
+                       if hasattr(c, "official_name")]
+    region_sources += [(state, us) for state in sorted(US_STATE_ABBR | US_STATE_NAMES)]
+    region_sources += [(name, alpha2[code]) for name, code in FLINN_ENGDAHL_REGIONS.items()]
+    region_sources += [(name, unknown) for name in OCEANIC_REGIONS]
+
+    keys = normalize_region_names(pd.Series([name for name, _ in region_sources], dtype="string"))
+    regions = {}
+    for key, (_, index) in zip(keys, region_sources):
+        regions.setdefault(key, index)
+
+    return {
+        "COUNTRIES": tuple(names),
+        "CONTINENTS": tuple(continents),
+        "CONTINENT_INDEX": tuple(continents.index(code) for code in continent_codes),
+        "UNKNOWN": unknown,
+        "ALPHA2": alpha2,
+        "REGIONS": regions,
+    }
+
+def write_module(tables, path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# Generated by build_region_lookup.py - do not edit by hand.\n\n")
+        for name, value in tables.items():
+            f.write(f"{name} = {pprint.pformat(value, width=100, compact=True)}\n\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate region_lookup.py")
+    parser.add_argument("--out", default=OUTPUT)
+    args = parser.parse_args()
+
+    tables = build_tables()
+    write_module(tables, args.out)
+    print(f"Wrote {len(tables['REGIONS'])} region names for {len(tables['COUNTRIES']) - 1} countries to {args.out}")
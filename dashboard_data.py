@@ -0,0 +1,124 @@
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+import datetime
+from event_schema import apply_schema, with_date_parts, date_to_epoch_ms
+from time_partition import query_range
+from item_profiles import stored_attributes, rehydrate
+
+# Data loading and aggregations behind the dashboard panels. Nothing in here
+# depends on streamlit so it can be reused by benchmarks and other readers.
+
+# Reads all items of the table, following the scan pagination
+def scan_items(table):
+    response = table.scan()
+    items = response['Items']
+
+    while 'LastEvaluatedKey' in response:
+        lastEvaluatedKey = response['LastEvaluatedKey']
+        response = table.scan(
+        ExclusiveStartKey=lastEvaluatedKey)
+        items.extend(response['Items'])
+    return items
+
+# Attributes read by the dashboard panels
+DASHBOARD_COLUMNS = ['id', 'magnitude', 'location', 'time_epoch', 'updated_time_epoch', 'latitude', 'longitude',
+                     'depth_km', 'felt_reports', 'country', 'continent', 'alert_level', 'tsunami_warning', 'detail_url']
+
+# Date range the dashboard reads for a selected [start_date, end_date): the
+# selection itself, the 7 days before end_date and the 12 months of the trend
+# (which the Gutenberg-Richter panel reads too), so never less than 12 months
+def dashboard_window(start_date,end_date):
+    trend_start,trend_end=trend_window(end_date)
+    return min(start_date,trend_start,end_date-datetime.timedelta(days=7)),trend_end
+
+# The 12 whole months of the trend panel, up to the month of end_date
+def trend_window(end_date):
+    end_date=(end_date+relativedelta(months=1)).replace(day=1)##no matter what date you choose, the filter will select the whole month of the date.
+    return (end_date-relativedelta(years=1)).replace(day=1),end_date
+
+# Builds the typed dashboard frame (see event_schema) from the items with
+# start_date <= date < end_date, queried through the time index
+def load_events(table,start_date,end_date):
+    items = query_range(table,start_date,end_date,stored_attributes(DASHBOARD_COLUMNS))##items of any storage profile (see item_profiles)
+    return apply_schema(rehydrate(pd.DataFrame(items),DASHBOARD_COLUMNS))
+
+# Events with start_date <= date < end_date
+def in_date_range(df,start_date,end_date):
+    return (df['time_epoch']>=date_to_epoch_ms(start_date))&(df['time_epoch']<date_to_epoch_ms(end_date))
+
+##Apply the filters
+def filter_data(df,continent,country,start_date,end_date,min_mag,max_mag):
+    df_filtered=df[in_date_range(df,start_date,end_date)&(df['magnitude']>=min_mag)&(df['magnitude']<=max_mag)]
+    if continent != "All":
+        df_filtered = df_filtered[df_filtered['continent'] == continent]
+    if country != "All":
+        df_filtered = df_filtered[df_filtered['country'] == country]
+    return df_filtered
+
+##numebr of earthquake by countries
+def hotspot_counts(df):
+    return (
+    df.groupby(["country",'continent'],observed=True)["id"]
+    .nunique()
+    .reset_index(name="Earthquake Count")
+    .sort_values(by="Earthquake Count", ascending=False).set_index('country')
+    .head(10)
+)
+
+def classify_mag(m):###classifing the magnitude
+    if m >= 7:
+        return '7+'
+    elif m >= 6:
+        return '6~6.9'
+    else:
+        return '<6'
+
+##monthly totals and counts per magnitude class for the 12 months up to end_date
+def monthly_counts(df,end_date,continent,country,min_mag,max_mag):
+    year_before,end_date=trend_window(end_date)
+
+    df=df[in_date_range(df,year_before,end_date)]
+    if continent != "All":
+        df = df[df['continent'] == continent]
+    if country != "All":
+        df = df[(df['country'] == country)]
+    df=df[(df['magnitude']>=min_mag)&(df['magnitude']<=max_mag)]
+    df = with_date_parts(df,'year','month').assign(mag_class=df['magnitude'].apply(classify_mag))
+    stacked = df.groupby(['year','month', 'mag_class'])['id'].count().reset_index()
+    return trend_tables(stacked)
+
+##line and stacked bar tables of the trend panel from the event counts per
+##year, month and mag_class (in the 'id' column)
+def trend_tables(stacked):
+    ##line plot
+    totals_line=stacked.groupby(['year','month'])['id'].sum().reset_index()
+    totals_line['year_month'] = totals_line['year'].astype(str) + "-" + totals_line['month'].astype(str).str.zfill(2)+'-01'
+
+    ##stack barchart
+    stacked = stacked.copy()
+    stacked['year_month'] =  stacked ['year'].astype(str) + "-" +  stacked ['month'].astype(str).str.zfill(2)+'-01'
+    pivot = stacked.pivot(index='year_month', columns='mag_class', values='id').fillna(0)
+    return totals_line, pivot
+
+##figures of the KPI cards
+def kpi_summary(df):
+    return {
+        "total": int(df['id'].nunique()),
+        "avg_depth": float(df['depth_km'].mean()),
+        "avg_felt": float(df['felt_reports'].mean()),
+        "tsunami_warnings": int(df['tsunami_warning'].sum()),
+    }
+
+##the event with the largest magnitude, None for an empty frame
+def max_event(df):
+    magnitude = df['magnitude'].dropna()
+    if magnitude.empty:
+        return None
+    return df.loc[magnitude.idxmax(), ['magnitude','country','felt_reports','depth_km','time_epoch']]
+
+##number of events per alert level
+def alert_counts(df):
+    return (df[df['alert_level'].notna()]
+            .groupby('alert_level',observed=True)['id'].count()
+            .reset_index(name='count')
+            .sort_values('count',ascending=False))
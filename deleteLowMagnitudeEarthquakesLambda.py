@@ -20,15 +20,16 @@ def lambda_handler(event, context):
     table = dynamodb.Table("earthquakes")
 
     datetime_obj = (datetime.now(timezone.utc)) - relativedelta(days=2)
-    year = datetime_obj.year
-    month = datetime_obj.month
-    day = datetime_obj.day
+    # the day as a time_epoch range, since lean items have no year/month/day attributes
+    day_start = datetime_obj.replace(hour=0, minute=0, second=0, microsecond=0)
+    start_ms = int(day_start.timestamp() * 1000)
+    end_ms = int((day_start + timedelta(days=1)).timestamp() * 1000)
 
     print(datetime_obj)
 
     # Get data from DynamoDB
     response = table.scan(
-        FilterExpression=Attr("year").eq(year) and Attr("month").eq(month) and Attr("day").eq(day) and Attr("magnitude").lt(4), 
+        FilterExpression=Attr("time_epoch").between(start_ms, end_ms - 1) & Attr("magnitude").lt(4),
         ProjectionExpression='id')
 
     print(len(response['Items']))
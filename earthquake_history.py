@@ -3,20 +3,19 @@ import requests
 import pandas as pd
 import numpy as np
 import io
-import boto3
 import base64
 import random
 import json
-import awswrangler as wr
 from decimal import Decimal
 from datetime import datetime
 from datetime import datetime, timezone, timedelta
 from dateutil.relativedelta import relativedelta
-from botocore.exceptions import ClientError
-import reverse_geocoder as rg
-import pycountry_convert as pc
-import pycountry
-import re
+from event_schema import WRITE_SCHEMA, apply_schema
+from time_partition import time_buckets
+from region_resolver import resolve_regions, warm_geocoder
+from parallel_transform import parallel_transform
+from storage import get_backend
+from write_behind import write_buffer
 
 # USGS Earthquake API Endpoint
 USGS_API_URL = "https://earthquake.usgs.gov/fdsnws/event/1/query"
@@ -25,26 +24,6 @@ USGS_API_URL = "https://earthquake.usgs.gov/fdsnws/event/1/query"
 REGION = "us-east-1"
 TABLE_NAME = "earthquakes"
 
-countries = {}
-
-US_STATE_ABBR = {
-    "AK", "AL", "AR", "AZ", "CA", "CO", "CT", "DE", "FL", "GA", "HI", "IA",
-    "ID", "IL", "IN", "KS", "KY", "LA", "MA", "MD", "ME", "MI", "MN", "MO",
-    "MS", "MT", "NC", "ND", "NE", "NH", "NJ", "NM", "NV", "NY", "OH", "OK",
-    "OR", "PA", "RI", "SC", "SD", "TN", "TX", "UT", "VA", "VT", "WA", "WI",
-    "WV", "WY", "DC", "AS", "GU", "MP", "PR", "VI"}
-
-US_STATE_NAMES = {
-    "Alabama", "Alaska", "Arizona", "Arkansas", "California", "Colorado", 
-    "Connecticut", "Delaware", "Florida", "Georgia", "Hawaii", "Idaho", 
-    "Illinois", "Indiana", "Iowa", "Kansas", "Kentucky", "Louisiana", 
-    "Maine", "Maryland", "Massachusetts", "Michigan", "Minnesota", 
-    "Mississippi", "Missouri", "Montana", "Nebraska", "Nevada", "New Hampshire", 
-    "New Jersey", "New Mexico", "New York", "North Carolina", "North Dakota", 
-    "Ohio", "Oklahoma", "Oregon", "Pennsylvania", "Rhode Island", "South Carolina", 
-    "South Dakota", "Tennessee", "Texas", "Utah", "Vermont", "Virginia", 
-    "Washington", "West Virginia", "Wisconsin", "Wyoming"}
-
 
 # Fetch historical Earthquake Data from USGS API
 def fetch_historical_earthquake_data(start_time="2024-01-01", end_time="2024-12-31", additional_params=None):
@@ -125,36 +104,9 @@ def clean_data(json_data):
     # Drop Rows with Essential Data Missing
     df.dropna(subset=["magnitude", "latitude", "longitude", "depth_km"])
 
-    return df
-
-# Geo lookup
-def latlon_to_country(lat, lon):
-    result = rg.search((lat, lon), mode=1)[0]
-    return pycountry.countries.get(alpha_2=result['cc']).name
-
-# Converts country code to continent
-def country_to_continent(country_code):
-    return pc.country_alpha2_to_continent_code(country_code)
-
-# Get corresponding country and continent of earthquake
-def get_country_continent(location, lat, lon):
-    try:
-        country_name = ""
-        # use regex to extract region name
-        region = re.search(r",\s*(.*)$", location).group(1)
-        # region extracted is country
-        if region in countries:
-            country_name = region
-        # region extracted is US state
-        elif region in US_STATE_ABBR or region in US_STATE_NAMES:
-            country_name = "United States"
-        else:
-             # use coordiates to extract country
-            country_name = latlon_to_country(lat, lon)
-
-        return country_name, country_to_continent(countries[country_name])
-    except:
-        return "Unknown", "Unknown"
+    # Categoricals and narrow integers; floats keep their full precision
+    # for the written items (see event_schema)
+    return apply_schema(df, WRITE_SCHEMA)
 
 # Transform data
 def data_processing_transformation(df):
@@ -164,6 +116,8 @@ def data_processing_transformation(df):
     df["year"] = df["time_readable"].dt.year
     df["month"] = df["time_readable"].dt.month
     df["day"] = df["time_readable"].dt.day
+    # partition key of the time index (see time_partition)
+    df["time_bucket"] = time_buckets(df["time_epoch"])
 
     # breaking down updated time components
     df['updated_time_readable'] = pd.to_datetime(df["updated_time_epoch"], unit="ms")
@@ -171,7 +125,10 @@ def data_processing_transformation(df):
     df["updated_month"] = df["updated_time_readable"].dt.month
     
     # extracting region information (country and continent)
-    df[["country", "continent"]] = df.apply(lambda row: get_country_continent(row["location"], row["latitude"], row["longitude"]), axis=1, result_type="expand")
+    country, continent, fallback = resolve_regions(df["location"], df["latitude"], df["longitude"])
+    df["country"] = country
+    df["continent"] = continent
+    print("Geocoder fallback:", int(fallback.sum()), "of", df.shape[0], "records")
 
     # expanded alert classification 
     def expanded_alert(row):
@@ -189,14 +146,14 @@ def data_processing_transformation(df):
             return "Moderate Alert"
         else:
             return "No Alert"
-            
-        df["full_alert_level"] = df.apply(expanded_alert, axis=1)
+
+    df["full_alert_level"] = df.apply(expanded_alert, axis=1)
 
     return df
 
 # Converts data types for dynamodb
 def process_data_for_dynamodb(df):
-    float_columns =  df.select_dtypes(include=['float','int'])
+    float_columns =  df.select_dtypes(include=['number'])
     for c in float_columns:
         str_vals = df[c].astype(str)
         mask = df[c].notnull()
@@ -209,15 +166,22 @@ def process_data_for_dynamodb(df):
     
     return df
 
-# Writes data to dynamodb
+# Writes data to dynamodb through the write-behind log (see write_behind), so
+# the next month is fetched while this one drains, or to the backend set by
+# EARTHQUAKE_STORAGE (see storage)
 def save_to_dynamodb(df):
-    boto3.setup_default_session(region_name='us-east-1')
-    wr.dynamodb.put_df(df=df, table_name='earthquakes')
+    buffer = write_buffer()
+    if buffer is None:
+        get_backend().save(df)
+        return
+    buffer.append(df)
+    buffer.start()
 
 # Cleans, transforms and writes data to dynamodb
 def clean_transform_write(json_data):
     df = clean_data(json_data)
-    df = data_processing_transformation(df)
+    # large batches are spread over a process pool
+    df = parallel_transform(df, data_processing_transformation, setup=warm_geocoder)
     df = process_data_for_dynamodb(df)
     save_to_dynamodb(df)
     return df.shape[0]
@@ -249,11 +213,10 @@ def get_last_year_data(min_magnitude=4):
     record_num = record_num + clean_transform_write(json_data)
 
     print('Total number of records retrieved:', record_num)
+    if write_buffer() is not None:
+        print('Left in the write-behind log:', write_buffer().close(), 'records')
 
-# Create a global map of countries and it's corresponding country code
-for country in list(pycountry.countries):
-    countries[country.name] = country.alpha_2
-
-# Get earthquakes with magnitude greater than 4
-params = {'minmagnitude':4}
-get_last_year_data(params)
+if __name__ == "__main__":
+    # Get earthquakes with magnitude greater than 4
+    params = {'minmagnitude':4}
+    get_last_year_data(params)
@@ -0,0 +1,90 @@
+import datetime
+import pandas as pd
+
+# In-memory layout of an earthquake event, shared by the pipeline and the
+# dashboard. Low-cardinality strings are categoricals, numbers use the
+# narrowest dtype that holds the USGS values, and every date part is derived
+# on demand from the int64 epoch columns instead of being stored.
+EVENT_SCHEMA = {
+    "magnitude": "float32",
+    "latitude": "float32",
+    "longitude": "float32",
+    "depth_km": "float32",
+    "time_epoch": "int64",
+    "updated_time_epoch": "int64",
+    "felt_reports": "float32",
+    "cdi_intensity": "float32",
+    "mmi_intensity": "float32",
+    "significance": "Int16",
+    "tsunami_warning": "Int8",
+    "rms_amplitude": "float32",
+    "azimuthal_gap": "float32",
+    "alert_level": "category",
+    "review_status": "category",
+    "event_type": "category",
+    "magnitude_type": "category",
+    "data_sources": "category",
+    "event_types": "category",
+    "country": "category",
+    "continent": "category",
+    "full_alert_level": "category",
+}
+
+# Layout of the pipeline frames that are written to the tables: the same
+# categoricals and integers, but every float stays float64, because the
+# values are persisted through their decimal text and float32 keeps only
+# about 7 significant digits (-116.7941667 would be stored as -116.79417)
+WRITE_SCHEMA = {column: "float64" if dtype == "float32" else dtype for column, dtype in EVENT_SCHEMA.items()}
+
+# Columns that can be rebuilt from time_epoch / updated_time_epoch
+DERIVED_COLUMNS = [
+    "time_readable", "date", "year", "month", "day",
+    "updated_time_readable", "updated_year", "updated_month", "time_bucket",
+]
+
+# Converts a frame to the declared schema (EVENT_SCHEMA or WRITE_SCHEMA) and
+# drops the derived date columns
+def apply_schema(df, schema=EVENT_SCHEMA):
+    df = df.drop(columns=[c for c in DERIVED_COLUMNS if c in df])
+    for column, dtype in schema.items():
+        if column not in df or df[column].dtype == dtype:
+            continue
+        if dtype == "category":
+            df[column] = df[column].astype("category")
+        else:
+            # values read back from DynamoDB are Decimals in object columns
+            df[column] = df[column].astype("float64").astype(dtype)
+    return df
+
+# Adds the requested date parts (any of DERIVED_COLUMNS) computed from the epochs
+def with_date_parts(df, *parts):
+    times = {}
+    columns = {}
+    for part in parts:
+        source = "updated_time_epoch" if part.startswith("updated_") else "time_epoch"
+        if source not in times:
+            times[source] = pd.to_datetime(df[source], unit="ms")
+        t = times[source]
+        name = part.replace("updated_", "")
+        if name == "time_readable":
+            columns[part] = t
+        elif name == "date":
+            columns[part] = t.dt.date
+        else:
+            columns[part] = getattr(t.dt, name)
+    return df.assign(**columns)
+
+# Epoch milliseconds (UTC) at the start of a date
+def date_to_epoch_ms(date):
+    start = datetime.datetime.combine(date, datetime.time(), tzinfo=datetime.timezone.utc)
+    return int(start.timestamp() * 1000)
+
+# Epoch milliseconds converted to a UTC timestamp
+def epoch_to_datetime(epoch_ms):
+    return pd.to_datetime(int(epoch_ms), unit="ms")
+
+# Average in-memory size of one event, including string and category payloads
+def bytes_per_event(df):
+    if len(df) == 0:
+        return 0.0
+    return df.memory_usage(deep=True).sum() / len(df)
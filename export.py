@@ -0,0 +1,146 @@
+import argparse
+import datetime
+import json
+import os
+import tempfile
+import time
+
+from event_schema import WRITE_SCHEMA, with_date_parts
+from storage import CHUNK_SIZE, STORE_COLUMNS, EventFilter, get_backend
+
+# Bulk export of the selected events to CSV, Parquet or GeoJSON. Events are
+# streamed from the storage backend in chunks (see iter_events) and every
+# chunk is written out before the next one is read, so memory stays bounded
+# by the chunk size whatever the size of the selection.
+#
+#   python export.py --start 2024-01-01 --end 2025-01-01 --format parquet --out events.parquet
+#   EARTHQUAKE_STORAGE=duckdb python export.py --start 2024-01-01 --end 2025-01-01 --out events.csv
+
+FORMATS = {"csv": ".csv", "parquet": ".parquet", "geojson": ".geojson"}
+# Coordinates go to the GeoJSON geometry instead of the properties
+GEOMETRY_COLUMNS = ["longitude", "latitude", "depth_km"]
+
+# Chunks with the readable event time added
+def with_time(chunks):
+    for chunk in chunks:
+        yield with_date_parts(chunk, "time_readable")
+
+def write_csv(chunks, path, columns):
+    rows = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        f.write(",".join(columns + ["time_readable"]) + "\n")
+        for chunk in with_time(chunks):
+            chunk.to_csv(f, header=False, index=False)
+            rows += len(chunk)
+    return rows
+
+# Arrow schema of the exported columns, fixed up front so that every chunk
+# is written with the same types (categoricals are written as strings)
+def arrow_schema(columns):
+    import pyarrow as pa
+    types = {"float64": pa.float64(), "int64": pa.int64(), "Int16": pa.int16(), "Int8": pa.int8(),
+             "category": pa.string()}
+    fields = [pa.field(column, types[WRITE_SCHEMA[column]] if column in WRITE_SCHEMA else pa.string())
+              for column in columns]
+    return pa.schema(fields + [pa.field("time_readable", pa.timestamp("ms"))])
+
+def write_parquet(chunks, path, columns):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema(columns)
+    categories = [column for column in columns if WRITE_SCHEMA.get(column) == "category"]
+    rows = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in with_time(chunks):
+            chunk = chunk.astype({column: "string" for column in categories})
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            rows += len(chunk)
+    return rows
+
+# FeatureCollection in the layout of the USGS feed: the coordinates as a
+# [longitude, latitude, depth] point and the other columns as properties
+def write_geojson(chunks, path, columns):
+    properties = [column for column in columns if column not in GEOMETRY_COLUMNS and column != "id"]
+    rows = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"type": "FeatureCollection", "features": [\n')
+        for chunk in with_time(chunks):
+            # float32 values through their shortest decimal form, so that
+            # 18.3 is written as 18.3 and not 18.2999992371
+            chunk = chunk.assign(**{column: chunk[column].to_numpy().astype(str).astype("float64")
+                                    for column in chunk.select_dtypes("float32")})
+            records = json.loads(chunk[properties + ["time_readable"]].to_json(orient="records", date_format="iso"))
+            coordinates = json.loads(chunk.reindex(columns=GEOMETRY_COLUMNS).to_json(orient="values"))
+            for event_id, record, point in zip(chunk["id"], records, coordinates):
+                feature = {"type": "Feature", "id": event_id, "properties": record,
+                           "geometry": {"type": "Point", "coordinates": point}}
+                f.write((",\n" if rows else "") + json.dumps(feature))
+                rows += 1
+        f.write("\n]}\n")
+    return rows
+
+WRITERS = {"csv": write_csv, "parquet": write_parquet, "geojson": write_geojson}
+
+# Writes the events selected by event_filter to path; returns the row count
+def export_events(backend, event_filter, path, fmt, columns=None, chunk_size=CHUNK_SIZE):
+    columns = columns or STORE_COLUMNS
+    chunks = backend.iter_events(event_filter, columns, chunk_size)
+    return WRITERS[fmt](chunks, path, columns)
+
+# Most events the dashboard offers for download. Streamlit reads the file of
+# a download button into memory, so larger selections are exported with the
+# command line, which streams to a file of any size.
+MAX_DOWNLOAD_EVENTS = 500000
+
+# Export as a binary file opened for reading, for the dashboard's download
+# button. The file is removed once it is open, so it goes away when the
+# handle is closed (where an open file cannot be removed, it is left in the
+# temporary directory).
+def export_file(backend, event_filter, fmt):
+    fd, path = tempfile.mkstemp(suffix=FORMATS[fmt])
+    os.close(fd)
+    try:
+        export_events(backend, event_filter, path, fmt)
+        f = open(path, "rb")
+    except BaseException:
+        os.remove(path)
+        raise
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+    return f
+
+# Peak resident memory of this process so far, in MiB (Unix only)
+def peak_rss_mib():
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the selected earthquake events")
+    parser.add_argument("--start", type=datetime.date.fromisoformat, required=True, help="first day (YYYY-MM-DD)")
+    parser.add_argument("--end", type=datetime.date.fromisoformat, required=True, help="day after the last day")
+    parser.add_argument("--continent", default="All")
+    parser.add_argument("--country", default="All")
+    parser.add_argument("--min-mag", type=float)
+    parser.add_argument("--max-mag", type=float)
+    parser.add_argument("--tsunami", action="store_true", help="only events with a tsunami warning")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--out", help="output file (default earthquakes.<format>)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    event_filter = EventFilter(args.start, args.end, args.continent, args.country,
+                               args.min_mag, args.max_mag, args.tsunami)
+    out = args.out or "earthquakes" + FORMATS[args.format]
+    backend = get_backend(read_only=True)
+
+    rss_before = peak_rss_mib()
+    start = time.perf_counter()
+    rows = export_events(backend, event_filter, out, args.format, chunk_size=args.chunk_size)
+    seconds = time.perf_counter() - start
+    print(f"Exported {rows:,} events to {out} in {seconds:.1f} s ({rows / max(seconds, 1e-9):,.0f} rows/s)")
+    print(f"Peak memory {peak_rss_mib():,.0f} MiB ({rss_before:,.0f} MiB before the export), "
+          f"{os.path.getsize(out) / 2**20:,.1f} MiB written")
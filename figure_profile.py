@@ -0,0 +1,89 @@
+import argparse
+import time
+
+import plotly.express as px
+
+import lambda_function
+from event_schema import with_date_parts
+from scatter_figures import magnitude_depth_figure, recent_events_figure
+from synthetic_usgs import generate_payload
+
+# Size and build time of the dashboard scatter figures, before (every event,
+# full hover data) and after scatter_figures, on synthetic events.
+# The JSON size is what Streamlit sends to the browser for the figure.
+# With --render the figures are also rendered to PNG through kaleido, when it
+# is installed, as a stand-in for the browser's render time.
+#
+#   python figure_profile.py --sizes 10000 100000
+
+DEFAULT_SIZES = [10000, 100000]
+
+# The scatter_plots and recent_7days figures as they were built before
+def legacy_figure(df, x, y, title):
+    fig = px.scatter(
+        df,
+        x=x,
+        y=y,
+        color='magnitude',
+        color_continuous_scale='RdYlBu_r',
+        color_discrete_map={'red': 'red', 'orange': 'orange', 'blue': 'blue'},
+        hover_data=['location', 'time_readable'],
+        labels={'depth_km': 'Depth (km)', 'magnitude': 'Magnitude'},
+        title=title
+    )
+    fig.update_traces(marker=dict(size=10))
+    fig.update_layout(showlegend=False)
+    return fig
+
+FIGURES = {
+    "magnitude_depth_legacy": lambda df: legacy_figure(df, 'magnitude', 'depth_km', 'Magnitude vs. Depth'),
+    "magnitude_depth": magnitude_depth_figure,
+    "recent_7days_legacy": lambda df: legacy_figure(df, 'date', 'magnitude', 'Recent 7 days'),
+    "recent_7days": recent_events_figure,
+}
+
+def event_frame(n_events, seed):
+    df = lambda_function.clean_data(generate_payload(n_events, seed=seed))
+    return with_date_parts(df, 'date', 'time_readable')
+
+# Best-of-repeat timings of one figure: build, JSON serialization and
+# (optionally) rendering
+def profile_figure(build, df, repeat, render):
+    best = {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fig = build(df)
+        built = time.perf_counter()
+        payload = fig.to_json()
+        serialized = time.perf_counter()
+        timings = {"build": built - start, "to_json": serialized - built}
+        if render:
+            fig.to_image(format="png")
+            timings["render"] = time.perf_counter() - serialized
+        for name, seconds in timings.items():
+            best[name] = min(best.get(name, seconds), seconds)
+    points = sum(len(trace.x) for trace in fig.data)
+    return {"trace": fig.data[0].type, "points": points, "json_bytes": len(payload), **best}
+
+def print_report(n_events, results):
+    print(f"\n{n_events:,} events")
+    for name, r in results.items():
+        line = (f"  {name:<24} {r['trace']:<10} {r['points']:>8,} points {r['json_bytes'] / 1024:10.0f} KiB"
+                f" {r['build'] * 1000:8.1f} ms build {r['to_json'] * 1000:8.1f} ms to_json")
+        if "render" in r:
+            line += f" {r['render'] * 1000:8.1f} ms render"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report size and build time of the scatter figures")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--render", action="store_true", help="also render to PNG (needs kaleido)")
+    args = parser.parse_args()
+
+    for n_events in args.sizes:
+        df = event_frame(n_events, args.seed)
+        results = {name: profile_figure(build, df, args.repeat, args.render) for name, build in FIGURES.items()}
+        print_report(n_events, results)
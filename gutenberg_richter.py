@@ -0,0 +1,206 @@
+import math
+import threading
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Magnitude-frequency (Gutenberg-Richter) analytics: the magnitude of
+# completeness (Mc, maximum curvature method) and the maximum-likelihood
+# b-value (Aki 1965, with Utsu's correction for binned magnitudes), with
+# bootstrap uncertainties, for many groups at once. A group is a region (a
+# country or a CELL_DEGREES grid cell) over a time window.
+#
+# Everything works on per-group magnitude histograms, so thousands of groups
+# are handled with a few array operations. The bootstrap resamples the events
+# of every group with replacement, BOOTSTRAP_SAMPLES times, in chunks of
+# replicates that each need a single bincount.
+#
+# GutenbergRichterCache keeps results per (region, window) and refits only
+# the entries whose events changed, up to CACHE_ENTRIES of them. The dashboard
+# panel keeps one for the whole app; benchmark.py times fits of thousands of cells.
+
+MAG_BIN = 0.1
+# Maximum curvature tends to underestimate Mc; the usual correction
+MAXC_CORRECTION = 0.2
+# Events at or above Mc needed for a b-value
+MIN_EVENTS = 50
+BOOTSTRAP_SAMPLES = 200
+CELL_DEGREES = 2.0
+DAY_MS = 24 * 60 * 60 * 1000
+# Array cells per chunk of bootstrap replicates; a replicate needs one cell
+# per event (the draws) and one per group and magnitude bin (the counts)
+BOOTSTRAP_CHUNK_CELLS = 4_000_000
+# (region, window) results kept by a GutenbergRichterCache at most
+CACHE_ENTRIES = 50_000
+
+RESULT_COLUMNS = ["region", "window_start", "window_end", "events", "mc", "mc_std", "b", "b_std", "events_above_mc"]
+
+# Region key of every event: the country, the south-west corner of its cell,
+# or "All" to treat the events as one region
+def region_keys(df, by="cell"):
+    if by == "all":
+        return np.full(len(df), "All", dtype=object)
+    if by == "country":
+        return df["country"].astype(str).to_numpy()
+    lat = np.floor(df["latitude"].to_numpy(dtype=float) / CELL_DEGREES) * CELL_DEGREES
+    lon = np.floor(df["longitude"].to_numpy(dtype=float) / CELL_DEGREES) * CELL_DEGREES
+    # the labels are formatted once per cell rather than once per event
+    cells, first = np.unique(np.stack([lat, lon]), axis=1, return_inverse=True)
+    labels = np.array([f"{cell_lat:+.0f},{cell_lon:+.0f}" for cell_lat, cell_lon in cells.T], dtype=object)
+    return labels[first.ravel()]
+
+# Mc (as a bin index), b-value and number of events above Mc of every
+# histogram along the last axis; NaN where there are too few events
+def fit_histograms(counts, first_bin):
+    n_bins = counts.shape[-1]
+    mc_bin = np.minimum(counts.argmax(axis=-1) + round(MAXC_CORRECTION / MAG_BIN), n_bins - 1)
+    above = np.arange(n_bins) >= mc_bin[..., None]
+    magnitudes = (first_bin + np.arange(n_bins)) * MAG_BIN
+    n_above = np.where(above, counts, 0).sum(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(above, counts * magnitudes, 0).sum(axis=-1) / n_above
+        mc = magnitudes[mc_bin]
+        b = math.log10(math.e) / (mean - (mc - MAG_BIN / 2))
+    b = np.where(n_above >= MIN_EVENTS, b, np.nan)
+    return mc, b, n_above
+
+# Bootstrap standard deviations of Mc and b for every group. bins are the
+# magnitude bins of the events sorted by group, sizes the events per group.
+def bootstrap(bins, sizes, n_bins, first_bin, samples, rng):
+    n_groups = len(sizes)
+    starts = np.repeat(np.cumsum(sizes) - sizes, sizes)
+    lengths = np.repeat(sizes, sizes)
+    groups = np.repeat(np.arange(n_groups), sizes)
+    mc = np.empty((samples, n_groups))
+    b = np.empty((samples, n_groups))
+    # at least one replicate per chunk, whose counts are as large as the
+    # histograms fit_groups has already built
+    chunk = max(1, min(samples, BOOTSTRAP_CHUNK_CELLS // max(len(bins), n_groups * n_bins, 1)))
+    for first in range(0, samples, chunk):
+        replicates = min(chunk, samples - first)
+        # every event is replaced by a random event of its own group
+        draws = starts + (rng.random((replicates, len(bins))) * lengths).astype(np.int64)
+        flat = (np.arange(replicates)[:, None] * n_groups + groups) * n_bins + bins[draws]
+        counts = np.bincount(flat.ravel(), minlength=replicates * n_groups * n_bins)
+        mc[first:first + replicates], b[first:first + replicates], _ = fit_histograms(
+            counts.reshape(replicates, n_groups, n_bins), first_bin)
+    with warnings.catch_warnings():
+        # groups with too few events have no b-value in any replicate
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return mc.std(axis=0), np.nanstd(b, axis=0)
+
+# Fits every group of events; group holds the group index of each event.
+# Returns a frame with one row per group index 0..n_groups-1.
+def fit_groups(magnitude, group, n_groups, samples=BOOTSTRAP_SAMPLES, seed=0):
+    magnitude = np.asarray(magnitude, dtype=float)
+    valid = ~np.isnan(magnitude)
+    magnitude, group = magnitude[valid], np.asarray(group)[valid]
+    result = pd.DataFrame({"events": np.bincount(group, minlength=n_groups)})
+    if len(magnitude) == 0:
+        return result.assign(mc=np.nan, mc_std=np.nan, b=np.nan, b_std=np.nan, events_above_mc=0)
+
+    all_bins = np.round(magnitude / MAG_BIN).astype(np.int64)
+    first_bin = all_bins.min()
+    bins = all_bins - first_bin
+    n_bins = int(bins.max()) + 1
+    counts = np.bincount(group * n_bins + bins, minlength=n_groups * n_bins).reshape(n_groups, n_bins)
+    mc, b, n_above = fit_histograms(counts, first_bin)
+
+    order = np.argsort(group, kind="stable")
+    mc_std, b_std = bootstrap(bins[order], result["events"].to_numpy(), n_bins, first_bin, samples,
+                              np.random.default_rng(seed))
+    result = result.assign(mc=mc, mc_std=mc_std, b=b, b_std=np.where(np.isnan(b), np.nan, b_std),
+                           events_above_mc=n_above)
+    result.loc[result["events"] == 0, ["mc", "mc_std"]] = np.nan
+    return result
+
+# Frequency-magnitude distribution: events per MAG_BIN bin and events at or
+# above each bin
+def magnitude_frequency(magnitude):
+    magnitude = np.asarray(magnitude, dtype=float)
+    bins = np.round(magnitude[~np.isnan(magnitude)] / MAG_BIN).astype(np.int64)
+    if len(bins) == 0:
+        return pd.DataFrame(columns=["magnitude", "count", "cumulative"])
+    counts = np.bincount(bins - bins.min())
+    return pd.DataFrame({
+        "magnitude": np.round((bins.min() + np.arange(len(counts))) * MAG_BIN, 1),
+        "count": counts,
+        "cumulative": counts[::-1].cumsum()[::-1],
+    })
+
+# Windows of window_days every step_days that end at end_ms, oldest first
+def rolling_windows(start_ms, end_ms, window_days, step_days):
+    windows = []
+    end = end_ms
+    while end - window_days * DAY_MS >= start_ms:
+        windows.append((end - window_days * DAY_MS, end))
+        end -= step_days * DAY_MS
+    return windows[::-1] or [(start_ms, end_ms)]
+
+# Results for every (region, window) with events; windows are (start_ms, end_ms)
+def gutenberg_richter(df, windows, by="cell", samples=BOOTSTRAP_SAMPLES, seed=0):
+    keys = region_keys(df, by)
+    times = df["time_epoch"].to_numpy(dtype=np.int64)
+    magnitude = df["magnitude"].to_numpy(dtype=float, na_value=np.nan)
+
+    # events are repeated for every window they fall in
+    rows = [np.flatnonzero((times >= start) & (times < end)) for start, end in windows]
+    window_index = np.concatenate([np.full(len(r), i) for i, r in enumerate(rows)]) if rows else np.empty(0, int)
+    events = np.concatenate(rows) if rows else np.empty(0, int)
+    pairs = pd.MultiIndex.from_arrays([keys[events], window_index])
+    group, unique_pairs = pd.factorize(pairs)
+
+    result = fit_groups(magnitude[events], group, len(unique_pairs), samples, seed)
+    window_bounds = np.asarray(windows, dtype=np.int64).reshape(-1, 2)
+    window_of = unique_pairs.get_level_values(1).to_numpy(dtype=int)
+    result.insert(0, "region", unique_pairs.get_level_values(0))
+    result.insert(1, "window_start", window_bounds[window_of, 0])
+    result.insert(2, "window_end", window_bounds[window_of, 1])
+    return result[RESULT_COLUMNS]
+
+
+# Results per (scope, by, region, window_start, window_end), computed only
+# for the keys that are missing. scope names the selection the events come
+# from (e.g. the continent and country filter), so that different selections
+# do not refit each other's entries. Every entry remembers the number of
+# events it was fitted on and the latest updated_time_epoch among them, so an
+# entry is refitted once events of its region and window are added or
+# updated. The least recently used entries beyond max_entries are dropped.
+class GutenbergRichterCache:
+    def __init__(self, samples=BOOTSTRAP_SAMPLES, max_entries=CACHE_ENTRIES):
+        self.samples = samples
+        self.max_entries = max_entries
+        # key -> (events, latest update, result row), least recently used first
+        self.results = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, df, windows, by="cell", scope=None):
+        keys = region_keys(df, by)
+        times = df["time_epoch"].to_numpy(dtype=np.int64)
+        updated = df["updated_time_epoch"].to_numpy(dtype=np.int64)
+        rows = []
+        with self.lock:
+            for start, end in windows:
+                in_window = (times >= start) & (times < end)
+                fingerprints = (pd.Series(updated[in_window]).groupby(keys[in_window], sort=False)
+                                .agg(["size", "max"]))
+                stale = [region for region, size, latest in fingerprints.itertuples()
+                         if self.results.get((scope, by, region, start, end), (None, None))[:2] != (size, latest)]
+                if stale:
+                    # only the events of the regions to refit in this window
+                    if len(stale) < len(fingerprints):
+                        in_window &= pd.Series(keys).isin(stale).to_numpy()
+                    subset = df[in_window]
+                    for row in gutenberg_richter(subset, [(start, end)], by, self.samples).to_dict("records"):
+                        size, latest = fingerprints.loc[row["region"]]
+                        self.results[(scope, by, row["region"], start, end)] = (size, latest, row)
+                for region in fingerprints.index:
+                    key = (scope, by, region, start, end)
+                    self.results.move_to_end(key)
+                    rows.append(self.results[key][2])
+            # evicted once the rows of this call are collected
+            while len(self.results) > self.max_entries:
+                self.results.popitem(last=False)
+        return pd.DataFrame(rows, columns=RESULT_COLUMNS)
@@ -0,0 +1,66 @@
+import argparse
+import subprocess
+import sys
+
+# Import-time profile of a module, based on `python -X importtime`.
+# Every run starts a fresh interpreter, so the numbers are cold-start numbers.
+#
+#   python import_profile.py lambda_function
+#   python import_profile.py lambda_function awswrangler pycountry --top 15 --repeat 5
+
+# Returns [(self_us, cumulative_us, depth, name)] for one cold import of module
+def profile_import(module):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        if not fields[0].strip().isdigit():
+            continue  # header line
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((int(fields[0]), int(fields[1]), depth, name.strip()))
+    return entries
+
+def total_us(module, entries):
+    return next((e[1] for e in reversed(entries) if e[3] == module), sum(e[0] for e in entries))
+
+# Best of `repeat` cold imports, to keep disk cache and scheduler noise out
+def best_profile(module, repeat):
+    runs = [profile_import(module) for _ in range(repeat)]
+    return min(runs, key=lambda entries: total_us(module, entries))
+
+def print_report(module, entries, top):
+    total = total_us(module, entries)
+    print(f"\nimport {module}: {total / 1000:.1f} ms cumulative, {len(entries)} modules")
+
+    # time spent in each top-level package pulled in directly or indirectly
+    packages = {}
+    for self_us, cumulative_us, depth, name in entries:
+        root = name.split(".")[0]
+        if root == module:
+            continue
+        packages[root] = packages.get(root, 0) + self_us
+    print(f"  {'package':<30} {'self ms':>10}")
+    for root, self_us in sorted(packages.items(), key=lambda p: -p[1])[:top]:
+        print(f"  {root:<30} {self_us / 1000:10.1f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold import-time profile")
+    parser.add_argument("modules", nargs="+")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    for module in args.modules:
+        print_report(module, best_profile(module, args.repeat), args.top)
+
+
+if __name__ == "__main__":
+    main()
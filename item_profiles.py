@@ -0,0 +1,212 @@
+import json
+import math
+import os
+import zlib
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from event_schema import DERIVED_COLUMNS, with_date_parts
+
+# Layout of the event items persisted in DynamoDB. The pipelines produce every
+# column left after clean_data plus the derived date parts; a storage profile
+# decides which of them are written:
+#
+#   full   every column, as the pipelines always wrote them (the default)
+#   lean   a compact core record, opted in to:
+#            - the date parts and full_alert_level are dropped and rebuilt on
+#              read from time_epoch, updated_time_epoch, magnitude,
+#              tsunami_warning and alert_level (time_bucket stays, it is the
+#              key of the time index)
+#            - detail_url is dropped when it is the standard USGS event page
+#              of the id
+#            - the rarely read text (event_title, data_sources, event_types)
+#              goes into one zlib-compressed binary "detail" attribute; a
+#              title of the usual "M <mag> - <location>" form only keeps its
+#              magnitude
+#            - empty (null / NaN) attributes are left out
+#
+# Items of both profiles can sit in the same table: readers project
+# stored_attributes(columns) and pass the items through rehydrate, which
+# gives back the requested columns whatever the profile of each item.
+# EARTHQUAKE_STORAGE_PROFILE picks the profile the pipelines write with.
+# Before switching a table to lean, move every reader of raw items that
+# expects year, month, day, the updated_ parts, full_alert_level,
+# event_title, data_sources, event_types or detail_url onto
+# stored_attributes/rehydrate (load_events and DynamoDBBackend already are).
+
+PROFILES = ["full", "lean"]
+DEFAULT_PROFILE = "full"
+EVENT_URL = "https://earthquake.usgs.gov/earthquakes/eventpage/"
+DETAIL_ATTRIBUTE = "detail"
+DETAIL_COLUMNS = ["event_title", "data_sources", "event_types"]
+# Columns the lean profile does not write
+REBUILT_COLUMNS = [c for c in DERIVED_COLUMNS if c != "time_bucket"] + ["full_alert_level"]
+# Attributes each rebuilt column is computed from
+REBUILT_SOURCES = {
+    **{c: ["updated_time_epoch" if c.startswith("updated_") else "time_epoch"] for c in REBUILT_COLUMNS},
+    "full_alert_level": ["magnitude", "tsunami_warning", "alert_level"],
+    "detail_url": ["detail_url", "id"],
+    **{c: [DETAIL_ATTRIBUTE, c] for c in DETAIL_COLUMNS},
+    "event_title": [DETAIL_ATTRIBUTE, "event_title", "location"],
+}
+# Preset zlib dictionary with the strings the detail attributes repeat; the
+# detail format byte has to change with it
+DETAIL_FORMAT = b"\x01"
+DETAIL_DICTIONARY = (b'{"title_magnitude": "", "data_sources": ",us,ak,ci,nc,hv,nn,pr,uw,", "event_types": '
+                     b'",dyfi,losspager,moment-tensor,nearby-cities,origin,phase-data,scitech-link,shakemap,"}')
+
+
+# Profile set by EARTHQUAKE_STORAGE_PROFILE
+def storage_profile():
+    profile = os.environ.get("EARTHQUAKE_STORAGE_PROFILE", DEFAULT_PROFILE)
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown EARTHQUAKE_STORAGE_PROFILE: {profile}")
+    return profile
+
+def is_empty(value):
+    if value is None:
+        return True
+    if isinstance(value, Decimal):
+        return value.is_nan()
+    return isinstance(value, float) and math.isnan(value)
+
+def compress_detail(detail):
+    compressor = zlib.compressobj(9, zdict=DETAIL_DICTIONARY)
+    return DETAIL_FORMAT + compressor.compress(json.dumps(detail).encode("utf-8")) + compressor.flush()
+
+def decompress_detail(blob):
+    # boto3 returns Binary attributes wrapped, the local table returns bytes
+    blob = bytes(getattr(blob, "value", blob))
+    if blob[:1] != DETAIL_FORMAT:
+        raise ValueError(f"Unknown detail format {blob[:1]!r}")
+    decompressor = zlib.decompressobj(zdict=DETAIL_DICTIONARY)
+    return json.loads(decompressor.decompress(blob[1:]) + decompressor.flush())
+
+# Detail attribute of one event: its text columns, with a title of the usual
+# form reduced to its magnitude
+def event_detail(row):
+    detail = {}
+    title, location = row.get("event_title"), row.get("location")
+    if isinstance(title, str) and isinstance(location, str) and title.startswith("M ") \
+            and title.endswith(" - " + location):
+        detail["title_magnitude"] = title[2:-len(" - " + location)]
+    elif not is_empty(title):
+        detail["event_title"] = title
+    for column in ("data_sources", "event_types"):
+        if not is_empty(row.get(column)):
+            detail[column] = row[column]
+    return detail
+
+# Items to write for the events of df (as returned by process_data_for_dynamodb)
+def persisted_items(df, profile=DEFAULT_PROFILE):
+    records = df.to_dict("records")
+    if profile == "full":
+        return records
+    items = []
+    for row in records:
+        item = {name: value for name, value in row.items()
+                if name not in REBUILT_COLUMNS and name not in DETAIL_COLUMNS and not is_empty(value)}
+        if item.get("detail_url") == EVENT_URL + str(item["id"]):
+            del item["detail_url"]
+        detail = event_detail(row)
+        if detail:
+            item[DETAIL_ATTRIBUTE] = compress_detail(detail)
+        items.append(item)
+    return items
+
+
+# Attributes to read for the given columns from items of any profile
+def stored_attributes(columns):
+    attributes = []
+    for column in columns:
+        attributes += REBUILT_SOURCES.get(column, [column])
+    return list(dict.fromkeys(attributes))
+
+# Approximate DynamoDB item size (attribute names + values) in bytes
+def item_size(item):
+    size = 0
+    for name, value in item.items():
+        size += len(name.encode("utf-8")) + value_size(value)
+    return size
+
+def value_size(value):
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, (int, float, Decimal)):
+        # numbers are stored as up to 38 significant digits, 2 digits per byte
+        digits = len(str(value).lstrip("-").replace(".", "").lstrip("0")) or 1
+        return math.ceil(digits / 2) + 1
+    if isinstance(value, dict):
+        return 3 + item_size(value)
+    if isinstance(value, (list, tuple, set)):
+        return 3 + sum(value_size(v) + 1 for v in value)
+    return len(str(value).encode("utf-8"))
+
+# Write capacity units of putting one item (1 KB each)
+def write_capacity_units(size):
+    return math.ceil(size / 1024)
+
+# Read capacity units of Scan/Query reads of read_bytes (4 KB each, half for
+# eventually consistent reads); DynamoDB rounds per page, this does not
+def read_capacity_units(read_bytes, consistent=False):
+    units = math.ceil(read_bytes / 4096)
+    return units if consistent else units / 2
+
+# Expanded alert classification of the pipelines, on whole columns
+def full_alert_levels(df):
+    magnitude = pd.to_numeric(df["magnitude"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    tsunami = pd.to_numeric(df["tsunami_warning"], errors="coerce").to_numpy(dtype=float, na_value=np.nan) == 1
+    alert = df["alert_level"].astype(object)
+    return np.select(
+        [tsunami & (magnitude >= 6.5), tsunami, magnitude >= 7.0, magnitude >= 6.0,
+         alert.isin(["orange", "red"]).to_numpy(), alert.isin(["yellow", "green"]).to_numpy()],
+        ["Severe Tsunami Risk", "Tsunami Warning", "Major Earthquake", "Strong Earthquake",
+         "Significant Alert", "Moderate Alert"],
+        "No Alert",
+    )
+
+# Values of column where the items have one, fallback elsewhere
+def with_fallback(df, column, fallback):
+    if column not in df:
+        return pd.Series(fallback, index=df.index, dtype=object)
+    return df[column].astype(object).where(df[column].notna(), pd.Series(fallback, index=df.index, dtype=object))
+
+# Frame of the given columns (default: every column of the full profile)
+# from items read with stored_attributes, whatever their profile
+def rehydrate(df, columns=None):
+    columns = columns or list(dict.fromkeys([c for c in df if c != DETAIL_ATTRIBUTE] + list(REBUILT_SOURCES)))
+    if df.empty:
+        # no items (e.g. an empty date range), so no id or time to rebuild from
+        return df.reindex(columns=columns)
+    wanted = set(columns)
+    df = df.copy()
+
+    if wanted & set(DETAIL_COLUMNS):
+        blobs = df[DETAIL_ATTRIBUTE] if DETAIL_ATTRIBUTE in df else pd.Series(None, index=df.index, dtype=object)
+        details = [decompress_detail(blob) if not is_empty(blob) else {} for blob in blobs]
+        for column in ("data_sources", "event_types"):
+            if column in wanted:
+                df[column] = with_fallback(df, column, [d.get(column) for d in details])
+        if "event_title" in wanted:
+            location = df["location"] if "location" in df else pd.Series(None, index=df.index)
+            titles = [d.get("event_title") if "title_magnitude" not in d else f"M {d['title_magnitude']} - {place}"
+                      for d, place in zip(details, location)]
+            df["event_title"] = with_fallback(df, "event_title", titles)
+    if "detail_url" in wanted:
+        df["detail_url"] = with_fallback(df, "detail_url", (EVENT_URL + df["id"].astype(str)).to_numpy())
+    if "full_alert_level" in wanted:
+        df["full_alert_level"] = full_alert_levels(df)
+
+    # the date parts are always rebuilt, so every item gets the same types
+    parts = [c for c in columns if c in DERIVED_COLUMNS and c in REBUILT_COLUMNS]
+    if parts:
+        epochs = {source: pd.to_numeric(df[source]).astype("int64")
+                  for source in ("time_epoch", "updated_time_epoch") if source in df}
+        df = with_date_parts(df.assign(**epochs), *parts)
+    return df.reindex(columns=columns)
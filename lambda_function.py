@@ -1,62 +1,42 @@
-import time
 import requests
 import pandas as pd
 import numpy as np
-import io
-import boto3
-import base64
-import random
-import json
-import awswrangler as wr
 from decimal import Decimal
-from datetime import datetime
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
 from dateutil.relativedelta import relativedelta
-from boto3.dynamodb.conditions import Key, Attr
-import pycountry
-import pycountry_convert as pc
-import re
+from event_schema import WRITE_SCHEMA, apply_schema
+from time_partition import time_buckets
+from region_resolver import resolve_regions
+from storage import get_backend
+from rate_detector import update_from_batch
+from write_behind import write_buffer
+
+# NOTE: boto3, awswrangler (via storage) and reverse_geocoder (via region_resolver) are
+# imported where they are first used. They are the slowest imports of the
+# function and are not needed on every invocation (e.g. when there are no new
+# events), so keeping them out of module load shortens cold starts.
+# pandas/numpy/requests are needed by every invocation and stay at the top.
+# See import_profile.py for the import-time breakdown.
 
 # USGS Earthquake API Endpoint
 USGS_API_URL = "https://earthquake.usgs.gov/fdsnws/event/1/query"
+# Seconds of the invocation left for returning after draining the write-behind log
+DRAIN_MARGIN_SECONDS = 10
 
-countries = {}
-
-US_STATE_ABBR = {
-    "AK", "AL", "AR", "AZ", "CA", "CO", "CT", "DE", "FL", "GA", "HI", "IA",
-    "ID", "IL", "IN", "KS", "KY", "LA", "MA", "MD", "ME", "MI", "MN", "MO",
-    "MS", "MT", "NC", "ND", "NE", "NH", "NJ", "NM", "NV", "NY", "OH", "OK",
-    "OR", "PA", "RI", "SC", "SD", "TN", "TX", "UT", "VA", "VT", "WA", "WI",
-    "WV", "WY", "DC", "AS", "GU", "MP", "PR", "VI"}
-
-US_STATE_NAMES = {
-    "Alabama", "Alaska", "Arizona", "Arkansas", "California", "Colorado", 
-    "Connecticut", "Delaware", "Florida", "Georgia", "Hawaii", "Idaho", 
-    "Illinois", "Indiana", "Iowa", "Kansas", "Kentucky", "Louisiana", 
-    "Maine", "Maryland", "Massachusetts", "Michigan", "Minnesota", 
-    "Mississippi", "Missouri", "Montana", "Nebraska", "Nevada", "New Hampshire", 
-    "New Jersey", "New Mexico", "New York", "North Carolina", "North Dakota", 
-    "Ohio", "Oklahoma", "Oregon", "Pennsylvania", "Rhode Island", "South Carolina", 
-    "South Dakota", "Tennessee", "Texas", "Utah", "Vermont", "Virginia", 
-    "Washington", "West Virginia", "Wisconsin", "Wyoming"}
-
-# Get the most recent updated timestamp from datatbase
+
+# Get the most recent updated timestamp from datatbase, or the oldest event
+# still waiting in the write-behind log when that is older
 def get_latest_datetimestamp_db():
-    dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
-    table = dynamodb.Table("earthquakes")
     year = datetime.now(timezone.utc).year
     month = datetime.now(timezone.utc).month
-    
-    response = table.scan(
-        FilterExpression=Attr("updated_year").eq(year) and Attr("updated_month").eq(month), 
-        ProjectionExpression='time_epoch')
-
-    if len(response['Items']) != 0:
-        epoch_time = []
-        for item in response['Items']:
-            epoch_time.append(int(item['time_epoch']))
+    time_epoch = get_backend().latest_time_epoch(year, month)
+    buffer = write_buffer()
+    pending = buffer.oldest_pending() if buffer is not None else None
+    if pending is not None:
+        time_epoch = pending if time_epoch is None else min(time_epoch, pending)
+
+    if time_epoch is not None:
         # find the latest time
-        time_epoch = max(epoch_time)
         latest_datetime = datetime.utcfromtimestamp(time_epoch/1000).strftime('%Y-%m-%dT%H:%M:%S')
     else:
         latest_datetime = (datetime.now(timezone.utc) - relativedelta(hours=3)).strftime('%Y-%m-%dT%H:%M:%S')
@@ -137,46 +117,20 @@ def clean_data(json_data):
     # Drop Rows with Essential Data Missing
     df.dropna(subset=["magnitude", "latitude", "longitude", "depth_km"])
 
-    return df
-
-# Geo lookup
-def latlon_to_country(lat, lon):
-    try:
-        result = rg.search((lat, lon), mode=1)[0]
-        return pycountry.countries.get(alpha_2=result['cc']).name
-    except:
-        return "Unknown"
-
-# Converts country code to continent
-def country_to_continent(country_code):
-    return pc.country_alpha2_to_continent_code(country_code)
-
-# Get corresponding country and continent of earthquake
-def get_country_continent(location, lat, lon):
-    try:
-        country_name = ""
-        # use regex to extract region name
-        region = re.search(r",\s*(.*)$", location).group(1)
-        # region extracted is country
-        if region in countries:
-            country_name = region
-        # region extracted is US state
-        elif region in US_STATE_ABBR or region in US_STATE_NAMES:
-            country_name = "United States"
-        else:
-            # use coordiates to extract country
-            country_name = latlon_to_country(lat, lon)
-        return country_name, country_to_continent(countries[country_name])
-    except:
-        return "Unknown", "Unknown"
+    # Categoricals and narrow integers; floats keep their full precision
+    # for the written items (see event_schema)
+    return apply_schema(df, WRITE_SCHEMA)
 
 # Transform data for analysis
 def data_processing_transformation(df):
     # breaking down time components for easy analysis
     df["time_readable"] = pd.to_datetime(df["time_epoch"], unit="ms")
+    df["date"] = df["time_readable"].dt.date
     df["year"] = df["time_readable"].dt.year
     df["month"] = df["time_readable"].dt.month
     df["day"] = df["time_readable"].dt.day
+    # partition key of the time index (see time_partition)
+    df["time_bucket"] = time_buckets(df["time_epoch"])
 
     # breaking down updated time component
     df['updated_time_readable'] = pd.to_datetime(df["updated_time_epoch"], unit="ms")
@@ -184,7 +138,10 @@ def data_processing_transformation(df):
     df["updated_month"] = df["updated_time_readable"].dt.month
     
     # extracting region information (country and continent)
-    df[["country", "continent"]] = df.apply(lambda row: get_country_continent(row["location"], row["latitude"], row["longitude"]), axis=1, result_type="expand")
+    country, continent, fallback = resolve_regions(df["location"], df["latitude"], df["longitude"])
+    df["country"] = country
+    df["continent"] = continent
+    print("Geocoder fallback:", int(fallback.sum()), "of", df.shape[0], "records")
 
     # expanded alert classification 
     def expanded_alert(row):
@@ -209,38 +166,71 @@ def data_processing_transformation(df):
 
 # Converts data types for dynamodb
 def process_data_for_dynamodb(df):
-    float_columns =  df.select_dtypes(include=['float','int'])
+    float_columns =  df.select_dtypes(include=['number'])
     for c in float_columns:
         str_vals = df[c].astype(str)
         mask = df[c].notnull()
         df[c] = np.where(mask, str_vals, None)
         df[c] = df[c].apply(lambda x: Decimal(x) if x is not None else None)
 
+    df['date']= df['date'].astype(str)
     df['time_readable']= df['time_readable'].astype(str)
     df['updated_time_readable']= df['updated_time_readable'].astype(str)
 
     return df
 
-# writes data to dynamodb
+# writes data to dynamodb through the write-behind log (see write_behind), or
+# to the backend set by EARTHQUAKE_STORAGE (see storage)
 def save_to_dynamodb(df):
-    boto3.setup_default_session(region_name='us-east-1')
-    wr.dynamodb.put_df(df=df, table_name='earthquakes')
-    print("Stored:", df.shape[0], 'records')
+    buffer = write_buffer()
+    if buffer is None:
+        get_backend().save(df)
+        print("Stored:", df.shape[0], 'records')
+        return
+    buffer.append(df)
+    buffer.start()
+    print("Queued:", df.shape[0], 'records')
 
 # Retrieve, clean, transform and write data to database 
 def clean_transform_write_latest_data(params=None):
     starttime = get_latest_datetimestamp_db()
     json_data = fetch_daily_earthquake_data(starttime)
+    if not json_data or not json_data["features"]:
+        print("No new earthquakes")
+        return
     print("Cleaning and transforming data....")
     df = clean_data(json_data)
     df = data_processing_transformation(df)
     print("Pocessing and saving data to DynamoDB...")
     df = process_data_for_dynamodb(df)
     save_to_dynamodb(df)
+    detect_rate_spikes(df)
 
-def lambda_handler(event, context):
-    # Create a global map of countries and it's corresponding country code
-    for country in list(pycountry.countries):
-        countries[country.name] = country.alpha_2
+# Feeds the stored batch to the seismicity-rate detector (see rate_detector).
+# The detector is an add-on: its failures (e.g. a missing state table) are
+# logged and never fail the ingestion.
+def detect_rate_spikes(df):
+    try:
+        alerts = update_from_batch(get_backend(), df)
+    except Exception as e:
+        print("Rate detector failed:", repr(e))
+        return
+    for alert in alerts:
+        print("Rate alert:", alert['region'], "short/long rate ratio", round(alert['ratio'], 1),
+              "at", datetime.utcfromtimestamp(alert['time_epoch']/1000).strftime('%Y-%m-%dT%H:%M:%S'))
 
+def lambda_handler(event, context):
+    buffer = write_buffer()
+    if buffer is not None:
+        # resumes the items an earlier invocation left in the log
+        buffer.start()
     clean_transform_write_latest_data()
+    if buffer is not None:
+        timeout = None
+        if context is not None:
+            timeout = max(context.get_remaining_time_in_millis() / 1000 - DRAIN_MARGIN_SECONDS, 0)
+        left = buffer.close(timeout)
+        if left:
+            # the log may be gone with this container, so the run fails
+            # loudly; a retry that finds the log fetches from the oldest of them
+            raise RuntimeError(f"{left} records left in the write-behind log {buffer.path}")
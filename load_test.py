@@ -0,0 +1,186 @@
+import argparse
+import datetime
+import multiprocessing
+import random
+import threading
+import time
+from dataclasses import replace
+
+import numpy as np
+
+from dashboard_data import dashboard_window, trend_window
+from event_schema import date_to_epoch_ms
+from gutenberg_richter import GutenbergRichterCache, rolling_windows
+from query_service import CACHE_SECONDS, QueryService, ResponseCache, ServiceBackend, make_server
+from storage import DynamoDBBackend, EventFilter, get_backend
+
+# Load test of the dashboard queries with a growing number of concurrent
+# sessions. Every session repeats dashboard runs (the queries main() makes
+# for one page view, see dashboard_run) on selections drawn from a small set,
+# as viewers of the same dashboard do. Reported per number of sessions: runs
+# per second and the median and p99 latency of a run.
+#
+#   service   the sessions share one query service (started in-process, or
+#             the one at --url)
+#   direct    every run builds its own backend and reads and aggregates the
+#             window itself, as streamlit_app does without the service
+#
+# With --synthetic the events live in an in-memory DynamoDB stand-in, so
+# direct runs pay for reading and typing the window as they do on DynamoDB;
+# otherwise the backend comes from EARTHQUAKE_STORAGE. Sessions are forked
+# processes, so the machine's cores bound how many really run at once.
+#
+#   python load_test.py --synthetic 100000 --sessions 1 5 10 25 50
+#   python load_test.py --synthetic 100000 --mode direct --sessions 1 5 10
+#   python load_test.py --url http://localhost:8765 --start 2024-12-01 --end 2025-01-01
+
+DEFAULT_SESSIONS = [1, 5, 10, 25]
+RUNS_PER_SESSION = 5
+EVENT_COLUMNS = ['magnitude', 'location', 'time_epoch', 'latitude', 'longitude', 'depth_km', 'country',
+                 'continent', 'alert_level']
+GUTENBERG_RICHTER_COLUMNS = ['magnitude', 'time_epoch', 'updated_time_epoch', 'latitude', 'longitude', 'country']
+
+# The backend queries of one dashboard page view for a selection, and the
+# Gutenberg-Richter fits of its panel from cache (kept across the runs of a
+# session, as streamlit_app keeps them across reruns)
+def dashboard_run(backend, selection, cache):
+    window = EventFilter(*dashboard_window(selection.start_date, selection.end_date))
+    backend.regions(window)
+    magnitude_range = backend.magnitude_range(selection)
+    if magnitude_range is None:
+        return
+    selection = replace(selection, min_mag=magnitude_range[0], max_mag=magnitude_range[1])
+    backend.kpis(selection)
+    backend.events(selection, EVENT_COLUMNS)
+    backend.max_event(window)
+    backend.events(replace(selection, start_date=selection.end_date - datetime.timedelta(days=7)),
+                   ['magnitude', 'location', 'time_epoch'])
+    backend.alert_counts(selection)
+    backend.monthly_trend(selection)
+    backend.hotspots(selection)
+    backend.events(selection, EVENT_COLUMNS, newest=50)
+    gutenberg_richter_run(backend, selection, cache)
+
+# The Gutenberg-Richter panel of streamlit_app: every magnitude of the trend
+# window and the selection, fitted for the selection, its rolling windows and
+# its cells
+def gutenberg_richter_run(backend, selection, cache):
+    start_date, end_date = trend_window(selection.end_date)
+    start_date = min(start_date, selection.start_date)
+    df = backend.events(replace(selection, start_date=start_date, min_mag=None, max_mag=None, tsunami_only=False),
+                        GUTENBERG_RICHTER_COLUMNS)
+    if df.empty:
+        return
+    scope = (selection.continent, selection.country)
+    selected = (date_to_epoch_ms(selection.start_date), date_to_epoch_ms(selection.end_date))
+    cache.get(df, [selected], by='all', scope=scope)
+    cache.get(df, rolling_windows(date_to_epoch_ms(start_date), date_to_epoch_ms(end_date), 90, 30),
+              by='all', scope=scope)
+    cache.get(df, [selected], by='cell', scope=scope)
+
+# Dashboard selections over [start, end): every continent and the largest
+# countries, and all regions
+def selections(backend, start, end, count):
+    regions = backend.regions(EventFilter(start, end))
+    choices = [EventFilter(start, end)]
+    choices += [EventFilter(start, end, continent) for continent in sorted(regions["continent"].unique())]
+    choices += [EventFilter(start, end, continent, country)
+                for continent, country in regions.sort_values(["continent", "country"]).itertuples(index=False)]
+    return choices[:count]
+
+# One session: runs dashboard runs on random choices, latencies to results
+def session(make_backend, choices, runs, seed, results):
+    rng = random.Random(seed)
+    cache = GutenbergRichterCache()
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        dashboard_run(make_backend(), rng.choice(choices), cache)
+        latencies.append(time.perf_counter() - start)
+    results.put(latencies)
+
+# Runs sessions processes of runs dashboard runs each; returns the run
+# latencies and the wall time. Sessions are forked so that they share the
+# loaded data without competing with the in-process service for the GIL.
+def run_sessions(make_backend, choices, sessions, runs, seed):
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    processes = [context.Process(target=session, args=(make_backend, choices, runs, seed + i, results))
+                 for i in range(sessions)]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    latencies = [latency for _ in processes for latency in results.get()]
+    seconds = time.perf_counter() - start
+    for process in processes:
+        process.join()
+    return latencies, seconds
+
+# Events of a synthetic payload in a DynamoDB stand-in; returns the table
+# and the last month of the payload
+def synthetic_table(n_events, seed):
+    import lambda_function
+    from local_dynamodb import LocalTable
+    from synthetic_usgs import SYNTHETIC_END, generate_payload
+    from time_partition import INDEX_NAME
+
+    df = lambda_function.data_processing_transformation(lambda_function.clean_data(generate_payload(n_events, seed=seed)))
+    table = LocalTable("earthquakes", indexes={INDEX_NAME: ("time_bucket", "time_epoch")})
+    table.put_df(lambda_function.process_data_for_dynamodb(df))
+    end = SYNTHETIC_END.date()
+    return table, end - datetime.timedelta(days=31), end
+
+def print_level(sessions, latencies, seconds, stats):
+    latencies = np.array(latencies) * 1000
+    line = (f"  {sessions:>4} sessions {len(latencies) / seconds:8.1f} runs/s  "
+            f"p50 {np.percentile(latencies, 50):8.1f} ms  p99 {np.percentile(latencies, 99):8.1f} ms")
+    if stats is not None:
+        line += f"  cache hits {stats['hits'] / max(stats['hits'] + stats['misses'], 1):6.1%}"
+    print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the dashboard queries with concurrent sessions")
+    parser.add_argument("--mode", choices=["service", "direct"], default="service")
+    parser.add_argument("--url", help="load test a running query service instead of an in-process one")
+    parser.add_argument("--synthetic", type=int, metavar="EVENTS", help="serve a synthetic payload")
+    parser.add_argument("--start", type=datetime.date.fromisoformat, help="selected dates (default the last month)")
+    parser.add_argument("--end", type=datetime.date.fromisoformat)
+    parser.add_argument("--sessions", type=int, nargs="+", default=DEFAULT_SESSIONS)
+    parser.add_argument("--runs", type=int, default=RUNS_PER_SESSION, help="dashboard runs per session")
+    parser.add_argument("--selections", type=int, default=8, help="distinct selections the sessions draw from")
+    parser.add_argument("--cache-seconds", type=float, default=CACHE_SECONDS, help="0 disables the response cache")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start, end = args.start, args.end
+    if args.synthetic:
+        table, synthetic_start, synthetic_end = synthetic_table(args.synthetic, args.seed)
+        start, end = start or synthetic_start, end or synthetic_end
+        storage_backend = lambda: DynamoDBBackend(table)
+    else:
+        storage_backend = lambda: get_backend(read_only=True)
+    if start is None or end is None:
+        parser.error("--start and --end are required without --synthetic")
+
+    print(f"{args.mode} mode, {args.runs} runs per session")
+    for sessions in args.sessions:
+        service, server = None, None
+        if args.mode == "direct":
+            make_backend = storage_backend
+        elif args.url:
+            make_backend = lambda: ServiceBackend(args.url)
+        else:
+            # a cold service for every level
+            service = QueryService(storage_backend(), ResponseCache(ttl=args.cache_seconds))
+            server = make_server(service, port=0)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            url = f"http://localhost:{server.server_address[1]}"
+            make_backend = lambda: ServiceBackend(url)
+
+        choices = selections(make_backend(), start, end, args.selections)
+        latencies, seconds = run_sessions(make_backend, choices, sessions, args.runs, args.seed)
+        print_level(sessions, latencies, seconds, service.cache.stats() if service else None)
+        if server is not None:
+            server.shutdown()
+            server.server_close()
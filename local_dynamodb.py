@@ -0,0 +1,316 @@
+import bisect
+import math
+import time
+from types import SimpleNamespace
+
+from item_profiles import item_size, write_capacity_units
+
+# DynamoDB returns at most 1 MB of data per Scan/Query page
+PAGE_SIZE_BYTES = 1024 * 1024
+
+# Drops attributes that DynamoDB would not store
+def clean_item(item):
+    cleaned = {}
+    for name, value in item.items():
+        if value is None:
+            continue
+        if isinstance(value, float) and math.isnan(value):
+            continue
+        cleaned[name] = value
+    return cleaned
+
+
+# Evaluates a boto3 Key/Attr condition against an item
+def condition_matches(condition, item):
+    expression = condition.get_expression()
+    operator = expression["operator"]
+    values = expression["values"]
+    if operator == "AND":
+        return all(condition_matches(c, item) for c in values)
+    if operator == "OR":
+        return any(condition_matches(c, item) for c in values)
+    if operator == "NOT":
+        return not condition_matches(values[0], item)
+
+    name = values[0].name
+    if name not in item:
+        return operator == "attribute_not_exists"
+    if operator == "attribute_not_exists":
+        return False
+    value = item[name]
+    if operator == "=":
+        return value == values[1]
+    if operator == "<>":
+        return value != values[1]
+    if operator == "<":
+        return value < values[1]
+    if operator == "<=":
+        return value <= values[1]
+    if operator == ">":
+        return value > values[1]
+    if operator == ">=":
+        return value >= values[1]
+    if operator == "BETWEEN":
+        return values[1] <= value <= values[2]
+    if operator == "begins_with":
+        return str(value).startswith(values[1])
+    if operator == "attribute_exists":
+        return True
+    raise NotImplementedError(f"condition operator {operator}")
+
+def projection_attributes(projection, names=None):
+    if not projection:
+        return None
+    names = names or {}
+    return [names.get(a.strip(), a.strip()) for a in projection.split(",")]
+
+# The subset of the low-level client API used on table.meta.client
+class LocalClient:
+    def __init__(self, table):
+        self.table = table
+
+    def query(self, TableName, **kwargs):
+        return self.table.query(**kwargs)
+
+    def batch_write_item(self, RequestItems):
+        return self.table.batch_write_item(RequestItems)
+
+    def scan(self, TableName, **kwargs):
+        return self.table.scan(**kwargs)
+
+
+class LocalBatchWriter:
+    def __init__(self, table):
+        self.table = table
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def put_item(self, Item):
+        self.table.put_item(Item=Item)
+
+
+# In-memory stand-in for a boto3 DynamoDB Table resource, used for local runs
+# and benchmarks. Only the calls made by this project are implemented.
+# `indexes` maps a GSI name to its (hash key, range key) attributes.
+# `write_capacity` (WCU per second) makes BatchWriteItem throttle like a
+# provisioned table.
+class LocalTable:
+    def __init__(self, name="earthquakes", hash_key="id", indexes=None, write_capacity=None):
+        self.name = name
+        self.table_name = name
+        self.hash_key = hash_key
+        self.items = {}
+        self.sizes = {}
+        self.indexes = dict(indexes or {})
+        # index name -> hash key value -> set of item keys
+        self.partitions = {index: {} for index in self.indexes}
+        # (index name, hash key value) -> (range values, item keys) in range key order
+        self._sorted_partitions = {}
+        # bytes read by Scan/Query, which is what read capacity is charged on
+        self.read_bytes = 0
+        self.meta = SimpleNamespace(client=LocalClient(self))
+        self.write_capacity = write_capacity
+        self._write_tokens = write_capacity or 0
+        self._tokens_updated = time.monotonic()
+        # BatchWriteItem requests rejected and items returned unprocessed
+        self.throttled_requests = 0
+        self.unprocessed_items = 0
+        self._keys = None
+        self._positions = None
+
+    # ConditionExpression (a boto3 Attr condition) is checked against the
+    # stored item, as a conditional put
+    def put_item(self, Item, ConditionExpression=None):
+        item = clean_item(Item)
+        key = item[self.hash_key]
+        if ConditionExpression is not None and not condition_matches(ConditionExpression, self.items.get(key, {})):
+            from botocore.exceptions import ClientError
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException",
+                                         "Message": "The conditional request failed"}}, "PutItem")
+        if key in self.items:
+            self._unindex(key)
+        else:
+            self._keys = None
+        self.items[key] = item
+        self.sizes[key] = item_size(item)
+        self._index(key)
+        return {}
+
+    def get_item(self, Key, ConsistentRead=False, **kwargs):
+        item = self.items.get(Key[self.hash_key])
+        return {} if item is None else {"Item": dict(item)}
+
+    def delete_item(self, Key):
+        key = Key[self.hash_key]
+        if key in self.items:
+            self._unindex(key)
+            del self.items[key]
+            del self.sizes[key]
+            self._keys = None
+        return {}
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeValues, ExpressionAttributeNames=None, **kwargs):
+        # only "SET a = :a, b = :b" is supported
+        names = ExpressionAttributeNames or {}
+        item = dict(self.items.get(Key[self.hash_key], Key))
+        for assignment in UpdateExpression.strip()[len("SET "):].split(","):
+            name, placeholder = [part.strip() for part in assignment.split("=")]
+            item[names.get(name, name)] = ExpressionAttributeValues[placeholder]
+        return self.put_item(Item=item)
+
+    def _index(self, key):
+        item = self.items[key]
+        for index, (hash_attr, range_attr) in self.indexes.items():
+            if hash_attr in item and range_attr in item:
+                self.partitions[index].setdefault(item[hash_attr], set()).add(key)
+                self._sorted_partitions.pop((index, item[hash_attr]), None)
+
+    def _unindex(self, key):
+        item = self.items[key]
+        for index, (hash_attr, _) in self.indexes.items():
+            if hash_attr in item:
+                self.partitions[index].get(item[hash_attr], set()).discard(key)
+                self._sorted_partitions.pop((index, item[hash_attr]), None)
+
+    # Scan order is insertion order; positions are cached between pages
+    def _scan_order(self):
+        if self._keys is None:
+            self._keys = list(self.items)
+            self._positions = {key: i for i, key in enumerate(self._keys)}
+        return self._keys, self._positions
+
+    def batch_writer(self, overwrite_by_pkeys=None):
+        return LocalBatchWriter(self)
+
+    # Puts of a BatchWriteItem request. Items over the write capacity come
+    # back as UnprocessedItems, and a request with none written fails with a
+    # throttling error, as on a provisioned table (one second of burst).
+    def batch_write_item(self, RequestItems):
+        requests = RequestItems[self.name]
+        if self.write_capacity is not None:
+            now = time.monotonic()
+            self._write_tokens = min(self.write_capacity,
+                                     self._write_tokens + (now - self._tokens_updated) * self.write_capacity)
+            self._tokens_updated = now
+        unprocessed = []
+        for request in requests:
+            item = request["PutRequest"]["Item"]
+            if self.write_capacity is not None:
+                units = write_capacity_units(item_size(clean_item(item)))
+                if self._write_tokens < units:
+                    unprocessed.append(request)
+                    continue
+                self._write_tokens -= units
+            self.put_item(Item=item)
+        if unprocessed and len(unprocessed) == len(requests):
+            from botocore.exceptions import ClientError
+            self.throttled_requests += 1
+            raise ClientError({"Error": {"Code": "ProvisionedThroughputExceededException",
+                                         "Message": "The level of configured provisioned throughput for the table was exceeded."}},
+                              "BatchWriteItem")
+        self.unprocessed_items += len(unprocessed)
+        return {"UnprocessedItems": {self.name: unprocessed} if unprocessed else {}}
+
+    # Same behaviour as wr.dynamodb.put_df
+    def put_df(self, df):
+        for item in df.to_dict("records"):
+            self.put_item(Item=item)
+
+    def scan(self, ExclusiveStartKey=None, ProjectionExpression=None, ExpressionAttributeNames=None,
+             FilterExpression=None, Limit=None, Segment=None, TotalSegments=None, **kwargs):
+        keys, positions = self._scan_order()
+        if TotalSegments:
+            keys = keys[Segment::TotalSegments]
+            positions = {key: i for i, key in enumerate(keys)}
+        start = 0
+        if ExclusiveStartKey is not None:
+            start = positions[ExclusiveStartKey[self.hash_key]] + 1
+        attributes = projection_attributes(ProjectionExpression, ExpressionAttributeNames)
+        return self._page(keys, start, attributes, Limit, FilterExpression)
+
+    # Query on a GSI, returning items in range key order
+    def query(self, IndexName, KeyConditionExpression, ExclusiveStartKey=None, ProjectionExpression=None,
+              ExpressionAttributeNames=None, Limit=None, **kwargs):
+        hash_attr, range_attr = self.indexes[IndexName]
+        hash_value, range_condition = None, None
+        for condition in self._conditions(KeyConditionExpression):
+            values = condition.get_expression()["values"]
+            if values[0].name == hash_attr:
+                hash_value = values[1]
+            else:
+                range_condition = condition
+        keys = self._range_keys(IndexName, hash_value, range_condition)
+
+        start = 0
+        if ExclusiveStartKey is not None:
+            start = keys.index(ExclusiveStartKey[self.hash_key]) + 1
+        attributes = projection_attributes(ProjectionExpression, ExpressionAttributeNames)
+        response = self._page(keys, start, attributes, Limit)
+        if "LastEvaluatedKey" in response:
+            last = self.items[response["LastEvaluatedKey"][self.hash_key]]
+            response["LastEvaluatedKey"] = {a: last[a] for a in (self.hash_key, hash_attr, range_attr)}
+        return response
+
+    # Keys of one partition matching the range key condition, in range key order
+    def _range_keys(self, index, hash_value, condition):
+        cache_key = (index, hash_value)
+        if cache_key not in self._sorted_partitions:
+            range_attr = self.indexes[index][1]
+            keys = sorted(self.partitions[index].get(hash_value, ()),
+                          key=lambda k: (self.items[k][range_attr], k))
+            self._sorted_partitions[cache_key] = ([self.items[k][range_attr] for k in keys], keys)
+        values, keys = self._sorted_partitions[cache_key]
+        if condition is None:
+            return keys
+
+        expression = condition.get_expression()
+        operator, bounds = expression["operator"], expression["values"][1:]
+        if operator == "BETWEEN":
+            return keys[bisect.bisect_left(values, bounds[0]):bisect.bisect_right(values, bounds[1])]
+        return [k for k in keys if condition_matches(condition, self.items[k])]
+
+    def _conditions(self, condition):
+        expression = condition.get_expression()
+        if expression["operator"] == "AND":
+            return [c for part in expression["values"] for c in self._conditions(part)]
+        return [condition]
+
+    # One page of at most 1 MB read; the filter applies after the read, as in DynamoDB
+    def _page(self, keys, start=0, attributes=None, limit=None, condition=None):
+        page, page_bytes, scanned = [], 0, 0
+        for i in range(start, len(keys)):
+            item = self.items[keys[i]]
+            page_bytes += self.sizes[keys[i]]
+            scanned += 1
+            if condition is None or condition_matches(condition, item):
+                if attributes is not None:
+                    item = {a: item[a] for a in attributes if a in item}
+                else:
+                    item = dict(item)
+                page.append(item)
+            if page_bytes >= PAGE_SIZE_BYTES or (limit is not None and scanned >= limit):
+                break
+
+        self.read_bytes += page_bytes
+        response = {"Items": page, "Count": len(page), "ScannedCount": scanned}
+        if start + scanned < len(keys):
+            response["LastEvaluatedKey"] = {self.hash_key: keys[start + scanned - 1]}
+        return response
+
+    def total_size(self):
+        return sum(self.sizes.values())
+
+
+class LocalDynamoDB:
+    def __init__(self, indexes=None):
+        self.tables = {}
+        self.indexes = indexes
+
+    def Table(self, name):
+        if name not in self.tables:
+            self.tables[name] = LocalTable(name, indexes=self.indexes)
+        return self.tables[name]
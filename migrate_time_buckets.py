@@ -0,0 +1,127 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+import pandas as pd
+
+from time_partition import BUCKET_ATTRIBUTE, INDEX_NAME, time_buckets
+
+# Adds the time index to an existing earthquakes table:
+#   1. creates the (time_bucket, time_epoch) GSI if the table does not have it
+#   2. sets time_bucket on every item that was written before the attribute
+#      existed (parallel scan, one update per item)
+#
+#   python migrate_time_buckets.py --dry-run
+#   python migrate_time_buckets.py --segments 8
+
+REGION = "us-east-1"
+TABLE_NAME = "earthquakes"
+
+# Creates the GSI; returns False when it already exists
+def create_index(client, table_name, read_capacity, write_capacity):
+    description = client.describe_table(TableName=table_name)["Table"]
+    existing = [index["IndexName"] for index in description.get("GlobalSecondaryIndexes", [])]
+    if INDEX_NAME in existing:
+        return False
+
+    index = {
+        "IndexName": INDEX_NAME,
+        "KeySchema": [
+            {"AttributeName": BUCKET_ATTRIBUTE, "KeyType": "HASH"},
+            {"AttributeName": "time_epoch", "KeyType": "RANGE"},
+        ],
+        "Projection": {"ProjectionType": "ALL"},
+    }
+    billing_mode = description.get("BillingModeSummary", {}).get("BillingMode", "PROVISIONED")
+    if billing_mode == "PROVISIONED":
+        index["ProvisionedThroughput"] = {
+            "ReadCapacityUnits": read_capacity,
+            "WriteCapacityUnits": write_capacity,
+        }
+
+    client.update_table(
+        TableName=table_name,
+        AttributeDefinitions=[
+            {"AttributeName": BUCKET_ATTRIBUTE, "AttributeType": "S"},
+            {"AttributeName": "time_epoch", "AttributeType": "N"},
+        ],
+        GlobalSecondaryIndexUpdates=[{"Create": index}],
+    )
+    return True
+
+# Waits until the index is ACTIVE (it is backfilled by DynamoDB in the background)
+def wait_for_index(client, table_name, poll_seconds=15):
+    while True:
+        description = client.describe_table(TableName=table_name)["Table"]
+        status = next(index["IndexStatus"] for index in description.get("GlobalSecondaryIndexes", [])
+                      if index["IndexName"] == INDEX_NAME)
+        print("Index status:", status)
+        if status == "ACTIVE":
+            return
+        time.sleep(poll_seconds)
+
+# Scans one segment and sets time_bucket where it is missing
+def backfill_segment(table, segment, total_segments, dry_run):
+    kwargs = {
+        "Segment": segment,
+        "TotalSegments": total_segments,
+        "ProjectionExpression": "id, time_epoch, #b",
+        "ExpressionAttributeNames": {"#b": BUCKET_ATTRIBUTE},
+    }
+    scanned = updated = 0
+    response = table.scan(**kwargs)
+    while True:
+        items = [item for item in response["Items"] if BUCKET_ATTRIBUTE not in item]
+        scanned += len(response["Items"])
+        if items:
+            buckets = time_buckets(pd.Series([int(item["time_epoch"]) for item in items]))
+            for item, bucket in zip(items, buckets):
+                if not dry_run:
+                    table.update_item(
+                        Key={"id": item["id"]},
+                        UpdateExpression="SET #b = :b",
+                        ExpressionAttributeNames={"#b": BUCKET_ATTRIBUTE},
+                        ExpressionAttributeValues={":b": bucket},
+                    )
+                updated += 1
+        if "LastEvaluatedKey" not in response:
+            return scanned, updated
+        response = table.scan(ExclusiveStartKey=response["LastEvaluatedKey"], **kwargs)
+
+def backfill(session, table_name, segments, dry_run):
+    # one Table resource per thread, since resources are not thread-safe
+    def run(segment):
+        table = session.resource("dynamodb").Table(table_name)
+        return backfill_segment(table, segment, segments, dry_run)
+
+    with ThreadPoolExecutor(max_workers=segments) as pool:
+        results = list(pool.map(run, range(segments)))
+    scanned = sum(r[0] for r in results)
+    updated = sum(r[1] for r in results)
+    action = "would update" if dry_run else "updated"
+    print(f"Scanned {scanned} items, {action} {updated}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create and backfill the time_bucket index")
+    parser.add_argument("--table", default=TABLE_NAME)
+    parser.add_argument("--segments", type=int, default=4, help="parallel scan segments")
+    parser.add_argument("--read-capacity", type=int, default=5, help="GSI RCU for provisioned tables")
+    parser.add_argument("--write-capacity", type=int, default=5, help="GSI WCU for provisioned tables")
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--wait", action="store_true", help="wait until the index is ACTIVE")
+    args = parser.parse_args()
+
+    session = boto3.Session(region_name=REGION)
+    client = session.client("dynamodb")
+    if args.dry_run:
+        print("Dry run: the index is not created")
+    elif create_index(client, args.table, args.read_capacity, args.write_capacity):
+        print("Creating index", INDEX_NAME)
+    else:
+        print("Index", INDEX_NAME, "already exists")
+
+    backfill(session, args.table, args.segments, args.dry_run)
+    if args.wait and not args.dry_run:
+        wait_for_index(client, args.table)
@@ -0,0 +1,105 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import pandas as pd
+import pyarrow as pa
+from pandas.api.types import union_categoricals
+
+# Below this many rows the pool start-up costs more than it saves and the
+# transform runs in-process. Monthly M4+ batches (about 1.5k rows) stay
+# in-process; the pool is for full-catalog backfills.
+MIN_PARALLEL_ROWS = 20000
+# Shards per worker, so a slow shard (many geocoder fallbacks) does not
+# leave the other workers idle at the end
+SHARDS_PER_WORKER = 4
+
+# Per-process state of a pool worker
+_worker = {}
+
+# Serializes a frame to an Arrow IPC stream
+def to_arrow_ipc(df):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+def from_arrow_ipc(buffer):
+    return pa.ipc.open_stream(buffer).read_all().to_pandas()
+
+# Runs once in every worker process: keeps the transform and lets the caller
+# load expensive state (e.g. the reverse geocoder) a single time
+def _init_worker(transform, setup):
+    if setup is not None:
+        setup()
+    _worker["transform"] = transform
+
+# Reads rows [start, stop) straight out of the shared Arrow buffer,
+# transforms them and sends the result back as Arrow IPC bytes
+def _transform_shard(shm_name, size, start, stop):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        return _run_shard(shm.buf, size, start, stop)
+    finally:
+        # every view on the segment is gone once _run_shard has returned
+        shm.close()
+
+def _run_shard(buf, size, start, stop):
+    table = pa.ipc.open_stream(pa.py_buffer(buf[:size])).read_all()
+    df = table.slice(start, stop - start).to_pandas()
+    result = _worker["transform"](df)
+    return to_arrow_ipc(result).to_pybytes()
+
+def shard_bounds(n_rows, n_shards):
+    step = -(-n_rows // n_shards)
+    return [(start, min(start + step, n_rows)) for start in range(0, n_rows, step)]
+
+# Applies transform(df) -> df over a process pool. The input columns are
+# written once to shared memory as an Arrow stream, every worker transforms a
+# slice of it, and the results are concatenated in the original row order
+# under the original index, as returned by the in-process path. transform
+# must keep the rows of its input; transform and setup must be importable
+# module-level functions.
+def parallel_transform(df, transform, setup=None, workers=None, min_rows=MIN_PARALLEL_ROWS):
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(df) < min_rows:
+        if setup is not None:
+            setup()
+        return transform(df)
+
+    buffer = to_arrow_ipc(df.reset_index(drop=True))
+    shm = shared_memory.SharedMemory(create=True, size=buffer.size)
+    try:
+        shm.buf[:buffer.size] = memoryview(buffer).cast("B")
+        del buffer
+
+        shards = shard_bounds(len(df), workers * SHARDS_PER_WORKER)
+        # spawned, not forked: the caller may have threads running (e.g. the
+        # write-behind drain) whose locks a forked worker would inherit
+        # mid-call
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(transform, setup)) as pool:
+            futures = [pool.submit(_transform_shard, shm.name, shm.size, start, stop)
+                       for start, stop in shards]
+            results = [from_arrow_ipc(pa.py_buffer(future.result())) for future in futures]
+    finally:
+        shm.close()
+        shm.unlink()
+
+    # Shards can carry their own category sets, which pd.concat turns back
+    # into object columns. Only the columns that are categorical in every
+    # shard (as they are on the in-process path) are recast, with the
+    # categories of the input first.
+    merged = pd.concat(results, ignore_index=True)
+    merged.index = df.index
+    for column in merged:
+        if isinstance(merged[column].dtype, pd.CategoricalDtype):
+            continue
+        if all(isinstance(result[column].dtype, pd.CategoricalDtype) for result in results):
+            parts = [result[column] for result in results]
+            if column in df and isinstance(df[column].dtype, pd.CategoricalDtype):
+                parts.insert(0, pd.Categorical([], categories=df[column].cat.categories))
+            merged[column] = pd.Series(union_categoricals(parts), index=df.index)
+    return merged
@@ -0,0 +1,375 @@
+import argparse
+import datetime
+import json
+import math
+import os
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from event_schema import EVENT_SCHEMA, apply_schema
+from scatter_figures import downsample
+from storage import CHUNK_SIZE, STORE_COLUMNS, DynamoDBBackend, EventFilter, get_backend, select_columns
+
+# Query service shared by all dashboard sessions. One process owns one storage
+# backend, and with it one typed copy of the loaded events (DynamoDBBackend
+# keeps the frames of the ranges it has read, for as long as the responses
+# built from them), and answers the dashboard
+# queries over HTTP as JSON:
+#
+#   GET /regions /magnitude_range /kpis /max_event /hotspots /alert_counts
+#       /monthly_trend                   ?start=&end=&continent=&country=&min_mag=&max_mag=&tsunami=
+#   GET /events?...&columns=a,b&newest=N&page=P&page_size=S
+#   GET /tiles/Z/X/Y?...                 events on a web map tile, downsampled
+#   GET /stats                           response cache counters
+#
+# Responses are cached by path and query for CACHE_SECONDS, up to
+# CACHE_ENTRIES of them and CACHE_BYTES in all, and concurrent
+# requests for the same key wait for a single computation, so tens of
+# sessions with the same selection cost one backend query. Sessions talk to
+# it through ServiceBackend, which has the query methods of the storage
+# backends:
+#
+#   python query_service.py --port 8765
+#   EARTHQUAKE_STORAGE=service streamlit run streamlit_app.py
+#
+# load_test.py reports throughput and latency as concurrent sessions grow.
+
+SERVICE_URL = "http://localhost:8765"
+# New events arrive with the hourly lambda, so a few minutes of staleness is fine
+CACHE_SECONDS = 300
+CACHE_ENTRIES = 512
+# JSON bodies and event frames (see QueryService._events) held at most
+CACHE_BYTES = 512 * 2**20
+PAGE_SIZE = 5000
+MAX_PAGE_SIZE = 50000
+# Events returned per map tile at most (large and isolated events are kept)
+TILE_MAX_EVENTS = 5000
+TILE_COLUMNS = ["magnitude", "latitude", "longitude", "depth_km", "time_epoch", "location", "country",
+                "continent", "alert_level"]
+
+
+# Frames travel as {"index", "columns", "data"}; the receiving side gives the
+# event columns their schema types again
+def frame_to_json(df):
+    index = df.index.name
+    if index is not None:
+        df = df.reset_index()
+    return {"index": index, "columns": [str(c) for c in df.columns],
+            "data": json.loads(df.to_json(orient="values", date_format="iso"))}
+
+def frame_from_json(payload):
+    df = pd.DataFrame(payload["data"], columns=payload["columns"])
+    typed = [column for column in df if column in EVENT_SCHEMA]
+    df = pd.concat([apply_schema(df[typed]), df.drop(columns=typed)], axis=1)[payload["columns"]]
+    return df.set_index(payload["index"]) if payload["index"] else df
+
+# Query parameters of a filter and back
+def filter_params(event_filter):
+    f = event_filter
+    params = {"start": f.start_date.isoformat(), "end": f.end_date.isoformat()}
+    if f.continent != "All":
+        params["continent"] = f.continent
+    if f.country != "All":
+        params["country"] = f.country
+    if f.min_mag is not None:
+        params["min_mag"] = repr(float(f.min_mag))
+    if f.max_mag is not None:
+        params["max_mag"] = repr(float(f.max_mag))
+    if f.tsunami_only:
+        params["tsunami"] = "1"
+    return params
+
+def parse_filter(params):
+    def optional_float(name):
+        return float(params[name]) if name in params else None
+    return EventFilter(
+        datetime.date.fromisoformat(params["start"]),
+        datetime.date.fromisoformat(params["end"]),
+        params.get("continent", "All"),
+        params.get("country", "All"),
+        optional_float("min_mag"),
+        optional_float("max_mag"),
+        params.get("tsunami") == "1",
+    )
+
+# Longitude and latitude bounds (west, south, east, north) of a web
+# mercator tile
+def tile_bounds(z, x, y):
+    n = 2 ** z
+    def latitude(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+    return x / n * 360 - 180, latitude(y + 1), (x + 1) / n * 360 - 180, latitude(y)
+
+def tile_events(df, z, x, y, max_events=TILE_MAX_EVENTS):
+    west, south, east, north = tile_bounds(z, x, y)
+    lon = df["longitude"].to_numpy(dtype=float, na_value=np.nan)
+    lat = df["latitude"].to_numpy(dtype=float, na_value=np.nan)
+    # the east and south edges belong to the next tile, except at the map edges
+    inside = ((lon >= west) & ((lon < east) | (east == 180)) & (lat <= north) & ((lat > south) | (y == 2 ** z - 1)))
+    return downsample(df[inside], ["longitude", "latitude"], max_events)
+
+
+# Size of a cached value: a JSON body or an event frame
+def cached_bytes(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    return len(value)
+
+# Values by key for ttl seconds, least recently used first out once there
+# are more than max_entries or max_bytes of them. A value larger than
+# max_bytes is returned but not kept. A key is computed once however many
+# threads ask for it at the same time.
+class ResponseCache:
+    def __init__(self, max_entries=CACHE_ENTRIES, ttl=CACHE_SECONDS, max_bytes=CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # key -> (expiry, size, value)
+        self.entries = OrderedDict()
+        self.size = 0
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, compute):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            future = self.pending.get(key)
+            owner = future is None
+            if owner:
+                future = self.pending[key] = Future()
+                self.misses += 1
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except Exception as e:
+            with self.lock:
+                del self.pending[key]
+            future.set_exception(e)
+            raise
+        size = cached_bytes(value)
+        with self.lock:
+            del self.pending[key]
+            self._evict(key, time.monotonic())
+            if self.ttl > 0 and size <= self.max_bytes:
+                self.entries[key] = (time.monotonic() + self.ttl, size, value)
+                self.size += size
+                while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                    self.size -= self.entries.popitem(last=False)[1][1]
+        future.set_result(value)
+        return value
+
+    # Drops the expired entries and the one under key
+    def _evict(self, key, now):
+        for stale in [k for k, entry in self.entries.items() if k == key or entry[0] <= now]:
+            self.size -= self.entries.pop(stale)[1]
+
+    def stats(self):
+        with self.lock:
+            return {"entries": len(self.entries), "bytes": self.size, "hits": self.hits, "misses": self.misses}
+
+
+# The queries behind the endpoints, on one backend. Backend calls are
+# serialized: the DuckDB connection and the loaded DynamoDB frames are not
+# safe to use from several threads, and with the cache in front only misses
+# get this far.
+class QueryService:
+    def __init__(self, backend, cache=None):
+        self.backend = backend
+        self.cache = cache or ResponseCache()
+        self.backend_lock = threading.Lock()
+        if isinstance(backend, DynamoDBBackend):
+            # loaded ranges expire with the responses built from them
+            backend.frame_seconds = self.cache.ttl
+
+    def _backend(self, method, *args):
+        with self.backend_lock:
+            return getattr(self.backend, method)(*args)
+
+    # The selected events, newest first, kept in the cache so that the pages
+    # of a selection are cut from the same frame
+    def _events(self, event_filter, columns, newest):
+        def compute():
+            df = self._backend("events", event_filter, list(dict.fromkeys([*columns, "time_epoch"])))
+            df = df.sort_values("time_epoch", ascending=False, kind="stable")
+            return (df if newest is None else df.head(newest))[columns].reset_index(drop=True)
+        return self.cache.get(("frame", event_filter, tuple(columns), newest), compute)
+
+    def events(self, params):
+        # unknown columns are a bad request, before anything reaches the backend
+        columns = select_columns(params["columns"].split(",") if "columns" in params else None)
+        newest = int(params["newest"]) if "newest" in params else None
+        page = int(params.get("page", 0))
+        page_size = min(int(params.get("page_size", PAGE_SIZE)), MAX_PAGE_SIZE)
+        df = self._events(parse_filter(params), columns, newest)
+        pages = max(math.ceil(len(df) / page_size), 1)
+        return {**frame_to_json(df.iloc[page * page_size:(page + 1) * page_size]),
+                "page": page, "pages": pages, "total": len(df)}
+
+    def tile(self, params, z, x, y):
+        if not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            raise ValueError(f"No tile {z}/{x}/{y}")
+        df = self._events(parse_filter(params), TILE_COLUMNS, None)
+        return frame_to_json(tile_events(df, z, x, y))
+
+    def answer(self, path, params):
+        parts = path.strip("/").split("/")
+        name = parts[0]
+        if name == "stats":
+            return self.cache.stats()
+        if name == "events":
+            return self.events(params)
+        if name == "tiles" and len(parts) == 4:
+            return self.tile(params, *map(int, parts[1:]))
+        if len(parts) != 1 or name not in FILTER_QUERIES:
+            raise LookupError(path)
+        return FILTER_QUERIES[name](self._backend(name, parse_filter(params)))
+
+    # JSON body of a response, cached by path and query
+    def respond(self, path, params):
+        if path.strip("/") == "stats":
+            return json.dumps(self.answer(path, params)).encode("utf-8")
+        key = (path, tuple(sorted(params.items())))
+        return self.cache.get(key, lambda: json.dumps(self.answer(path, params)).encode("utf-8"))
+
+
+def max_event_json(row):
+    return None if row is None else frame_to_json(row.to_frame().T.infer_objects())
+
+def monthly_trend_json(tables):
+    totals_line, pivot = tables
+    return {"totals_line": frame_to_json(totals_line), "pivot": frame_to_json(pivot)}
+
+# Endpoint -> converter of the backend result of the query of the same name
+FILTER_QUERIES = {
+    "regions": frame_to_json,
+    "magnitude_range": lambda r: None if r is None else [float(r[0]), float(r[1])],
+    "kpis": dict,
+    "max_event": max_event_json,
+    "hotspots": frame_to_json,
+    "alert_counts": frame_to_json,
+    "monthly_trend": monthly_trend_json,
+}
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    service = None
+    quiet = True
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        params = dict(urllib.parse.parse_qsl(url.query))
+        try:
+            body, status = self.service.respond(url.path, params), 200
+        except (KeyError, ValueError) as e:
+            body, status = json.dumps({"error": f"Bad request: {e}"}).encode("utf-8"), 400
+        except LookupError as e:
+            body, status = json.dumps({"error": f"Not found: {e}"}).encode("utf-8"), 404
+        except Exception as e:
+            self.log_error("%s failed: %r", self.path, e)
+            body, status = json.dumps({"error": "Internal error"}).encode("utf-8"), 500
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+# HTTP server of a QueryService; serve_forever() runs it
+def make_server(service, host="localhost", port=8765, quiet=True):
+    handler = type("Handler", (QueryHandler,), {"service": service, "quiet": quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+# Client of the query service with the query methods of the storage
+# backends, so the dashboard can use it in their place
+class ServiceBackend:
+    def __init__(self, url=SERVICE_URL):
+        self.url = url.rstrip("/")
+
+    def _get(self, path, params):
+        with urllib.request.urlopen(f"{self.url}{path}?{urllib.parse.urlencode(params)}") as response:
+            return json.load(response)
+
+    def _frame(self, path, event_filter):
+        return frame_from_json(self._get(path, filter_params(event_filter)))
+
+    def regions(self, event_filter):
+        return self._frame("/regions", event_filter)
+
+    def magnitude_range(self, event_filter):
+        result = self._get("/magnitude_range", filter_params(event_filter))
+        return None if result is None else tuple(result)
+
+    def kpis(self, event_filter):
+        return self._get("/kpis", filter_params(event_filter))
+
+    def max_event(self, event_filter):
+        result = self._get("/max_event", filter_params(event_filter))
+        return None if result is None else frame_from_json(result).iloc[0]
+
+    def hotspots(self, event_filter):
+        return self._frame("/hotspots", event_filter)
+
+    def alert_counts(self, event_filter):
+        return self._frame("/alert_counts", event_filter)
+
+    def monthly_trend(self, event_filter):
+        result = self._get("/monthly_trend", filter_params(event_filter))
+        return frame_from_json(result["totals_line"]), frame_from_json(result["pivot"])
+
+    # The selected events, newest first, one page per request
+    def iter_events(self, event_filter, columns=None, chunk_size=CHUNK_SIZE, newest=None):
+        params = {**filter_params(event_filter), "columns": ",".join(columns or STORE_COLUMNS),
+                  "page_size": min(chunk_size, MAX_PAGE_SIZE)}
+        if newest is not None:
+            params["newest"] = newest
+        page = 0
+        while True:
+            result = self._get("/events", {**params, "page": page})
+            yield frame_from_json(result)
+            page += 1
+            if page >= result["pages"]:
+                return
+
+    def events(self, event_filter, columns=None, newest=None):
+        return pd.concat(list(self.iter_events(event_filter, columns, MAX_PAGE_SIZE, newest)), ignore_index=True)
+
+    def tile(self, event_filter, z, x, y):
+        return self._frame(f"/tiles/{z}/{x}/{y}", event_filter)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the dashboard queries over HTTP")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--cache-seconds", type=float, default=CACHE_SECONDS, help="0 disables the response cache")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+    if os.environ.get("EARTHQUAKE_STORAGE") == "service":
+        parser.error("EARTHQUAKE_STORAGE=service points the service at itself; use dynamodb or duckdb")
+
+    service = QueryService(get_backend(read_only=True), ResponseCache(ttl=args.cache_seconds))
+    server = make_server(service, args.host, args.port, quiet=not args.verbose)
+    print(f"Serving earthquake queries on http://{args.host}:{args.port}")
+    server.serve_forever()
@@ -0,0 +1,208 @@
+import argparse
+import datetime
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+# Streaming detector of seismicity-rate spikes per region, such as the start
+# of a swarm. Every region (a country, or a CELL_DEGREES grid cell) keeps two
+# exponentially decayed event counts: a short-term one with a time constant
+# of SHORT_TAU_DAYS and a long-term one with LONG_TAU_DAYS. An event updates
+# the counts of its region in O(1), and the region alerts when its short-term
+# rate reaches RATIO_THRESHOLD times its long-term rate (an STA/LTA ratio).
+#
+# The state is a handful of numbers per region. The lambda feeds it every
+# ingestion batch and keeps it between invocations through the storage
+# backend (load_state / save_state, versioned so that overlapping runs do not
+# overwrite each other). The backtest replays stored or
+# synthetic events:
+#
+#   python rate_detector.py --start 2024-01-01 --end 2025-01-01
+#   python rate_detector.py --synthetic 200000 --by cell
+
+STATE_NAME = "rate_detector"
+SHORT_TAU_DAYS = 1.0
+LONG_TAU_DAYS = 30.0
+RATIO_THRESHOLD = 5.0
+# An alerting region clears when its ratio drops below this
+CLEAR_RATIO = 2.0
+# Decayed short-term count a region needs before it can alert
+MIN_SHORT_EVENTS = 5.0
+CELL_DEGREES = 2.0
+# Loads and saves of the state before update_from_batch gives up
+SAVE_ATTEMPTS = 5
+DAY_MS = 24 * 60 * 60 * 1000
+
+# Indexes into the per-region state lists
+SHORT, LONG, LAST, FIRST, ALERTING = range(5)
+
+
+class RateDetector:
+    def __init__(self, by="country", short_tau_days=SHORT_TAU_DAYS, long_tau_days=LONG_TAU_DAYS,
+                 ratio_threshold=RATIO_THRESHOLD, clear_ratio=CLEAR_RATIO, min_short_events=MIN_SHORT_EVENTS):
+        self.by = by
+        self.short_tau = short_tau_days * DAY_MS
+        self.long_tau = long_tau_days * DAY_MS
+        self.ratio_threshold = ratio_threshold
+        self.clear_ratio = clear_ratio
+        self.min_short_events = min_short_events
+        # region -> [short count, long count, last event ms, first event ms, alerting]
+        self.regions = {}
+        # time of the latest event counted; older events are skipped, which
+        # also drops events fetched again by the next invocation
+        self.watermark = None
+
+    # Region key of every event: the country, or the south-west corner of its cell
+    def region_keys(self, df):
+        if self.by == "country":
+            return df["country"].astype(str).to_numpy()
+        lat = np.floor(df["latitude"].to_numpy(dtype=float) / CELL_DEGREES) * CELL_DEGREES
+        lon = np.floor(df["longitude"].to_numpy(dtype=float) / CELL_DEGREES) * CELL_DEGREES
+        return (pd.Series(lat).map("{:+.0f}".format) + "," + pd.Series(lon).map("{:+.0f}".format)).to_numpy()
+
+    # Counts a batch of events (time_epoch and the region columns) and returns
+    # the alerts it raised, in time order
+    def update(self, df):
+        times = df["time_epoch"].to_numpy(dtype=np.int64)
+        keys = self.region_keys(df)
+        order = np.argsort(times, kind="stable")
+        times, keys = times[order], keys[order]
+        if self.watermark is not None:
+            new = times > self.watermark
+            times, keys = times[new], keys[new]
+        if len(times) == 0:
+            return []
+
+        alerts = []
+        add = self._add
+        for key, t in zip(keys.tolist(), times.tolist()):
+            alert = add(key, t)
+            if alert is not None:
+                alerts.append(alert)
+        self.watermark = times[-1].item()
+        return alerts
+
+    def _add(self, key, t):
+        state = self.regions.get(key)
+        if state is None:
+            self.regions[key] = [1.0, 1.0, t, t, False]
+            return None
+        elapsed = t - state[LAST]
+        short = state[SHORT] * math.exp(-elapsed / self.short_tau) + 1.0
+        long = state[LONG] * math.exp(-elapsed / self.long_tau) + 1.0
+        state[SHORT], state[LONG], state[LAST] = short, long, t
+
+        ratio = (short / self.short_tau) / (long / self.long_tau)
+        if state[ALERTING]:
+            if ratio < self.clear_ratio:
+                state[ALERTING] = False
+            return None
+        # the long-term rate means little until the region has a history
+        if t - state[FIRST] < self.long_tau or short < self.min_short_events or ratio < self.ratio_threshold:
+            return None
+        state[ALERTING] = True
+        return {
+            "region": key,
+            "time_epoch": t,
+            "short_rate_per_day": short / self.short_tau * DAY_MS,
+            "long_rate_per_day": long / self.long_tau * DAY_MS,
+            "ratio": ratio,
+        }
+
+    # Current rates of every region, decayed to now_ms
+    def status(self, now_ms):
+        rows = []
+        for key, state in self.regions.items():
+            elapsed = max(now_ms - state[LAST], 0)
+            short = state[SHORT] * math.exp(-elapsed / self.short_tau)
+            long = state[LONG] * math.exp(-elapsed / self.long_tau)
+            rows.append({
+                "region": key,
+                "short_rate_per_day": short / self.short_tau * DAY_MS,
+                "long_rate_per_day": long / self.long_tau * DAY_MS,
+                "ratio": (short / self.short_tau) / (long / self.long_tau) if long > 0 else 0.0,
+                "alerting": state[ALERTING],
+            })
+        return pd.DataFrame(rows, columns=["region", "short_rate_per_day", "long_rate_per_day", "ratio", "alerting"])
+
+    def to_state(self):
+        return {
+            "by": self.by,
+            "short_tau_days": self.short_tau / DAY_MS,
+            "long_tau_days": self.long_tau / DAY_MS,
+            "ratio_threshold": self.ratio_threshold,
+            "clear_ratio": self.clear_ratio,
+            "min_short_events": self.min_short_events,
+            "watermark": self.watermark,
+            "regions": self.regions,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        state = dict(state)
+        regions = state.pop("regions")
+        watermark = state.pop("watermark")
+        detector = cls(**state)
+        detector.regions = regions
+        detector.watermark = watermark
+        return detector
+
+
+# Feeds an ingestion batch to the detector kept by the backend and saves the
+# new state; returns the alerts. When an overlapping run saved the state
+# first, the batch is counted again on top of that run's state.
+def update_from_batch(backend, df, attempts=SAVE_ATTEMPTS):
+    for _ in range(attempts):
+        state, version = backend.load_state(STATE_NAME)
+        detector = RateDetector() if state is None else RateDetector.from_state(state)
+        alerts = detector.update(df)
+        if backend.save_state(STATE_NAME, detector.to_state(), version):
+            return alerts
+    raise RuntimeError(f"State {STATE_NAME!r} changed under every one of {attempts} updates")
+
+# The region columns and times of the events to replay, sorted by time
+def backtest_events(args):
+    columns = ["time_epoch", "country", "latitude", "longitude"]
+    if args.synthetic:
+        import lambda_function
+        from synthetic_usgs import generate_payload
+        df = lambda_function.data_processing_transformation(
+            lambda_function.clean_data(generate_payload(args.synthetic, seed=args.seed)))
+        return df[columns].sort_values("time_epoch")
+
+    from storage import EventFilter, get_backend
+    chunks = get_backend(read_only=True).iter_events(EventFilter(args.start, args.end), columns)
+    return pd.concat(list(chunks), ignore_index=True).sort_values("time_epoch")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay events through the rate detector")
+    parser.add_argument("--start", type=datetime.date.fromisoformat, help="first day of stored events to replay")
+    parser.add_argument("--end", type=datetime.date.fromisoformat, help="day after the last day")
+    parser.add_argument("--synthetic", type=int, metavar="EVENTS", help="replay a synthetic payload instead")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--by", choices=["country", "cell"], default="country")
+    parser.add_argument("--batch-size", type=int, default=0,
+                        help="feed the events in batches of this size, as the lambda does (default one batch)")
+    parser.add_argument("--top", type=int, default=20, help="alerts to print")
+    args = parser.parse_args()
+    if not args.synthetic and not (args.start and args.end):
+        parser.error("either --synthetic or --start and --end are required")
+
+    events = backtest_events(args)
+    detector = RateDetector(by=args.by)
+    batch_size = args.batch_size or max(len(events), 1)
+    alerts = []
+    start = time.perf_counter()
+    for offset in range(0, len(events), batch_size):
+        alerts.extend(detector.update(events.iloc[offset:offset + batch_size]))
+    seconds = time.perf_counter() - start
+
+    print(f"Replayed {len(events):,} events over {len(detector.regions):,} regions in {seconds:.2f} s "
+          f"({len(events) / max(seconds, 1e-9):,.0f} events/s), {len(alerts)} alerts")
+    for alert in sorted(alerts, key=lambda a: a["ratio"], reverse=True)[:args.top]:
+        when = pd.to_datetime(alert["time_epoch"], unit="ms")
+        print(f"  {when:%Y-%m-%d %H:%M}  {alert['region']:<32} ratio {alert['ratio']:5.1f}  "
+              f"{alert['short_rate_per_day']:7.1f}/day vs {alert['long_rate_per_day']:6.1f}/day")
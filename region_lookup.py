@@ -0,0 +1,961 @@
+# Generated by build_region_lookup.py - do not edit by hand.
+
+COUNTRIES = ('Afghanistan', 'Albania', 'Algeria', 'American Samoa', 'Andorra', 'Angola', 'Anguilla',
+ 'Antarctica', 'Antigua and Barbuda', 'Argentina', 'Armenia', 'Aruba', 'Australia', 'Austria',
+ 'Azerbaijan', 'Bahamas', 'Bahrain', 'Bangladesh', 'Barbados', 'Belarus', 'Belgium', 'Belize',
+ 'Benin', 'Bermuda', 'Bhutan', 'Bolivia, Plurinational State of',
+ 'Bonaire, Sint Eustatius and Saba', 'Bosnia and Herzegovina', 'Botswana', 'Bouvet Island',
+ 'Brazil', 'British Indian Ocean Territory', 'Brunei Darussalam', 'Bulgaria', 'Burkina Faso',
+ 'Burundi', 'Cabo Verde', 'Cambodia', 'Cameroon', 'Canada', 'Cayman Islands',
+ 'Central African Republic', 'Chad', 'Chile', 'China', 'Christmas Island',
+ 'Cocos (Keeling) Islands', 'Colombia', 'Comoros', 'Congo', 'Congo, The Democratic Republic of the',
+ 'Cook Islands', 'Costa Rica', 'Croatia', 'Cuba', 'Curaçao', 'Cyprus', 'Czechia', "Côte d'Ivoire",
+ 'Denmark', 'Djibouti', 'Dominica', 'Dominican Republic', 'Ecuador', 'Egypt', 'El Salvador',
+ 'Equatorial Guinea', 'Eritrea', 'Estonia', 'Eswatini', 'Ethiopia', 'Falkland Islands (Malvinas)',
+ 'Faroe Islands', 'Fiji', 'Finland', 'France', 'French Guiana', 'French Polynesia',
+ 'French Southern Territories', 'Gabon', 'Gambia', 'Georgia', 'Germany', 'Ghana', 'Gibraltar',
+ 'Greece', 'Greenland', 'Grenada', 'Guadeloupe', 'Guam', 'Guatemala', 'Guernsey', 'Guinea',
+ 'Guinea-Bissau', 'Guyana', 'Haiti', 'Heard Island and McDonald Islands',
+ 'Holy See (Vatican City State)', 'Honduras', 'Hong Kong', 'Hungary', 'Iceland', 'India',
+ 'Indonesia', 'Iran, Islamic Republic of', 'Iraq', 'Ireland', 'Isle of Man', 'Israel', 'Italy',
+ 'Jamaica', 'Japan', 'Jersey', 'Jordan', 'Kazakhstan', 'Kenya', 'Kiribati',
+ "Korea, Democratic People's Republic of", 'Korea, Republic of', 'Kuwait', 'Kyrgyzstan',
+ "Lao People's Democratic Republic", 'Latvia', 'Lebanon', 'Lesotho', 'Liberia', 'Libya',
+ 'Liechtenstein', 'Lithuania', 'Luxembourg', 'Macao', 'Madagascar', 'Malawi', 'Malaysia',
+ 'Maldives', 'Mali', 'Malta', 'Marshall Islands', 'Martinique', 'Mauritania', 'Mauritius',
+ 'Mayotte', 'Mexico', 'Micronesia, Federated States of', 'Moldova, Republic of', 'Monaco',
+ 'Mongolia', 'Montenegro', 'Montserrat', 'Morocco', 'Mozambique', 'Myanmar', 'Namibia', 'Nauru',
+ 'Nepal', 'Netherlands', 'New Caledonia', 'New Zealand', 'Nicaragua', 'Niger', 'Nigeria', 'Niue',
+ 'Norfolk Island', 'North Macedonia', 'Northern Mariana Islands', 'Norway', 'Oman', 'Pakistan',
+ 'Palau', 'Palestine, State of', 'Panama', 'Papua New Guinea', 'Paraguay', 'Peru', 'Philippines',
+ 'Pitcairn', 'Poland', 'Portugal', 'Puerto Rico', 'Qatar', 'Romania', 'Russian Federation',
+ 'Rwanda', 'Réunion', 'Saint Barthélemy', 'Saint Helena, Ascension and Tristan da Cunha',
+ 'Saint Kitts and Nevis', 'Saint Lucia', 'Saint Martin (French part)', 'Saint Pierre and Miquelon',
+ 'Saint Vincent and the Grenadines', 'Samoa', 'San Marino', 'Sao Tome and Principe', 'Saudi Arabia',
+ 'Senegal', 'Serbia', 'Seychelles', 'Sierra Leone', 'Singapore', 'Sint Maarten (Dutch part)',
+ 'Slovakia', 'Slovenia', 'Solomon Islands', 'Somalia', 'South Africa',
+ 'South Georgia and the South Sandwich Islands', 'South Sudan', 'Spain', 'Sri Lanka', 'Sudan',
+ 'Suriname', 'Svalbard and Jan Mayen', 'Sweden', 'Switzerland', 'Syrian Arab Republic',
+ 'Taiwan, Province of China', 'Tajikistan', 'Tanzania, United Republic of', 'Thailand',
+ 'Timor-Leste', 'Togo', 'Tokelau', 'Tonga', 'Trinidad and Tobago', 'Tunisia', 'Turkmenistan',
+ 'Turks and Caicos Islands', 'Tuvalu', 'Türkiye', 'Uganda', 'Ukraine', 'United Arab Emirates',
+ 'United Kingdom', 'United States', 'United States Minor Outlying Islands', 'Uruguay', 'Uzbekistan',
+ 'Vanuatu', 'Venezuela, Bolivarian Republic of', 'Viet Nam', 'Virgin Islands, British',
+ 'Virgin Islands, U.S.', 'Wallis and Futuna', 'Western Sahara', 'Yemen', 'Zambia', 'Zimbabwe',
+ 'Åland Islands', 'Unknown')
+
+CONTINENTS = ('AF', 'AN', 'AS', 'EU', 'NA', 'OC', 'SA', 'Unknown')
+
+CONTINENT_INDEX = (2, 3, 0, 5, 3, 0, 4, 1, 4, 6, 2, 4, 5, 3, 2, 4, 2, 2, 4, 3, 3, 4, 0, 4, 2, 6, 4, 3, 0, 1, 6, 2, 2,
+ 3, 0, 0, 0, 2, 0, 4, 4, 0, 0, 6, 2, 2, 2, 6, 0, 0, 0, 5, 4, 3, 4, 4, 2, 3, 0, 3, 0, 4, 4, 6, 0, 4,
+ 0, 0, 3, 0, 0, 6, 3, 5, 3, 3, 6, 5, 1, 0, 0, 2, 3, 0, 3, 3, 4, 4, 4, 5, 4, 3, 0, 0, 6, 4, 1, 3, 4,
+ 2, 3, 3, 2, 2, 2, 2, 3, 3, 2, 3, 4, 2, 3, 2, 2, 0, 5, 2, 2, 2, 2, 2, 3, 2, 0, 0, 0, 3, 3, 3, 2, 0,
+ 0, 2, 2, 0, 3, 5, 4, 0, 0, 0, 4, 5, 3, 3, 2, 3, 4, 0, 0, 2, 0, 5, 2, 3, 5, 5, 4, 0, 0, 5, 5, 3, 5,
+ 3, 2, 2, 5, 2, 4, 5, 6, 6, 2, 5, 3, 3, 4, 2, 3, 3, 0, 0, 4, 0, 4, 4, 4, 4, 4, 5, 3, 0, 2, 0, 3, 0,
+ 0, 2, 4, 3, 3, 5, 0, 0, 1, 0, 3, 2, 0, 6, 3, 3, 3, 2, 2, 2, 0, 2, 2, 0, 5, 5, 4, 0, 2, 4, 5, 2, 0,
+ 3, 2, 3, 4, 5, 6, 2, 5, 6, 2, 4, 4, 5, 0, 2, 0, 0, 3, 7)
+
+UNKNOWN = 249
+
+ALPHA2 = {'AD': 4,
+ 'AE': 232,
+ 'AF': 0,
+ 'AG': 8,
+ 'AI': 6,
+ 'AL': 1,
+ 'AM': 10,
+ 'AO': 5,
+ 'AQ': 7,
+ 'AR': 9,
+ 'AS': 3,
+ 'AT': 13,
+ 'AU': 12,
+ 'AW': 11,
+ 'AX': 248,
+ 'AZ': 14,
+ 'BA': 27,
+ 'BB': 18,
+ 'BD': 17,
+ 'BE': 20,
+ 'BF': 34,
+ 'BG': 33,
+ 'BH': 16,
+ 'BI': 35,
+ 'BJ': 22,
+ 'BL': 184,
+ 'BM': 23,
+ 'BN': 32,
+ 'BO': 25,
+ 'BQ': 26,
+ 'BR': 30,
+ 'BS': 15,
+ 'BT': 24,
+ 'BV': 29,
+ 'BW': 28,
+ 'BY': 19,
+ 'BZ': 21,
+ 'CA': 39,
+ 'CC': 46,
+ 'CD': 50,
+ 'CF': 41,
+ 'CG': 49,
+ 'CH': 214,
+ 'CI': 58,
+ 'CK': 51,
+ 'CL': 43,
+ 'CM': 38,
+ 'CN': 44,
+ 'CO': 47,
+ 'CR': 52,
+ 'CU': 54,
+ 'CV': 36,
+ 'CW': 55,
+ 'CX': 45,
+ 'CY': 56,
+ 'CZ': 57,
+ 'DE': 82,
+ 'DJ': 60,
+ 'DK': 59,
+ 'DM': 61,
+ 'DO': 62,
+ 'DZ': 2,
+ 'EC': 63,
+ 'EE': 68,
+ 'EG': 64,
+ 'EH': 244,
+ 'ER': 67,
+ 'ES': 208,
+ 'ET': 70,
+ 'FI': 74,
+ 'FJ': 73,
+ 'FK': 71,
+ 'FM': 143,
+ 'FO': 72,
+ 'FR': 75,
+ 'GA': 79,
+ 'GB': 233,
+ 'GD': 87,
+ 'GE': 81,
+ 'GF': 76,
+ 'GG': 91,
+ 'GH': 83,
+ 'GI': 84,
+ 'GL': 86,
+ 'GM': 80,
+ 'GN': 92,
+ 'GP': 88,
+ 'GQ': 66,
+ 'GR': 85,
+ 'GS': 206,
+ 'GT': 90,
+ 'GU': 89,
+ 'GW': 93,
+ 'GY': 94,
+ 'HK': 99,
+ 'HM': 96,
+ 'HN': 98,
+ 'HR': 53,
+ 'HT': 95,
+ 'HU': 100,
+ 'ID': 103,
+ 'IE': 106,
+ 'IL': 108,
+ 'IM': 107,
+ 'IN': 102,
+ 'IO': 31,
+ 'IQ': 105,
+ 'IR': 104,
+ 'IS': 101,
+ 'IT': 109,
+ 'JE': 112,
+ 'JM': 110,
+ 'JO': 113,
+ 'JP': 111,
+ 'KE': 115,
+ 'KG': 120,
+ 'KH': 37,
+ 'KI': 116,
+ 'KM': 48,
+ 'KN': 186,
+ 'KP': 117,
+ 'KR': 118,
+ 'KW': 119,
+ 'KY': 40,
+ 'KZ': 114,
+ 'LA': 121,
+ 'LB': 123,
+ 'LC': 187,
+ 'LI': 127,
+ 'LK': 209,
+ 'LR': 125,
+ 'LS': 124,
+ 'LT': 128,
+ 'LU': 129,
+ 'LV': 122,
+ 'LY': 126,
+ 'MA': 149,
+ 'MC': 145,
+ 'MD': 144,
+ 'ME': 147,
+ 'MF': 188,
+ 'MG': 131,
+ 'MH': 137,
+ 'MK': 163,
+ 'ML': 135,
+ 'MM': 151,
+ 'MN': 146,
+ 'MO': 130,
+ 'MP': 164,
+ 'MQ': 138,
+ 'MR': 139,
+ 'MS': 148,
+ 'MT': 136,
+ 'MU': 140,
+ 'MV': 134,
+ 'MW': 132,
+ 'MX': 142,
+ 'MY': 133,
+ 'MZ': 150,
+ 'NA': 152,
+ 'NC': 156,
+ 'NE': 159,
+ 'NF': 162,
+ 'NG': 160,
+ 'NI': 158,
+ 'NL': 155,
+ 'NO': 165,
+ 'NP': 154,
+ 'NR': 153,
+ 'NU': 161,
+ 'NZ': 157,
+ 'OM': 166,
+ 'PA': 170,
+ 'PE': 173,
+ 'PF': 77,
+ 'PG': 171,
+ 'PH': 174,
+ 'PK': 167,
+ 'PL': 176,
+ 'PM': 189,
+ 'PN': 175,
+ 'PR': 178,
+ 'PS': 169,
+ 'PT': 177,
+ 'PW': 168,
+ 'PY': 172,
+ 'QA': 179,
+ 'RE': 183,
+ 'RO': 180,
+ 'RS': 196,
+ 'RU': 181,
+ 'RW': 182,
+ 'SA': 194,
+ 'SB': 203,
+ 'SC': 197,
+ 'SD': 210,
+ 'SE': 213,
+ 'SG': 199,
+ 'SH': 185,
+ 'SI': 202,
+ 'SJ': 212,
+ 'SK': 201,
+ 'SL': 198,
+ 'SM': 192,
+ 'SN': 195,
+ 'SO': 204,
+ 'SR': 211,
+ 'SS': 207,
+ 'ST': 193,
+ 'SV': 65,
+ 'SX': 200,
+ 'SY': 215,
+ 'SZ': 69,
+ 'TC': 227,
+ 'TD': 42,
+ 'TF': 78,
+ 'TG': 221,
+ 'TH': 219,
+ 'TJ': 217,
+ 'TK': 222,
+ 'TL': 220,
+ 'TM': 226,
+ 'TN': 225,
+ 'TO': 223,
+ 'TR': 229,
+ 'TT': 224,
+ 'TV': 228,
+ 'TW': 216,
+ 'TZ': 218,
+ 'UA': 231,
+ 'UG': 230,
+ 'UM': 235,
+ 'US': 234,
+ 'UY': 236,
+ 'UZ': 237,
+ 'VA': 97,
+ 'VC': 190,
+ 'VE': 239,
+ 'VG': 241,
+ 'VI': 242,
+ 'VN': 240,
+ 'VU': 238,
+ 'WF': 243,
+ 'WS': 191,
+ 'YE': 245,
+ 'YT': 141,
+ 'ZA': 205,
+ 'ZM': 246,
+ 'ZW': 247}
+
+REGIONS = {'admiralty islands': 171,
+ 'aegean sea': 85,
+ 'afghanistan': 0,
+ 'africa': 205,
+ 'african republic': 41,
+ 'ak': 234,
+ 'al': 234,
+ 'alabama': 234,
+ 'alaska': 234,
+ 'alaska peninsula': 234,
+ 'albania': 1,
+ 'aleutian islands': 234,
+ 'algeria': 2,
+ 'american samoa': 3,
+ 'andaman islands': 102,
+ 'andorra': 4,
+ 'andreanof islands': 234,
+ 'angola': 5,
+ 'anguilla': 6,
+ 'antarctica': 7,
+ 'antigua and barbuda': 8,
+ 'ar': 234,
+ 'arab republic of egypt': 64,
+ 'arctic ocean': 249,
+ 'argentina': 9,
+ 'argentine republic': 9,
+ 'arizona': 234,
+ 'arkansas': 234,
+ 'armenia': 10,
+ 'aruba': 11,
+ 'as': 234,
+ 'ascension island': 185,
+ 'atlantic ocean': 249,
+ 'australia': 12,
+ 'austria': 13,
+ 'az': 234,
+ 'azerbaijan': 14,
+ 'azores': 177,
+ 'azores islands': 177,
+ 'bahamas': 15,
+ 'bahrain': 16,
+ 'baja california': 142,
+ 'balleny islands': 7,
+ 'banda sea': 103,
+ 'bangladesh': 17,
+ 'barbados': 18,
+ 'belarus': 19,
+ 'belgium': 20,
+ 'belize': 21,
+ 'benin': 22,
+ 'bermuda': 23,
+ 'bhutan': 24,
+ 'bismarck sea': 171,
+ 'blanco fracture zone': 249,
+ 'bolivarian republic of venezuela': 239,
+ 'bolivia': 25,
+ 'bolivia, plurinational state of': 25,
+ 'bonaire, sint eustatius and saba': 26,
+ 'bonin islands': 111,
+ 'bosnia and herzegovina': 27,
+ 'botswana': 28,
+ 'bougainville': 171,
+ 'bouvet island': 29,
+ 'brazil': 30,
+ 'british indian ocean territory': 31,
+ 'british virgin islands': 241,
+ 'brunei': 32,
+ 'brunei darussalam': 32,
+ 'bulgaria': 33,
+ 'burkina faso': 34,
+ 'burma': 151,
+ 'burundi': 35,
+ 'ca': 234,
+ 'cabo verde': 36,
+ 'california': 234,
+ 'cambodia': 37,
+ 'cameroon': 38,
+ 'canada': 39,
+ 'canary islands': 208,
+ 'cape verde': 36,
+ 'carlsberg ridge': 249,
+ 'carolina': 234,
+ 'caspian sea': 249,
+ 'cayman islands': 40,
+ 'celebes sea': 103,
+ 'chad': 42,
+ 'chile': 43,
+ 'chile rise': 249,
+ 'china': 44,
+ 'christmas island': 45,
+ 'co': 234,
+ 'cocos (keeling) islands': 46,
+ 'colombia': 47,
+ 'colorado': 234,
+ 'commonwealth of dominica': 61,
+ 'commonwealth of the bahamas': 15,
+ 'commonwealth of the northern mariana islands': 164,
+ 'comoros': 48,
+ 'congo': 49,
+ 'congo, the democratic republic of the': 50,
+ 'connecticut': 234,
+ 'cook islands': 51,
+ 'costa rica': 52,
+ 'crete': 85,
+ 'croatia': 53,
+ 'ct': 234,
+ 'cuba': 54,
+ 'curaçao': 55,
+ 'cyprus': 56,
+ 'czech republic': 57,
+ 'czechia': 57,
+ "côte d'ivoire": 58,
+ 'dakota': 234,
+ 'dc': 234,
+ 'de': 234,
+ 'delaware': 234,
+ "democratic people's republic of korea": 117,
+ 'democratic republic of sao tome and principe': 193,
+ 'democratic republic of the congo': 50,
+ 'democratic republic of timor-leste': 220,
+ 'democratic socialist republic of sri lanka': 209,
+ 'denmark': 59,
+ 'djibouti': 60,
+ 'dodecanese islands': 85,
+ 'dominica': 61,
+ 'dominican republic': 62,
+ 'drake passage': 249,
+ 'easter island': 43,
+ 'easter island microplate': 249,
+ 'ecuador': 63,
+ 'egypt': 64,
+ 'el salvador': 65,
+ 'equatorial guinea': 66,
+ 'eritrea': 67,
+ 'estonia': 68,
+ 'eswatini': 69,
+ 'ethiopia': 70,
+ 'explorer ridge': 249,
+ 'falkland islands (malvinas)': 71,
+ 'faroe islands': 72,
+ 'federal democratic republic of ethiopia': 70,
+ 'federal democratic republic of nepal': 154,
+ 'federal republic of germany': 82,
+ 'federal republic of nigeria': 160,
+ 'federal republic of somalia': 204,
+ 'federated states of micronesia': 143,
+ 'federative republic of brazil': 30,
+ 'fiji': 73,
+ 'fiji islands': 73,
+ 'finland': 74,
+ 'fl': 234,
+ 'flores sea': 103,
+ 'florida': 234,
+ 'fox islands': 234,
+ 'france': 75,
+ 'french guiana': 76,
+ 'french polynesia': 77,
+ 'french republic': 75,
+ 'french southern territories': 78,
+ 'ga': 234,
+ 'gabon': 79,
+ 'gabonese republic': 79,
+ 'gakkel ridge': 249,
+ 'galapagos islands': 63,
+ 'galapagos triple junction': 249,
+ 'gambia': 80,
+ 'georgia': 81,
+ 'georgia and the south sandwich islands': 206,
+ 'georgia island': 206,
+ 'germany': 82,
+ 'ghana': 83,
+ 'gibraltar': 84,
+ 'gorda ridge': 249,
+ 'grand duchy of luxembourg': 129,
+ 'greece': 85,
+ 'greenland': 86,
+ 'grenada': 87,
+ 'gu': 234,
+ 'guadeloupe': 88,
+ 'guam': 89,
+ 'guatemala': 90,
+ 'guernsey': 91,
+ 'guinea': 92,
+ 'guinea-bissau': 93,
+ 'gulf of alaska': 234,
+ 'gulf of california': 142,
+ 'guyana': 94,
+ 'haiti': 95,
+ 'halmahera': 103,
+ 'hashemite kingdom of jordan': 113,
+ 'hawaii': 234,
+ 'heard island and mcdonald islands': 96,
+ 'hellenic republic': 85,
+ 'hi': 234,
+ 'hindu kush': 0,
+ 'hokkaido': 111,
+ 'holy see (vatican city state)': 97,
+ 'honduras': 98,
+ 'hong kong': 99,
+ 'hong kong special administrative region of china': 99,
+ 'honshu': 111,
+ 'hungary': 100,
+ 'ia': 234,
+ 'iceland': 101,
+ 'id': 234,
+ 'idaho': 234,
+ 'il': 234,
+ 'illinois': 234,
+ 'in': 234,
+ 'independent state of papua new guinea': 171,
+ 'independent state of samoa': 191,
+ 'india': 102,
+ 'indian ocean triple junction': 249,
+ 'indian ridge': 249,
+ 'indiana': 234,
+ 'indonesia': 103,
+ 'ionian sea': 85,
+ 'iowa': 234,
+ 'iran': 104,
+ 'iran, islamic republic of': 104,
+ 'iraq': 105,
+ 'ireland': 106,
+ 'islamic republic of afghanistan': 0,
+ 'islamic republic of iran': 104,
+ 'islamic republic of mauritania': 139,
+ 'islamic republic of pakistan': 167,
+ 'isle of man': 107,
+ 'israel': 108,
+ 'italian republic': 109,
+ 'italy': 109,
+ 'ivory coast': 58,
+ 'izu islands': 111,
+ 'jamaica': 110,
+ 'jan mayen island': 212,
+ 'japan': 111,
+ 'java': 103,
+ 'java sea': 103,
+ 'jersey': 112,
+ 'jordan': 113,
+ 'juan de fuca ridge': 249,
+ 'juan fernandez islands': 43,
+ 'kamchatka': 181,
+ 'kansas': 234,
+ 'kashmir': 102,
+ 'kazakhstan': 114,
+ 'kentucky': 234,
+ 'kenya': 115,
+ 'kepulauan talaud': 103,
+ 'kermadec islands': 157,
+ 'kingdom of bahrain': 16,
+ 'kingdom of belgium': 20,
+ 'kingdom of bhutan': 24,
+ 'kingdom of cambodia': 37,
+ 'kingdom of denmark': 59,
+ 'kingdom of eswatini': 69,
+ 'kingdom of lesotho': 124,
+ 'kingdom of morocco': 149,
+ 'kingdom of norway': 165,
+ 'kingdom of saudi arabia': 194,
+ 'kingdom of spain': 208,
+ 'kingdom of sweden': 213,
+ 'kingdom of thailand': 219,
+ 'kingdom of the netherlands': 155,
+ 'kingdom of tonga': 223,
+ 'kiribati': 116,
+ 'knipovich ridge': 249,
+ 'kodiak island': 234,
+ 'komandorskiye ostrova': 181,
+ 'korea': 117,
+ "korea, democratic people's republic of": 117,
+ 'korea, republic of': 118,
+ 'ks': 234,
+ 'kuril islands': 181,
+ 'kuwait': 119,
+ 'ky': 234,
+ 'kyrgyz republic': 120,
+ 'kyrgyzstan': 120,
+ 'kyushu': 111,
+ 'la': 234,
+ "lao people's democratic republic": 121,
+ 'laos': 121,
+ 'latvia': 122,
+ 'lebanese republic': 123,
+ 'lebanon': 123,
+ 'lesotho': 124,
+ 'leyte': 174,
+ 'liberia': 125,
+ 'libya': 126,
+ 'liechtenstein': 127,
+ 'lithuania': 128,
+ 'louisiana': 234,
+ 'loyalty islands': 156,
+ 'luxembourg': 129,
+ 'luzon': 174,
+ 'ma': 234,
+ 'macao': 130,
+ 'macao special administrative region of china': 130,
+ 'macedonia': 163,
+ 'macquarie island': 12,
+ 'madagascar': 131,
+ 'madeira islands': 177,
+ 'maine': 234,
+ 'malawi': 132,
+ 'malaysia': 133,
+ 'maldives': 134,
+ 'mali': 135,
+ 'malta': 136,
+ 'mariana islands': 164,
+ 'marshall islands': 137,
+ 'martinique': 138,
+ 'maryland': 234,
+ 'massachusetts': 234,
+ 'mauritania': 139,
+ 'mauritius': 140,
+ 'mayotte': 141,
+ 'md': 234,
+ 'me': 234,
+ 'mexico': 142,
+ 'mi': 234,
+ 'michigan': 234,
+ 'micronesia': 143,
+ 'micronesia, federated states of': 143,
+ 'mid-atlantic ridge': 249,
+ 'mid-indian ridge': 249,
+ 'minahasa': 103,
+ 'mindanao': 174,
+ 'minnesota': 234,
+ 'mississippi': 234,
+ 'missouri': 234,
+ 'mn': 234,
+ 'mo': 234,
+ 'moldova': 144,
+ 'moldova, republic of': 144,
+ 'molucca sea': 103,
+ 'monaco': 145,
+ 'mongolia': 146,
+ 'montana': 234,
+ 'montenegro': 147,
+ 'montserrat': 148,
+ 'morocco': 149,
+ 'mozambique': 150,
+ 'mp': 234,
+ 'ms': 234,
+ 'mt': 234,
+ 'myanmar': 151,
+ 'namibia': 152,
+ 'nauru': 153,
+ 'nc': 234,
+ 'nd': 234,
+ 'ne': 234,
+ 'near islands': 234,
+ 'nebraska': 234,
+ 'nepal': 154,
+ 'netherlands': 155,
+ 'nevada': 234,
+ 'new britain': 171,
+ 'new caledonia': 156,
+ 'new hampshire': 234,
+ 'new ireland': 171,
+ 'new jersey': 234,
+ 'new mexico': 234,
+ 'new york': 234,
+ 'new zealand': 157,
+ 'nh': 234,
+ 'nicaragua': 158,
+ 'nicobar islands': 102,
+ 'niger': 159,
+ 'nigeria': 160,
+ 'niue': 161,
+ 'nj': 234,
+ 'nm': 234,
+ 'norfolk island': 162,
+ 'norway': 165,
+ 'nv': 234,
+ 'ny': 234,
+ 'ocean': 249,
+ 'oh': 234,
+ 'ohio': 234,
+ 'ok': 234,
+ 'oklahoma': 234,
+ 'oman': 166,
+ 'or': 234,
+ 'oregon': 234,
+ 'owen fracture zone': 249,
+ 'pa': 234,
+ 'pacific rise': 249,
+ 'pacific-antarctic ridge': 249,
+ 'pakistan': 167,
+ 'palau': 168,
+ 'palestine': 169,
+ 'palestine, state of': 169,
+ 'panama': 170,
+ 'papua new guinea': 171,
+ 'paraguay': 172,
+ 'pennsylvania': 234,
+ "people's democratic republic of algeria": 2,
+ "people's republic of bangladesh": 17,
+ "people's republic of china": 44,
+ 'peru': 173,
+ 'philippine islands': 174,
+ 'philippines': 174,
+ 'pitcairn': 175,
+ 'plurinational state of bolivia': 25,
+ 'poland': 176,
+ 'portugal': 177,
+ 'portuguese republic': 177,
+ 'pr': 234,
+ 'prince edward islands': 205,
+ 'principality of andorra': 4,
+ 'principality of liechtenstein': 127,
+ 'principality of monaco': 145,
+ 'puerto rico': 178,
+ 'qatar': 179,
+ 'rat islands': 234,
+ 'republic of albania': 1,
+ 'republic of angola': 5,
+ 'republic of armenia': 10,
+ 'republic of austria': 13,
+ 'republic of azerbaijan': 14,
+ 'republic of belarus': 19,
+ 'republic of benin': 22,
+ 'republic of bosnia and herzegovina': 27,
+ 'republic of botswana': 28,
+ 'republic of bulgaria': 33,
+ 'republic of burundi': 35,
+ 'republic of cabo verde': 36,
+ 'republic of cameroon': 38,
+ 'republic of chad': 42,
+ 'republic of chile': 43,
+ 'republic of colombia': 47,
+ 'republic of costa rica': 52,
+ 'republic of croatia': 53,
+ 'republic of cuba': 54,
+ 'republic of cyprus': 56,
+ "republic of côte d'ivoire": 58,
+ 'republic of djibouti': 60,
+ 'republic of ecuador': 63,
+ 'republic of el salvador': 65,
+ 'republic of equatorial guinea': 66,
+ 'republic of estonia': 68,
+ 'republic of fiji': 73,
+ 'republic of finland': 74,
+ 'republic of ghana': 83,
+ 'republic of guatemala': 90,
+ 'republic of guinea': 92,
+ 'republic of guinea-bissau': 93,
+ 'republic of guyana': 94,
+ 'republic of haiti': 95,
+ 'republic of honduras': 98,
+ 'republic of iceland': 101,
+ 'republic of india': 102,
+ 'republic of indonesia': 103,
+ 'republic of iraq': 105,
+ 'republic of kazakhstan': 114,
+ 'republic of kenya': 115,
+ 'republic of kiribati': 116,
+ 'republic of latvia': 122,
+ 'republic of liberia': 125,
+ 'republic of lithuania': 128,
+ 'republic of madagascar': 131,
+ 'republic of malawi': 132,
+ 'republic of maldives': 134,
+ 'republic of mali': 135,
+ 'republic of malta': 136,
+ 'republic of mauritius': 140,
+ 'republic of moldova': 144,
+ 'republic of mozambique': 150,
+ 'republic of myanmar': 151,
+ 'republic of namibia': 152,
+ 'republic of nauru': 153,
+ 'republic of nicaragua': 158,
+ 'republic of north macedonia': 163,
+ 'republic of palau': 168,
+ 'republic of panama': 170,
+ 'republic of paraguay': 172,
+ 'republic of peru': 173,
+ 'republic of poland': 176,
+ 'republic of san marino': 192,
+ 'republic of senegal': 195,
+ 'republic of serbia': 196,
+ 'republic of seychelles': 197,
+ 'republic of sierra leone': 198,
+ 'republic of singapore': 199,
+ 'republic of slovenia': 202,
+ 'republic of south africa': 205,
+ 'republic of south sudan': 207,
+ 'republic of suriname': 211,
+ 'republic of tajikistan': 217,
+ 'republic of the congo': 49,
+ 'republic of the gambia': 80,
+ 'republic of the marshall islands': 137,
+ 'republic of the niger': 159,
+ 'republic of the philippines': 174,
+ 'republic of the sudan': 210,
+ 'republic of trinidad and tobago': 224,
+ 'republic of tunisia': 225,
+ 'republic of türkiye': 229,
+ 'republic of uganda': 230,
+ 'republic of uruguay': 236,
+ 'republic of uzbekistan': 237,
+ 'republic of vanuatu': 238,
+ 'republic of yemen': 245,
+ 'republic of zambia': 246,
+ 'republic of zimbabwe': 247,
+ 'revilla gigedo islands': 142,
+ 'reykjanes ridge': 249,
+ 'rhode island': 234,
+ 'ri': 234,
+ 'romania': 180,
+ 'russia': 181,
+ 'russian federation': 181,
+ 'rwanda': 182,
+ 'rwandese republic': 182,
+ 'ryukyu islands': 111,
+ 'réunion': 183,
+ 'sahara': 244,
+ 'saint barthélemy': 184,
+ 'saint helena, ascension and tristan da cunha': 185,
+ 'saint kitts and nevis': 186,
+ 'saint lucia': 187,
+ 'saint martin (french part)': 188,
+ 'saint pierre and miquelon': 189,
+ 'saint vincent and the grenadines': 190,
+ 'sakhalin': 181,
+ 'samar': 174,
+ 'samoa': 191,
+ 'samoa islands': 191,
+ 'san marino': 192,
+ 'sandwich islands': 206,
+ 'santa cruz islands': 203,
+ 'sao tome and principe': 193,
+ 'saudi arabia': 194,
+ 'sc': 234,
+ 'scotia sea': 206,
+ 'sd': 234,
+ 'sea of okhotsk': 181,
+ 'senegal': 195,
+ 'seram': 103,
+ 'serbia': 196,
+ 'seychelles': 197,
+ 'shikoku': 111,
+ 'sichuan': 44,
+ 'sicily': 109,
+ 'sierra leone': 198,
+ 'singapore': 199,
+ 'sint maarten (dutch part)': 200,
+ 'slovak republic': 201,
+ 'slovakia': 201,
+ 'slovenia': 202,
+ 'socialist republic of viet nam': 240,
+ 'solomon islands': 203,
+ 'solomon sea': 171,
+ 'somalia': 204,
+ 'spain': 208,
+ 'sri lanka': 209,
+ 'state of eritrea': 67,
+ 'state of israel': 108,
+ 'state of kuwait': 119,
+ 'state of palestine': 169,
+ 'state of qatar': 179,
+ 'sudan': 207,
+ 'sulawesi': 103,
+ 'sultanate of oman': 166,
+ 'sumatra': 103,
+ 'sumba': 103,
+ 'sumbawa': 103,
+ 'suriname': 211,
+ 'svalbard': 212,
+ 'svalbard and jan mayen': 212,
+ 'sweden': 213,
+ 'swiss confederation': 214,
+ 'switzerland': 214,
+ 'syria': 215,
+ 'syrian arab republic': 215,
+ 'taiwan': 216,
+ 'taiwan, province of china': 216,
+ 'tajikistan': 217,
+ 'talaud islands': 103,
+ 'tanzania': 218,
+ 'tanzania, united republic of': 218,
+ 'tennessee': 234,
+ 'texas': 234,
+ 'thailand': 219,
+ 'tibet': 44,
+ 'timor': 220,
+ 'timor-leste': 220,
+ 'tn': 234,
+ 'togo': 221,
+ 'togolese republic': 221,
+ 'tokelau': 222,
+ 'tonga': 223,
+ 'tonga islands': 223,
+ 'trinidad and tobago': 224,
+ 'tristan da cunha': 185,
+ 'tunisia': 225,
+ 'turkey': 229,
+ 'turkmenistan': 226,
+ 'turks and caicos islands': 227,
+ 'tuvalu': 228,
+ 'tx': 234,
+ 'türkiye': 229,
+ 'u.s. virgin islands': 242,
+ 'uganda': 230,
+ 'uk': 233,
+ 'ukraine': 231,
+ 'unimak island': 234,
+ 'union of the comoros': 48,
+ 'united arab emirates': 232,
+ 'united kingdom': 233,
+ 'united kingdom of great britain and northern ireland': 233,
+ 'united mexican states': 142,
+ 'united republic of tanzania': 218,
+ 'united states': 234,
+ 'united states minor outlying islands': 235,
+ 'united states of america': 234,
+ 'uruguay': 236,
+ 'ut': 234,
+ 'utah': 234,
+ 'uzbekistan': 237,
+ 'va': 234,
+ 'vanuatu': 238,
+ 'vanuatu islands': 238,
+ 'vatican city': 97,
+ 'venezuela': 239,
+ 'venezuela, bolivarian republic of': 239,
+ 'vermont': 234,
+ 'vi': 234,
+ 'viet nam': 240,
+ 'vietnam': 240,
+ 'virgin islands': 242,
+ 'virgin islands of the united states': 242,
+ 'virgin islands, british': 241,
+ 'virgin islands, u.s.': 242,
+ 'virginia': 234,
+ 'volcano islands': 111,
+ 'vt': 234,
+ 'wa': 234,
+ 'wallis and futuna': 243,
+ 'washington': 234,
+ 'wi': 234,
+ 'wisconsin': 234,
+ 'wv': 234,
+ 'wy': 234,
+ 'wyoming': 234,
+ 'xinjiang': 44,
+ 'xizang': 44,
+ 'yemen': 245,
+ 'yunnan': 44,
+ 'zambia': 246,
+ 'zimbabwe': 247,
+ 'åland islands': 248}
+
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+
+# Resolves USGS place strings to (country, continent) with the table generated
+# by build_region_lookup.py. Only places missing from the table fall back to
+# reverse geocoding, and those are geocoded in a single batch.
+
+# Direction and coast qualifiers in front of a region name, e.g.
+# "south of the Fiji Islands" or "off the east coast of Honshu"
+_PREFIX = (r"^(?:(?:north|south|east|west|central|northern|southern|eastern|western"
+           r"|northeast|northwest|southeast|southwest|northeastern|northwestern"
+           r"|southeastern|southwestern)\s+(?:of\s+)?(?:the\s+)?"
+           r"|(?:off|near)\s+the\s+(?:\w+\s+)?coast\s+of\s+(?:the\s+)?|the\s+)")
+_SUFFIX = r"\s+region$"
+
+@lru_cache(maxsize=None)
+def lookup_table():
+    import region_lookup
+    return region_lookup
+
+# Lower-cases region names and strips direction qualifiers and "region"
+def normalize_region_names(names):
+    names = names.str.lower().str.strip().str.replace(r"\s+", " ", regex=True)
+    # qualifiers can be stacked: "near the coast of northern Chile"
+    for _ in range(2):
+        names = names.str.replace(_PREFIX, "", regex=True)
+    return names.str.replace(_SUFFIX, "", regex=True).str.strip()
+
+# Region part of the place string: the text after the first comma, or the
+# whole string for Flinn-Engdahl style names such as "Kuril Islands"
+def region_names(location):
+    location = location.astype("string")
+    after_comma = location.str.extract(r",\s*(.*)$", expand=False)
+    return after_comma.fillna(location)
+
+# Table index for every place string, -1 where the table has no entry
+def lookup_regions(location):
+    table = lookup_table()
+    regions = region_names(location)
+    unique = pd.Series(regions.dropna().unique(), dtype="string")
+    keys = normalize_region_names(unique)
+    index_of = dict(zip(unique, keys.map(table.REGIONS).fillna(-1).astype(int)))
+    return np.array(regions.map(index_of).fillna(-1), dtype=int)
+
+# Loads the reverse geocoder index; done once per process
+def warm_geocoder():
+    import reverse_geocoder as rg
+    rg.search((0.0, 0.0), mode=1)
+
+# Table index of the country at each coordinate, -1 when it cannot be geocoded
+def geocode_regions(latitude, longitude):
+    table = lookup_table()
+    if len(latitude) == 0:
+        return np.empty(0, dtype=int)
+    try:
+        import reverse_geocoder as rg
+        coordinates = list(zip(np.asarray(latitude, dtype=float), np.asarray(longitude, dtype=float)))
+        results = rg.search(coordinates, mode=1)
+        return np.array([table.ALPHA2.get(r["cc"], -1) for r in results], dtype=int)
+    except Exception as e:
+        print("Reverse geocoding failed:", e)
+        return np.full(len(latitude), -1, dtype=int)
+
+# Returns the country and continent of every event as categoricals, and the
+# boolean mask of events that needed the geocoder
+def resolve_regions(location, latitude, longitude):
+    table = lookup_table()
+    index = lookup_regions(location)
+    fallback = index < 0
+    if fallback.any():
+        lat = np.asarray(latitude, dtype=float)[fallback]
+        lon = np.asarray(longitude, dtype=float)[fallback]
+        index[fallback] = geocode_regions(lat, lon)
+
+    # -1 (unresolved) maps to the trailing "Unknown" entry of the table
+    index[index < 0] = table.UNKNOWN
+    country = pd.Categorical.from_codes(index, categories=table.COUNTRIES)
+    continent = pd.Categorical.from_codes(
+        np.asarray(table.CONTINENT_INDEX)[index], categories=table.CONTINENTS)
+    return (pd.Series(country, index=location.index),
+            pd.Series(continent, index=location.index),
+            fallback)
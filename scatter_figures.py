@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+# Scatter figures of the dashboard (magnitude vs depth, recent 7 days) that
+# stay responsive for wide filters:
+#   - up to SVG_MAX_POINTS events are drawn as SVG markers, above that the
+#     traces switch to WebGL (scattergl) with smaller markers
+#   - above MAX_POINTS the events are downsampled: large events and events in
+#     sparsely populated parts of the plot are always kept, and the dense
+#     parts are thinned uniformly, so the shape of the point cloud stays the
+#     same while the figure shrinks
+#   - hover labels only carry the location and the time (to the minute)
+#
+# figure_profile.py reports the figure JSON size and build time.
+
+SVG_MAX_POINTS = 1000
+MAX_POINTS = 20000
+# Events at or above this magnitude are never dropped
+KEEP_MAGNITUDE = 5.0
+# Grid used to find the sparse parts of the plot
+GRID_BINS = 50
+SPARSE_CELL_EVENTS = 5
+DAY_MS = 24 * 60 * 60 * 1000
+
+# Grid cell of every row over the given numeric columns (NaN gets its own bin)
+def grid_cells(df, columns, bins=GRID_BINS):
+    cells = np.zeros(len(df), dtype=np.int64)
+    for column in columns:
+        values = df[column].to_numpy(dtype=float, na_value=np.nan)
+        finite = values[~np.isnan(values)]
+        if len(finite) and finite.max() > finite.min():
+            scaled = (values - finite.min()) / (finite.max() - finite.min()) * bins
+        else:
+            scaled = np.zeros(len(values))
+        index = np.where(np.isnan(values), bins, np.minimum(np.nan_to_num(scaled), bins - 1)).astype(np.int64)
+        cells = cells * (bins + 1) + index
+    return np.unique(cells, return_inverse=True)[1]
+
+# At most max_points rows of df, plus every large or isolated event (which
+# can exceed max_points when there are many of them)
+def downsample(df, columns, max_points=MAX_POINTS, seed=0):
+    if len(df) <= max_points:
+        return df
+    cells = grid_cells(df, columns)
+    keep = np.bincount(cells)[cells] <= SPARSE_CELL_EVENTS
+    keep |= (df["magnitude"] >= KEEP_MAGNITUDE).to_numpy(dtype=bool, na_value=False)
+
+    rest = np.flatnonzero(~keep)
+    budget = max_points - int(keep.sum())
+    if budget > 0:
+        rng = np.random.default_rng(seed)
+        keep[rng.choice(rest, size=min(budget, len(rest)), replace=False)] = True
+    return df[keep]
+
+# Scatter of df (with magnitude, location and time_epoch columns) colored by
+# magnitude; sample_columns are the numeric columns behind the x and y axes
+def scatter_figure(df, x, y, sample_columns, title, labels, max_points=MAX_POINTS):
+    total = len(df)
+    df = downsample(df, sample_columns, max_points)
+    if len(df) < total:
+        title = f"{title} ({len(df):,} of {total:,} events)"
+    webgl = len(df) > SVG_MAX_POINTS
+
+    df = df.assign(time=pd.to_datetime(df["time_epoch"], unit="ms").dt.strftime("%Y-%m-%d %H:%M"))
+    fig = px.scatter(
+        df,
+        x=x,
+        y=y,
+        color='magnitude',
+        color_continuous_scale='RdYlBu_r',
+        hover_data={'location': True, 'time': True},
+        labels=labels,
+        title=title,
+        render_mode='webgl' if webgl else 'svg',
+    )
+    fig.update_traces(marker=dict(size=5 if webgl else 10))
+    fig.update_layout(showlegend=False)
+    return fig
+
+def magnitude_depth_figure(df, max_points=MAX_POINTS):
+    return scatter_figure(df, 'magnitude', 'depth_km', ['magnitude', 'depth_km'], 'Magnitude vs. Depth',
+                          {'depth_km': 'Depth (km)', 'magnitude': 'Magnitude'}, max_points)
+
+def recent_events_figure(df, max_points=MAX_POINTS):
+    # day of the event as epoch ms on a date axis, which serializes as a
+    # typed array instead of one date string per event
+    df = df.assign(date=df["time_epoch"] // DAY_MS * DAY_MS)
+    fig = scatter_figure(df, 'date', 'magnitude', ['time_epoch', 'magnitude'], 'Recent 7 days',
+                         {'magnitude': 'Magnitude'}, max_points)
+    fig.update_xaxes(type='date')
+    return fig
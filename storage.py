@@ -0,0 +1,499 @@
+import argparse
+import datetime
+import json
+import os
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from functools import lru_cache
+
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+from dashboard_data import (load_events, in_date_range, hotspot_counts, trend_window, trend_tables,
+                            classify_mag, kpi_summary, max_event, alert_counts)
+from event_schema import EVENT_SCHEMA, WRITE_SCHEMA, apply_schema, with_date_parts, date_to_epoch_ms
+from item_profiles import persisted_items, rehydrate, storage_profile, stored_attributes
+from time_partition import buckets_for_range, iter_bucket_pages
+
+# Storage backends behind the pipelines and the dashboard. Both backends store
+# the events written by save_to_dynamodb and answer the same dashboard queries:
+#
+#   DynamoDBBackend  the deployed path: items in DynamoDB, read by month
+#                    through the time index and aggregated in pandas
+#   DuckDBBackend    an embedded columnar database file; filters and GROUP BYs
+#                    run in SQL and only the aggregated rows come back
+#
+# The backend is picked with EARTHQUAKE_STORAGE ("dynamodb", the default, or
+# "duckdb"); EARTHQUAKE_DUCKDB_PATH sets the database file. With "service"
+# the queries go to a shared query_service.py process instead, found at
+# EARTHQUAKE_SERVICE_URL. The DynamoDB state table is provisioned once, at
+# deployment, with --create-state-table. A local database can be filled from the synthetic payload for
+# development:
+#
+#   python storage.py --synthetic 100000
+#   EARTHQUAKE_STORAGE=duckdb streamlit run streamlit_app.py
+
+REGION = "us-east-1"
+TABLE_NAME = "earthquakes"
+# Small named state blobs of the pipeline (e.g. the rate detector), keyed by "name"
+STATE_TABLE_NAME = "earthquake_state"
+DUCKDB_PATH = "earthquakes.duckdb"
+
+# Column types of the DuckDB table, following the full-precision
+# WRITE_SCHEMA; the query results are narrowed to EVENT_SCHEMA in memory
+SQL_TYPES = {"float64": "DOUBLE", "int64": "BIGINT", "Int16": "SMALLINT", "Int8": "TINYINT", "category": "VARCHAR"}
+TEXT_COLUMNS = ["location", "detail_url", "event_title"]
+STORE_COLUMNS = ["id"] + list(EVENT_SCHEMA) + TEXT_COLUMNS
+# Columns the filters are evaluated on
+FILTER_COLUMNS = ["time_epoch", "continent", "country", "magnitude", "tsunami_warning"]
+# Rows per chunk when events are streamed (see iter_events)
+CHUNK_SIZE = 50000
+# Seconds a DynamoDBBackend keeps a loaded date range, and ranges kept at most
+FRAME_SECONDS = 300
+MAX_FRAMES = 4
+
+
+# Columns a query asks for, checked against the stored ones (they end up in
+# SQL and projection expressions); None stands for all of them
+def select_columns(columns=None):
+    columns = list(columns or STORE_COLUMNS)
+    unknown = [c for c in columns if c not in STORE_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(map(repr, unknown))}")
+    return columns
+
+# SELECT list of checked columns, quoted as identifiers
+def sql_columns(columns=None):
+    return ", ".join(f'"{column}"' for column in select_columns(columns))
+
+
+# boto3 session and DynamoDB table, created once per process
+@lru_cache(maxsize=None)
+def boto3_session():
+    import boto3
+    return boto3.Session(region_name=REGION)
+
+@lru_cache(maxsize=None)
+def dynamodb_table():
+    return boto3_session().resource("dynamodb").Table(TABLE_NAME)
+
+@lru_cache(maxsize=None)
+def dynamodb_state_table():
+    return boto3_session().resource("dynamodb").Table(STATE_TABLE_NAME)
+
+# Creates the on-demand state table (hash key "name") and waits until it is
+# active; returns False when it already exists
+def create_state_table():
+    client = boto3_session().client("dynamodb")
+    try:
+        client.create_table(
+            TableName=STATE_TABLE_NAME,
+            KeySchema=[{"AttributeName": "name", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "name", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+    except client.exceptions.ResourceInUseException:
+        return False
+    client.get_waiter("table_exists").wait(TableName=STATE_TABLE_NAME)
+    return True
+
+
+# The dashboard selection: start_date <= date < end_date, a continent and
+# country ("All" for any), a magnitude range (None for any) and whether only
+# events with a tsunami warning are kept
+@dataclass(frozen=True)
+class EventFilter:
+    start_date: datetime.date
+    end_date: datetime.date
+    continent: str = "All"
+    country: str = "All"
+    min_mag: float = None
+    max_mag: float = None
+    tsunami_only: bool = False
+
+
+# Rows of df selected by the filter; magnitude=False ignores the magnitude range
+def filter_mask(df, event_filter, magnitude=True):
+    f = event_filter
+    mask = in_date_range(df, f.start_date, f.end_date)
+    if f.continent != "All":
+        mask &= df["continent"] == f.continent
+    if f.country != "All":
+        mask &= df["country"] == f.country
+    if magnitude and f.min_mag is not None:
+        mask &= df["magnitude"] >= f.min_mag
+    if magnitude and f.max_mag is not None:
+        mask &= df["magnitude"] <= f.max_mag
+    if f.tsunami_only:
+        mask &= (df["tsunami_warning"] != 0).fillna(False)
+    return mask
+
+
+# Events stored in DynamoDB. Every query reads the events of its date range
+# through the time index (see time_partition) and aggregates them in pandas.
+# Loaded ranges are kept for frame_seconds (at most max_frames of them, least
+# recently used out), so a dashboard run that asks for several panels of the
+# same window reads it once, while a long-lived backend still sees new events
+# and does not grow with every range asked for. Items are written
+# with a storage profile (EARTHQUAKE_STORAGE_PROFILE, see item_profiles) and
+# rehydrated on read. Named state goes to the STATE_TABLE_NAME table (hash
+# key "name"), which is provisioned ahead of time (--create-state-table).
+class DynamoDBBackend:
+    def __init__(self, table=None, profile=None, state_table=None, frame_seconds=FRAME_SECONDS,
+                 max_frames=MAX_FRAMES):
+        self._table = table
+        self._state_table = state_table
+        self.profile = profile or storage_profile()
+        self.frame_seconds = frame_seconds
+        self.max_frames = max_frames
+        # (start, end) -> (load time, frame), least recently used first
+        self._frames = OrderedDict()
+
+    @property
+    def table(self):
+        return self._table if self._table is not None else dynamodb_table()
+
+    @property
+    def state_table(self):
+        return self._state_table if self._state_table is not None else dynamodb_state_table()
+
+    # Writes the events in the layout of the backend's storage profile (see
+    # item_profiles); lean items leave out empty attributes, so they go
+    # through a batch writer rather than a frame
+    def save(self, df):
+        if self.profile == "full":
+            import awswrangler as wr
+            wr.dynamodb.put_df(df=df, table_name=self.table.name, boto3_session=boto3_session())
+            return
+        with self.table.batch_writer(overwrite_by_pkeys=["id"]) as writer:
+            for item in persisted_items(df, self.profile):
+                writer.put_item(Item=item)
+
+    # Named state saved with save_state and its version: (None, 0) when
+    # there is none. It is stored as compressed JSON to stay far from the
+    # 400 KB item limit.
+    def load_state(self, name):
+        item = self.state_table.get_item(Key={"name": name}, ConsistentRead=True).get("Item")
+        if item is None:
+            return None, 0
+        value = item["value"]
+        # boto3 returns Binary, the local stand-in the bytes written
+        state = json.loads(zlib.decompress(getattr(value, "value", value)))
+        # items written before states were versioned count as version 0
+        return state, int(item.get("version", 0))
+
+    # Saves state as the version after the loaded one, unless another writer
+    # saved since (conditional put); returns False when it lost that race
+    def save_state(self, name, state, version):
+        from boto3.dynamodb.conditions import Attr
+        from botocore.exceptions import ClientError
+        value = zlib.compress(json.dumps(state).encode("utf-8"))
+        condition = Attr("version").not_exists() if version == 0 else Attr("version").eq(version)
+        try:
+            self.state_table.put_item(Item={"name": name, "value": value, "version": version + 1},
+                                      ConditionExpression=condition)
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            return False
+        return True
+
+    # Largest time_epoch among the events updated in the given month, None
+    # when there are none
+    def latest_time_epoch(self, year, month):
+        from boto3.dynamodb.conditions import Attr
+        start = datetime.date(year, month, 1)
+        start_ms, end_ms = date_to_epoch_ms(start), date_to_epoch_ms(start + relativedelta(months=1))
+        kwargs = {
+            # updated_time_epoch is kept by every storage profile, updated_year/month are not
+            "FilterExpression": Attr("updated_time_epoch").between(start_ms, end_ms - 1),
+            "ProjectionExpression": "time_epoch",
+        }
+        response = self.table.scan(**kwargs)
+        epochs = [int(item["time_epoch"]) for item in response["Items"]]
+        while "LastEvaluatedKey" in response:
+            response = self.table.scan(ExclusiveStartKey=response["LastEvaluatedKey"], **kwargs)
+            epochs.extend(int(item["time_epoch"]) for item in response["Items"])
+        return max(epochs) if epochs else None
+
+    # Events with start_date <= date < end_date, from a loaded range that
+    # covers it and has not expired
+    def _events(self, start_date, end_date):
+        now = time.monotonic()
+        for key, (loaded, df) in list(self._frames.items()):
+            if now - loaded >= self.frame_seconds:
+                del self._frames[key]
+            elif key[0] <= start_date and end_date <= key[1]:
+                self._frames.move_to_end(key)
+                return df
+        df = load_events(self.table, start_date, end_date)
+        self._frames[(start_date, end_date)] = (now, df)
+        while len(self._frames) > self.max_frames:
+            self._frames.popitem(last=False)
+        return df
+
+    def _select(self, event_filter, magnitude=True):
+        df = self._events(event_filter.start_date, event_filter.end_date)
+        return df[filter_mask(df, event_filter, magnitude)]
+
+    # The selected events in chunks of about chunk_size rows, read one query
+    # page at a time so the whole selection is never held at once. Chunks
+    # keep full-precision floats (WRITE_SCHEMA), since they feed exports.
+    def iter_events(self, event_filter, columns=None, chunk_size=CHUNK_SIZE):
+        f = event_filter
+        start_ms, end_ms = date_to_epoch_ms(f.start_date), date_to_epoch_ms(f.end_date)
+        columns = select_columns(columns)
+        read = list(dict.fromkeys(columns + FILTER_COLUMNS))
+        attributes = stored_attributes(read)
+        items = []
+        for bucket in buckets_for_range(f.start_date, f.end_date):
+            for page in iter_bucket_pages(self.table, bucket, start_ms, end_ms, attributes):
+                items.extend(page)
+                while len(items) >= chunk_size:
+                    chunk, items = items[:chunk_size], items[chunk_size:]
+                    yield self._chunk(chunk, f, read, columns)
+        if items:
+            yield self._chunk(items, f, read, columns)
+
+    def _chunk(self, items, event_filter, read, columns):
+        df = apply_schema(rehydrate(pd.DataFrame(items), read), WRITE_SCHEMA)
+        return df.loc[filter_mask(df, event_filter), columns]
+
+    def events(self, event_filter, columns=None, newest=None):
+        columns = None if columns is None else select_columns(columns)
+        df = self._select(event_filter)
+        if newest is not None:
+            df = df.sort_values("time_epoch", ascending=False).head(newest)
+        return df if columns is None else df[columns]
+
+    def regions(self, event_filter):
+        df = self._select(event_filter)
+        return df[["continent", "country"]].dropna().drop_duplicates().reset_index(drop=True)
+
+    def magnitude_range(self, event_filter):
+        magnitude = self._select(event_filter, magnitude=False)["magnitude"].dropna()
+        if magnitude.empty:
+            return None
+        return float(magnitude.min()), float(magnitude.max())
+
+    def kpis(self, event_filter):
+        return kpi_summary(self._select(event_filter))
+
+    def max_event(self, event_filter):
+        return max_event(self._select(event_filter))
+
+    def hotspots(self, event_filter):
+        return hotspot_counts(self._select(event_filter))
+
+    def alert_counts(self, event_filter):
+        return alert_counts(self._select(event_filter))
+
+    def monthly_trend(self, event_filter):
+        start_date, end_date = trend_window(event_filter.end_date)
+        df = self._select(replace(event_filter, start_date=start_date, end_date=end_date))
+        stacked = (with_date_parts(df, "year", "month").assign(mag_class=df["magnitude"].apply(classify_mag))
+                   .groupby(["year", "month", "mag_class"])["id"].count().reset_index())
+        return trend_tables(stacked)
+
+
+# Events stored in an embedded DuckDB database. The table is keyed by id, so
+# saving the same events again replaces them, and has an index on time_epoch
+# for the date ranges every query starts from. Named state goes to a
+# versioned table of its own.
+class DuckDBBackend:
+    def __init__(self, path=DUCKDB_PATH, read_only=False):
+        import duckdb
+        self.connection = duckdb.connect(path, read_only=read_only)
+        if not read_only:
+            self.create_table()
+
+    def create_table(self):
+        columns = ["id VARCHAR PRIMARY KEY"]
+        columns += [f"{column} {SQL_TYPES[dtype]}" for column, dtype in WRITE_SCHEMA.items()]
+        columns += [f"{column} VARCHAR" for column in TEXT_COLUMNS]
+        self.connection.execute(f"CREATE TABLE IF NOT EXISTS events ({', '.join(columns)})")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS events_time_epoch ON events (time_epoch)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS state (name VARCHAR PRIMARY KEY, value VARCHAR)")
+        # databases written before states were versioned
+        self.connection.execute("ALTER TABLE state ADD COLUMN IF NOT EXISTS version BIGINT DEFAULT 0")
+
+    # Upserts the events of a pipeline frame (typed, or converted for DynamoDB)
+    def save(self, df):
+        batch = apply_schema(df.reindex(columns=STORE_COLUMNS), WRITE_SCHEMA).drop_duplicates("id", keep="last")
+        self.connection.register("batch", batch)
+        try:
+            self.connection.execute("INSERT OR REPLACE INTO events BY NAME SELECT * FROM batch")
+        finally:
+            self.connection.unregister("batch")
+
+    def load_state(self, name):
+        import duckdb
+        try:
+            row = self.connection.execute("SELECT value, version FROM state WHERE name = ?", [name]).fetchone()
+        except (duckdb.CatalogException, duckdb.BinderException):
+            # read-only connection to a database written before the state
+            # table (or its version column) existed
+            return None, 0
+        return (None, 0) if row is None else (json.loads(row[0]), row[1] or 0)
+
+    def save_state(self, name, state, version):
+        value = json.dumps(state)
+        if self.connection.execute("UPDATE state SET value = ?, version = ? WHERE name = ? AND version = ? "
+                                   "RETURNING name", [value, version + 1, name, version]).fetchall():
+            return True
+        if version != 0:
+            return False
+        return bool(self.connection.execute("INSERT INTO state (name, value, version) VALUES (?, ?, 1) "
+                                            "ON CONFLICT DO NOTHING RETURNING name", [name, value]).fetchall())
+
+    def latest_time_epoch(self, year, month):
+        start = datetime.date(year, month, 1)
+        end = start + relativedelta(months=1)
+        return self._scalar("SELECT max(time_epoch) FROM events WHERE updated_time_epoch >= ? AND updated_time_epoch < ?",
+                            [date_to_epoch_ms(start), date_to_epoch_ms(end)])
+
+    # WHERE clause and parameters of a filter
+    def _where(self, event_filter, magnitude=True):
+        f = event_filter
+        clauses = ["time_epoch >= ?", "time_epoch < ?"]
+        params = [date_to_epoch_ms(f.start_date), date_to_epoch_ms(f.end_date)]
+        if f.continent != "All":
+            clauses.append("continent = ?")
+            params.append(f.continent)
+        if f.country != "All":
+            clauses.append("country = ?")
+            params.append(f.country)
+        if magnitude and f.min_mag is not None:
+            clauses.append("magnitude >= ?")
+            params.append(f.min_mag)
+        if magnitude and f.max_mag is not None:
+            clauses.append("magnitude <= ?")
+            params.append(f.max_mag)
+        if f.tsunami_only:
+            clauses.append("tsunami_warning <> 0")
+        return " AND ".join(clauses), params
+
+    def _query(self, sql, params):
+        return self.connection.execute(sql, params).fetchdf()
+
+    def _scalar(self, sql, params):
+        return self.connection.execute(sql, params).fetchone()[0]
+
+    def events(self, event_filter, columns=None, newest=None):
+        where, params = self._where(event_filter)
+        sql = f"SELECT {sql_columns(columns)} FROM events WHERE {where}"
+        if newest is not None:
+            sql += f" ORDER BY time_epoch DESC LIMIT {int(newest)}"
+        return apply_schema(self._query(sql, params))
+
+    def iter_events(self, event_filter, columns=None, chunk_size=CHUNK_SIZE):
+        where, params = self._where(event_filter)
+        select = sql_columns(columns)
+        # a cursor of its own, so a download running in another thread does
+        # not share the connection with the dashboard queries
+        cursor = self.connection.cursor()
+        try:
+            # no ORDER BY: sorting would materialize the whole selection
+            reader = cursor.execute(f"SELECT {select} FROM events WHERE {where}",
+                                    params).fetch_record_batch(chunk_size)
+            for batch in reader:
+                yield apply_schema(batch.to_pandas(), WRITE_SCHEMA)
+        finally:
+            cursor.close()
+
+    def regions(self, event_filter):
+        where, params = self._where(event_filter)
+        return apply_schema(self._query(
+            f"SELECT DISTINCT continent, country FROM events WHERE {where} "
+            "AND continent IS NOT NULL AND country IS NOT NULL", params))
+
+    def magnitude_range(self, event_filter):
+        where, params = self._where(event_filter, magnitude=False)
+        low, high = self.connection.execute(
+            f"SELECT min(magnitude), max(magnitude) FROM events WHERE {where}", params).fetchone()
+        if low is None:
+            return None
+        return low, high
+
+    def kpis(self, event_filter):
+        where, params = self._where(event_filter)
+        total, depth, felt, tsunami = self.connection.execute(
+            "SELECT count(DISTINCT id), avg(depth_km), avg(felt_reports), coalesce(sum(tsunami_warning), 0) "
+            f"FROM events WHERE {where}", params).fetchone()
+        return {
+            "total": int(total),
+            "avg_depth": float("nan") if depth is None else depth,
+            "avg_felt": float("nan") if felt is None else felt,
+            "tsunami_warnings": int(tsunami),
+        }
+
+    def max_event(self, event_filter):
+        where, params = self._where(event_filter)
+        df = apply_schema(self._query(
+            f"SELECT magnitude, country, felt_reports, depth_km, time_epoch FROM events WHERE {where} "
+            "AND magnitude IS NOT NULL ORDER BY magnitude DESC, time_epoch LIMIT 1", params))
+        return None if df.empty else df.iloc[0]
+
+    def hotspots(self, event_filter):
+        where, params = self._where(event_filter)
+        df = apply_schema(self._query(
+            'SELECT country, continent, count(DISTINCT id) AS "Earthquake Count" '
+            f"FROM events WHERE {where} AND country IS NOT NULL AND continent IS NOT NULL "
+            'GROUP BY country, continent ORDER BY "Earthquake Count" DESC, country LIMIT 10', params))
+        return df.set_index("country")
+
+    def alert_counts(self, event_filter):
+        where, params = self._where(event_filter)
+        return self._query(
+            f"SELECT alert_level, count(*) AS count FROM events WHERE {where} AND alert_level IS NOT NULL "
+            "GROUP BY alert_level ORDER BY count DESC, alert_level", params)
+
+    def monthly_trend(self, event_filter):
+        start_date, end_date = trend_window(event_filter.end_date)
+        where, params = self._where(replace(event_filter, start_date=start_date, end_date=end_date))
+        stacked = self._query(
+            "SELECT year(epoch_ms(time_epoch)) AS year, month(epoch_ms(time_epoch)) AS month, "
+            "CASE WHEN magnitude >= 7 THEN '7+' WHEN magnitude >= 6 THEN '6~6.9' ELSE '<6' END AS mag_class, "
+            f"count(*) AS id FROM events WHERE {where} GROUP BY ALL ORDER BY year, month", params)
+        return trend_tables(stacked)
+
+
+# Backend selected by EARTHQUAKE_STORAGE
+def get_backend(read_only=False):
+    kind = os.environ.get("EARTHQUAKE_STORAGE", "dynamodb")
+    if kind == "dynamodb":
+        return DynamoDBBackend()
+    if kind == "duckdb":
+        return DuckDBBackend(os.environ.get("EARTHQUAKE_DUCKDB_PATH", DUCKDB_PATH), read_only=read_only)
+    if kind == "service":
+        from query_service import SERVICE_URL, ServiceBackend
+        return ServiceBackend(os.environ.get("EARTHQUAKE_SERVICE_URL", SERVICE_URL))
+    raise ValueError(f"Unknown EARTHQUAKE_STORAGE: {kind}")
+
+
+if __name__ == "__main__":
+    import lambda_function
+    from synthetic_usgs import generate_payload
+
+    parser = argparse.ArgumentParser(description="Fill a local DuckDB database with synthetic events")
+    parser.add_argument("--create-state-table", action="store_true",
+                        help=f"create the DynamoDB {STATE_TABLE_NAME} table instead and exit")
+    parser.add_argument("--synthetic", type=int, default=100000, metavar="EVENTS")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=100000, help="events generated and saved at once")
+    parser.add_argument("--path", default=os.environ.get("EARTHQUAKE_DUCKDB_PATH", DUCKDB_PATH))
+    args = parser.parse_args()
+
+    if args.create_state_table:
+        print("Created" if create_state_table() else "Already exists:", STATE_TABLE_NAME)
+        raise SystemExit(0)
+    backend = DuckDBBackend(args.path)
+    for offset in range(0, args.synthetic, args.batch_size):
+        n_events = min(args.batch_size, args.synthetic - offset)
+        payload = generate_payload(n_events, seed=args.seed + offset, id_offset=offset)
+        df = lambda_function.data_processing_transformation(lambda_function.clean_data(payload))
+        backend.save(df)
+    total = backend.connection.execute("SELECT count(*) FROM events").fetchone()[0]
+    print(f"Stored {args.synthetic} events in {args.path} ({total} in total)")
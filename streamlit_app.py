@@ -3,10 +3,17 @@ import streamlit as st
 import pandas as pd 
 import altair as alt
 import datetime
+import math
 from dateutil.relativedelta import relativedelta
 import plotly.express as px
 import plotly.graph_objects as go
-import boto3
+from dataclasses import replace
+from dashboard_data import dashboard_window, trend_window
+from event_schema import with_date_parts, epoch_to_datetime, date_to_epoch_ms
+from storage import EventFilter, get_backend
+from scatter_figures import magnitude_depth_figure, recent_events_figure
+from export import FORMATS, MAX_DOWNLOAD_EVENTS, export_file
+from gutenberg_richter import GutenbergRichterCache, magnitude_frequency, rolling_windows
 
 App_title="🌍Earthquake"
 
@@ -19,10 +26,10 @@ def time_input():
     end_date=end_dates+datetime.timedelta(days=1)##add one day in order to filter 
     return start_date,end_date
 ##region filter
-def region(df):
+def region(df,sidebar=st.sidebar):##df holds the (continent, country) pairs of the loaded dates
     continent_list = sorted(list(df['continent'].dropna().unique()))## get the list of all the continents of source data
     continent_list.insert(0, "All") ## all an option as all
-    continent = st.sidebar.selectbox('Continent', continent_list)
+    continent = sidebar.selectbox('Continent', continent_list)
 
     if continent == "All":## After the continent is selected, the country filter will only show the countries that in the selected continents
         country_list = sorted(list(df['country'].dropna().unique()))
@@ -30,50 +37,33 @@ def region(df):
         country_list = sorted(list(df[df['continent'] == continent]['country'].dropna().unique()))
 
     country_list.insert(0, "All") 
-    country = st.sidebar.selectbox('Country', country_list)
+    country = sidebar.selectbox('Country', country_list)
 
     return continent, country 
 
 ##magnitude_filter
-def magnitude_filter(df,start_date,end_date,continent,country):
-    df=df[(df['date']>= start_date)&(df['date']<end_date)]
-    if continent != "All":##if the continent and country are selected the slider will only include the range of selected region.
-        df= df[df['continent'] == continent]
-
-    if country != "All":
-        df= df[df['country'] == country]
+def magnitude_filter(magnitude_range):##if the continent and country are selected the slider will only include the range of selected region.
+    ##magnitudes are float32, so the bounds are widened to the 0.1 grid of the slider
+    lowest=math.floor(float(magnitude_range[0])*10)/10
+    highest=math.ceil(float(magnitude_range[1])*10)/10
     min_mag, max_mag = st.sidebar.slider(
     "Magnitude Range",
-    min_value=df['magnitude'].min(),
-    max_value=df['magnitude'].max(),
-    value=(df['magnitude'].min(), df['magnitude'].max()),
+    min_value=lowest,
+    max_value=highest,
+    value=(lowest, highest),
     step=0.1
 )   
     return min_mag, max_mag
 
-def tsunami_warning_filter(df):
-    if (df["tsunami_warning"] != 0).any():##if the selected date and region has no tsunami warning data, which no record shows tsunami_warning=1. Then this filter will not be shown
+def tsunami_warning_filter(selection,kpis):
+    if kpis['tsunami_warnings']>0:##if the selected date and region has no tsunami warning data, which no record shows tsunami_warning=1. Then this filter will not be shown
         use_mag_filter = st.sidebar.toggle("Tsunami_warning")
         if use_mag_filter:
-            df=df[df['tsunami_warning']!=0]
-        else:
-            df = df
-    else:
-        df=df
-    return df
-
-##Apply the filters 
-def filter_data(df,continent,country,start_date,end_date,min_mag,max_mag):
-    df_filtered=df[(df['date']>= start_date)&(df['date']<end_date)&(df['magnitude']>=min_mag)&(df['magnitude']<=max_mag)]
-    if continent != "All":
-        df_filtered = df_filtered[df_filtered['continent'] == continent]
-    if country != "All":
-        df_filtered = df_filtered[df_filtered['country'] == country]
-    return df_filtered
+            selection=replace(selection,tsunami_only=True)
+    return selection
 
 
-def pie_charts(df):
-    df_alert = df[df['alert_level'].notna()]
+def pie_charts(df_alert):##event counts per alert level
     color_map = {
     'green': '#B3FFA4',
     'yellow': '#FFECA1',
@@ -84,6 +74,7 @@ def pie_charts(df):
     fig = px.pie(
         df_alert,
         names='alert_level',
+        values='count',
         title='Alert Level',
         color='alert_level',
         hole=0.3,
@@ -95,51 +86,12 @@ def pie_charts(df):
 
 def scatter_plots(df):
 
-    fig = px.scatter(
-        df,
-        x='magnitude',
-        y='depth_km',
-        color='magnitude', 
-        color_continuous_scale='RdYlBu_r',
-        color_discrete_map={'red': 'red', 'orange': 'orange', 'blue': 'blue'},
-        hover_data=['location', 'time_readable'],
-        labels={'depth_km': 'Depth (km)', 'magnitude': 'Magnitude'},
-        title='Magnitude vs. Depth'
-    )
-
-    fig.update_traces(marker=dict(size=10 ))
-    fig.update_layout(showlegend=False)
+    fig = magnitude_depth_figure(df)##WebGL and downsampled for large selections
 
     st.plotly_chart(fig, use_container_width=True)
 
 
-def plot_monthly_trend(df,end_date,continent,country,min_mag,max_mag):
-    end_date=(end_date+relativedelta(months=1)).replace(day=1)##no matter what date you choose, the filter will select the whole month of the date.
-    year_before=(end_date-relativedelta(years=1)).replace(day=1)
-
-    def classify_mag(m):###classifing the magnitude
-        if m >= 7:
-            return '7+'
-        elif m >= 6:
-            return '6~6.9'
-        else:
-            return '<6'
-
-    df['mag_class'] = df['magnitude'].apply(classify_mag)
-    df=df[(df['date']>=year_before)&(df['date']<end_date)]
-    if continent != "All":
-        df = df[df['continent'] == continent]
-    if country != "All":
-        df = df[(df['country'] == country)]
-    df=df[(df['magnitude']>=min_mag)&(df['magnitude']<=max_mag)]
-    ##line plot
-    totals_line=df.groupby(['year','month'])['id'].nunique().reset_index()
-    totals_line['year_month'] = totals_line['year'].astype(str) + "-" + totals_line['month'].astype(str).str.zfill(2)+'-01'
-
-    ##stack barchart
-    stacked = df.groupby(['year','month', 'mag_class'])['id'].count().reset_index()
-    stacked['year_month'] =  stacked ['year'].astype(str) + "-" +  stacked ['month'].astype(str).str.zfill(2)+'-01'
-    pivot = stacked.pivot(index='year_month', columns='mag_class', values='id').fillna(0)
+def plot_monthly_trend(totals_line, pivot):
 
     colors = {
     '<6': '#abd2df',     
@@ -197,80 +149,138 @@ def display_map_and_table(df):
     st.plotly_chart(fig, use_container_width=True)
 
 ##numebr of earthquake by countries
-def country_rank(df):
-    country_table = (
-    df.groupby(["country",'continent'])["id"]
-    .nunique()
-    .reset_index(name="Earthquake Count")
-    .sort_values(by="Earthquake Count", ascending=False).set_index('country')
-    .head(10)
-)
+def country_rank(country_table):
     st.subheader('Earthquake Hotspots')
     st.dataframe(country_table)
 
-def recent_7days(df,continent,country,end_date,min_mag,max_mag):
-    start_date=end_date-datetime.timedelta(days=7) ## select 7 days before the end_date
-    df_f=df[(df['date']>= start_date)&(df['date']<end_date)&(df['magnitude']>=min_mag)&(df['magnitude']<=max_mag)]
-    if continent != "All":
-        df_f = df_f[df_f['continent'] == continent]
-
-    if country != "All":
-        df_f= df_f[df_f['country'] == country]
-    fig = px.scatter(
-        df_f,
-        x='date',
-        y='magnitude',
-        color='magnitude', 
-        color_continuous_scale='RdYlBu_r',
-        color_discrete_map={'red': 'red', 'orange': 'orange', 'blue': 'blue'},
-        hover_data=['location', 'time_readable'],
-        labels={'depth_km': 'Depth (km)', 'magnitude': 'Magnitude'},
-        title='Recent 7 days'
-    )
+def recent_7days(backend,selection):
+    start_date=selection.end_date-datetime.timedelta(days=7) ## select 7 days before the end_date
+    df_f=backend.events(replace(selection,start_date=start_date),['magnitude','location','time_epoch'])
+    fig = recent_events_figure(df_f)
+
+    st.plotly_chart(fig, use_container_width=True)
 
-    fig.update_traces(marker=dict(size=10 ))
-    fig.update_layout(showlegend=False)
 
+##Gutenberg-Richter fits are kept across reruns and sessions, and refitted only for regions with new events
+@st.cache_resource
+def gutenberg_richter_cache():
+    return GutenbergRichterCache()
+
+##frequency-magnitude distribution of the selection with its Mc and fitted b-value
+def magnitude_frequency_plot(magnitude,fit):
+    fmd=magnitude_frequency(magnitude)
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=fmd['magnitude'],y=fmd['count'],name='Events per 0.1 bin',marker_color='#abd2df'))
+    fig.add_trace(go.Scatter(x=fmd['magnitude'],y=fmd['cumulative'],mode='markers',name='Events ≥ M',
+                             marker=dict(color='black',size=5)))
+    title='Magnitude-Frequency'
+    if not math.isnan(fit['b']):
+        ##log10 N(≥M) = a - b*M through the events above Mc
+        above=fmd[fmd['magnitude']>=fit['mc']-1e-6]
+        fig.add_trace(go.Scatter(x=above['magnitude'],
+                                 y=fit['events_above_mc']*10**(-fit['b']*(above['magnitude']-fit['mc'])),
+                                 mode='lines',name='Fit',line=dict(color='#b13c54',width=2)))
+        fig.add_vline(x=fit['mc'],line_dash='dash',line_color='gray')
+        title=f"Magnitude-Frequency (Mc {fit['mc']:.1f}±{fit['mc_std']:.1f}, b {fit['b']:.2f}±{fit['b_std']:.2f})"
+    fig.update_layout(title=title,yaxis_type='log',xaxis_title='Magnitude',yaxis_title='Earthquake Count',
+                      legend=dict(orientation='h'))
     st.plotly_chart(fig, use_container_width=True)
 
+##b-value over 90-day windows every 30 days of the recent 12 months
+def rolling_b_value_plot(rolling):
+    rolling=rolling.assign(date=pd.to_datetime(rolling['window_end'],unit='ms'))
+    fig = go.Figure(go.Scatter(
+        x=rolling['date'],
+        y=rolling['b'],
+        error_y=dict(type='data',array=rolling['b_std']),
+        mode='lines+markers',
+        line=dict(color='black', width=2)
+    ))
+    fig.update_layout(title='b-value (90-day windows)',xaxis_title='Window end',yaxis_title='b-value')
+    st.plotly_chart(fig, use_container_width=True)
 
-def main():
+def gutenberg_richter_panel(backend,selection):
+    start_date,end_date=trend_window(selection.end_date)
+    start_date=min(start_date,selection.start_date)
+    ##every magnitude is needed for the completeness magnitude, so the magnitude and tsunami filters are left out
+    df=backend.events(replace(selection,start_date=start_date,min_mag=None,max_mag=None,tsunami_only=False),
+                      ['magnitude','time_epoch','updated_time_epoch','latitude','longitude','country'])
+    if df.empty:
+        return
+    cache=gutenberg_richter_cache()
+    scope=(selection.continent,selection.country)
+    selected=(date_to_epoch_ms(selection.start_date),date_to_epoch_ms(selection.end_date))
+    overall=cache.get(df,[selected],by='all',scope=scope)
+    rolling=cache.get(df,rolling_windows(date_to_epoch_ms(start_date),date_to_epoch_ms(end_date),90,30),
+                      by='all',scope=scope)
+    cells=cache.get(df,[selected],by='cell',scope=scope)
 
-    st.set_page_config(App_title,page_icon='🌍',layout="wide")
-    st.title("🌍Earthquake")
     left_side, mid_side,right_side= st.columns([1.5,2,1])
+    with left_side:
+        in_selection=(df['time_epoch']>=selected[0])&(df['time_epoch']<selected[1])
+        if not overall.empty:
+            magnitude_frequency_plot(df.loc[in_selection,'magnitude'],overall.iloc[0])
+    with mid_side:
+        rolling_b_value_plot(rolling)
+    with right_side:
+        st.subheader('b-value by 2° cell')
+        top=cells.dropna(subset=['b']).nlargest(10,'events_above_mc')
+        st.dataframe(top[['region','events','mc','b','b_std']].round(2).set_index('region'))
+
+
+##full extract of the selection, streamed to a file when the button is clicked;
+##selections over MAX_DOWNLOAD_EVENTS go through export.py instead
+def export_selection(backend,selection):
+    format_col,button_col=st.columns([1,5])
+    export_format=format_col.selectbox('Export format',list(FORMATS),label_visibility='collapsed')
+    if backend.kpis(selection)['total']>MAX_DOWNLOAD_EVENTS:
+        button_col.info(f'The selection has more than {MAX_DOWNLOAD_EVENTS:,} events; '
+                        f'export it with `python export.py --format {export_format}`.')
+        return
+    button_col.download_button(
+        'Export all selected events',
+        data=lambda: export_file(backend,selection,export_format),
+        file_name='earthquakes'+FORMATS[export_format],
+        on_click='ignore'
+    )
 
-    dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
-    table = dynamodb.Table("earthquakes")
-
-    response = table.scan()
-    items = response['Items']
 
-    while 'LastEvaluatedKey' in response:
-        lastEvaluatedKey = response['LastEvaluatedKey']
-        response = table.scan(
-        ExclusiveStartKey=lastEvaluatedKey) 
-        items.extend(response['Items'])
+def main():
 
-    df = pd.DataFrame(items)
-    print(df.shape[0])
+    st.set_page_config(App_title,page_icon='🌍',layout="wide")
+    st.title("🌍Earthquake")
+    left_side, mid_side,right_side= st.columns([1.5,2,1])
 
-    df['date']=pd.to_datetime(df['date']).dt.date
-    float_columns = ['rms_amplitude', 'magnitude', 'mmi_intensity', 'latitude', 'longitude', 'azimuthal_gap', 'depth_km', 'felt_reports']
-    df[float_columns] = df[float_columns].astype(float)
+    backend = get_backend(read_only=True)##the panels get filtered and aggregated results from the storage backend
 
     ##filters
-    continent,country=region(df)
+    region_filters=st.sidebar.container()##region filters stay on top, but their options come from the loaded dates
     start_date,end_date=time_input()
-    min_mag,max_mag=magnitude_filter(df,start_date,end_date,continent,country)
+    window=EventFilter(*dashboard_window(start_date,end_date))##only the months needed by the panels are read
+    regions=backend.regions(window)
+    if regions.empty:
+        st.info("No data available for the selected dates.")
+        return
 
-    filtered_df=filter_data(df,continent,country,start_date,end_date,min_mag,max_mag)
+    continent,country=region(regions,region_filters)
+    selection=EventFilter(start_date,end_date,continent,country)
+    magnitude_range=backend.magnitude_range(selection)
+    if magnitude_range is None:
+        st.info("No data available for the selected filters.")
+        return
+    min_mag,max_mag=magnitude_filter(magnitude_range)
+    selection=replace(selection,min_mag=min_mag,max_mag=max_mag)
 
-    
-    if filtered_df.empty:
+    kpis=backend.kpis(selection)
+    if kpis['total']==0:
         st.info("No data available for the selected filters.")
         return
-    filtered_df=tsunami_warning_filter(filtered_df)
+    filtered=tsunami_warning_filter(selection,kpis)
+    if filtered!=selection:
+        kpis=backend.kpis(filtered)
+    filtered_df=backend.events(filtered,['magnitude','location','time_epoch','latitude','longitude','depth_km',
+                                         'country','continent','alert_level'])
+    filtered_df=with_date_parts(filtered_df,'time_readable')##only derived for the rows that are displayed
 
     ##Layout
     with st.container():
@@ -278,9 +288,9 @@ def main():
             col1, col2,col3,col4= st.columns(4)
             with col1:  
                 ##max magnitude kpi
-                row_index = filtered_df[filtered_df['magnitude'] == filtered_df['magnitude'].max()].iloc[0]
+                row_index = backend.max_event(filtered)
                 max_country = row_index['country']
-                max_mag = filtered_df['magnitude'].max()
+                max_mag = row_index['magnitude']
                 if max_mag >= 7: ## if the mangitude is above 7, the card will be red 
                     bg_color = "#ffcccc"  # red 
                 elif max_mag >= 6:## if the mangitude is below 7 and above 6, the card will be orange 
@@ -293,7 +303,7 @@ def main():
                     Max Magnitude
                 </div>
                 <div style="font-size:20px; ">
-                    {max_country}: {filtered_df['magnitude'].max()}
+                    {max_country}: {max_mag}
                 </div>
                 <div style="font-size:20px; ">
                 FeltReports:{ row_index['felt_reports']}
@@ -302,7 +312,7 @@ def main():
                     Depth(KM): {row_index['depth_km']}
                 </div>
                 <div style="font-size:20px; ">
-                    { row_index['time_readable']}
+                    { epoch_to_datetime(row_index['time_epoch'])}
                 </div>
                 </div>
                 """, unsafe_allow_html=True)
@@ -317,7 +327,7 @@ def main():
                     Total Earthquakes
                 </div>
                 <div style="font-size:20px; ">
-                    {filtered_df['id'].nunique()}
+                    {kpis['total']}
                 </div>
                 </div>
                 """, unsafe_allow_html=True)
@@ -329,7 +339,7 @@ def main():
                     Average Depth
                 </div>
                 <div style="font-size:20px; ">
-                    {round(filtered_df['depth_km'].mean(),2)}
+                    {round(kpis['avg_depth'],2)}
                 </div>
                 </div>
                 """, unsafe_allow_html=True)
@@ -344,7 +354,7 @@ def main():
                     Average FeltReports
                 </div>
                 <div style="font-size:20px; ">
-                    {round(filtered_df['felt_reports'].mean(),2)}
+                    {round(kpis['avg_felt'],2)}
                 </div>
                 </div>
                 """, unsafe_allow_html=True)
@@ -355,14 +365,14 @@ def main():
                     Tsunami Warnings
                 </div>
                 <div style="font-size:20px; ">
-                    {round(filtered_df['tsunami_warning'].sum(),2)}
+                    {kpis['tsunami_warnings']}
                 </div>
                 </div>
                 """, unsafe_allow_html=True)
 
             with col4:
             ##history record
-                row_history_index = df[df['magnitude'] == df['magnitude'].max()].iloc[0]
+                row_history_index = backend.max_event(window)
                 his_max_country = row_history_index['country']
                 st.markdown(f"""
                 <div style="background-color:#f0f2f6;padding:5px;border-radius:10px;text-align:center">
@@ -370,7 +380,7 @@ def main():
                 History Max Magnitude
                 </div>
                 <div style="font-size:20px; ">
-                    {his_max_country}: {df['magnitude'].max()}
+                    {his_max_country}: {row_history_index['magnitude']}
                 </div>
                 <div style="font-size:20px; ">
                 FeltReports:{ row_history_index ['felt_reports']}
@@ -379,31 +389,35 @@ def main():
                     Depth(KM): {row_history_index ['depth_km']}
                 </div>
                 <div style="font-size:20px; ">
-                    { row_history_index ['time_readable']}
+                    { epoch_to_datetime(row_history_index ['time_epoch'])}
                 </div>
                 </div>
                 """, unsafe_allow_html=True)
-            recent_7days(df,continent,country,end_date,min_mag,max_mag)
+            recent_7days(backend,selection)
     
 
     with mid_side:
         display_map_and_table(filtered_df)
 
     with right_side:
-        pie_charts(filtered_df)
+        pie_charts(backend.alert_counts(filtered))
      ##map
     with st.container():
         left_side, mid_side,right_side= st.columns([1.5,2,1])
         with mid_side:
-            plot_monthly_trend(df,end_date,continent,country,min_mag,max_mag)
+            plot_monthly_trend(*backend.monthly_trend(selection))
         with right_side:
-            country_rank(filtered_df)
+            country_rank(backend.hotspots(filtered))
         with left_side:
             scatter_plots(filtered_df)
+    st.subheader('Completeness and b-value')
+    gutenberg_richter_panel(backend,selection)
     st.subheader('Detailed info')
-    st.dataframe(filtered_df[['magnitude','location','time_readable',
+    latest_df=with_date_parts(backend.events(filtered,['magnitude','location','time_epoch',
     'depth_km','country',
-    'continent','alert_level','tsunami_warning','detail_url']].sort_values('time_readable',ascending=False).set_index("time_readable").head(50),use_container_width=True)
+    'continent','alert_level','tsunami_warning','detail_url'],newest=50),'time_readable')
+    st.dataframe(latest_df.drop(columns='time_epoch').set_index("time_readable"),use_container_width=True)
+    export_selection(backend,filtered)
 
 
 if __name__ == "__main__":
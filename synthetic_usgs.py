@@ -0,0 +1,222 @@
+import argparse
+import json
+import numpy as np
+from datetime import datetime, timezone
+
+# Synthetic data is anchored to a fixed year so that runs are reproducible
+SYNTHETIC_START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+SYNTHETIC_END = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+# (place suffix, center latitude, center longitude, spread in degrees, weight)
+# The suffix mix mirrors what the USGS feed returns: US states (abbreviated and
+# spelled out), plain country names, names that pycountry spells differently
+# and Flinn-Engdahl style region names without a comma.
+PLACE_REGIONS = [
+    (", CA", 36.5, -119.5, 2.0, 18),
+    (", Alaska", 61.0, -150.0, 4.0, 14),
+    (", Hawaii", 19.4, -155.3, 0.4, 6),
+    (", NV", 38.5, -117.5, 1.5, 4),
+    (", Puerto Rico", 18.0, -66.8, 0.5, 3),
+    (", Japan", 37.0, 141.5, 3.0, 6),
+    (", Indonesia", -3.0, 122.0, 6.0, 6),
+    (", Chile", -30.0, -71.5, 6.0, 4),
+    (", Peru", -12.0, -76.0, 4.0, 2),
+    (", Mexico", 17.0, -99.0, 3.0, 3),
+    (", Philippines", 10.0, 125.0, 4.0, 3),
+    (", Tonga", -20.0, -174.5, 2.0, 2),
+    (", Papua New Guinea", -5.5, 151.0, 3.0, 2),
+    (", Greece", 38.5, 23.0, 2.0, 1),
+    (", Italy", 42.5, 13.0, 2.0, 1),
+    (", New Zealand", -41.0, 174.5, 3.0, 1),
+    (", Turkey", 38.5, 37.0, 3.0, 1),
+    (", Russia", 53.0, 159.0, 3.0, 1),
+    (", Iran", 31.0, 54.0, 4.0, 1),
+    (", Taiwan", 23.8, 121.3, 1.0, 1),
+    (", Vanuatu", -16.0, 168.0, 2.0, 1),
+    ("Fiji Islands", -17.8, 178.0, 1.5, 1),
+    ("south of the Fiji Islands", -24.0, 179.5, 2.0, 1),
+    ("Fiji region", -18.5, -178.5, 2.0, 1),
+    ("Japan region", 30.0, 140.0, 3.0, 1),
+    ("Kermadec Islands region", -30.0, -177.5, 2.0, 1),
+    ("Kuril Islands", 46.0, 151.5, 2.0, 1),
+    ("Banda Sea", -6.5, 127.5, 2.0, 1),
+    ("Mid-Atlantic Ridge", 10.0, -40.0, 12.0, 1),
+    ("central East Pacific Rise", -10.0, -110.0, 8.0, 1),
+    ("Alaska Peninsula", 56.5, -157.0, 2.0, 1),
+]
+
+TOWNS = ["Ridgecrest", "Anza", "Petrolia", "Pahala", "Volcano", "Hachinohe",
+         "Sola", "Ovalle", "Lata", "Kokopo", "Neiafu", "Tirana", "Ocotillo",
+         "Cantwell", "Talkeetna", "Tres Pinos", "Mammoth Lakes", "Guanica"]
+DIRECTIONS = ["N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE",
+              "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW"]
+NETWORKS = ["us", "ak", "ci", "nc", "hv", "nn", "pr", "uw"]
+MAG_TYPES = ["ml", "md", "mb", "mww", "mb_lg", "mwr", None]
+MAG_TYPE_WEIGHTS = [0.45, 0.25, 0.15, 0.06, 0.04, 0.04, 0.01]
+EVENT_TYPES = ["earthquake", "quarry blast", "explosion", "ice quake", "other event"]
+EVENT_TYPE_WEIGHTS = [0.95, 0.025, 0.01, 0.01, 0.005]
+ALERTS = ["green", "yellow", "orange", "red"]
+PRODUCT_TYPES = [
+    ",origin,phase-data,",
+    ",nearby-cities,origin,phase-data,scitech-link,",
+    ",dyfi,origin,phase-data,",
+    ",dyfi,losspager,moment-tensor,origin,phase-data,shakemap,",
+]
+
+# Pick a value from each weighted list for every event
+def weighted_choice(rng, values, weights, size):
+    weights = np.asarray(weights, dtype=float)
+    return rng.choice(len(values), size=size, p=weights / weights.sum())
+
+# Generates epoch (ms) times over the synthetic year, with part of the events
+# grouped into swarms that share a location and a narrow time window
+def generate_times_and_swarms(rng, n_events, swarm_fraction):
+    start_ms = int(SYNTHETIC_START.timestamp() * 1000)
+    end_ms = int(SYNTHETIC_END.timestamp() * 1000)
+    times = rng.integers(start_ms, end_ms, size=n_events)
+    swarm_id = np.full(n_events, -1)
+
+    n_swarm_events = int(n_events * swarm_fraction)
+    if n_swarm_events > 0:
+        n_swarms = max(1, n_swarm_events // 200)
+        members = rng.choice(n_events, size=n_swarm_events, replace=False)
+        swarm_id[members] = rng.integers(0, n_swarms, size=n_swarm_events)
+        swarm_start = rng.integers(start_ms, end_ms - 3 * 86400000, size=n_swarms)
+        # Most swarm events happen within the first day or two
+        offsets = rng.exponential(12 * 3600000, size=n_swarm_events).astype(np.int64)
+        times[members] = swarm_start[swarm_id[members]] + offsets
+    return times, swarm_id
+
+# Generates a USGS GeoJSON FeatureCollection with n_events features. Event
+# codes are numbered from id_offset, so batches generated with different
+# offsets do not share ids.
+def generate_payload(n_events, seed=0, swarm_fraction=0.1, id_offset=0):
+    rng = np.random.default_rng(seed)
+
+    weights = [region[4] for region in PLACE_REGIONS]
+    region_idx = weighted_choice(rng, PLACE_REGIONS, weights, n_events)
+    times, swarm_id = generate_times_and_swarms(rng, n_events, swarm_fraction)
+
+    centers = np.array([(r[1], r[2], r[3]) for r in PLACE_REGIONS])
+    lat = centers[region_idx, 0] + rng.normal(0, 1, n_events) * centers[region_idx, 2]
+    lon = centers[region_idx, 1] + rng.normal(0, 1, n_events) * centers[region_idx, 2]
+
+    # Swarm members collapse onto the location of the first member of the swarm
+    in_swarm = swarm_id >= 0
+    if in_swarm.any():
+        n_swarms = swarm_id.max() + 1
+        anchor = np.full(n_swarms, -1)
+        for i in np.flatnonzero(in_swarm):
+            if anchor[swarm_id[i]] < 0:
+                anchor[swarm_id[i]] = i
+        anchors = anchor[swarm_id[in_swarm]]
+        region_idx[in_swarm] = region_idx[anchors]
+        lat[in_swarm] = lat[anchors] + rng.normal(0, 0.05, in_swarm.sum())
+        lon[in_swarm] = lon[anchors] + rng.normal(0, 0.05, in_swarm.sum())
+
+    lat = np.clip(lat, -89.9, 89.9)
+    lon = (lon + 180.0) % 360.0 - 180.0
+
+    # Mostly shallow crustal events with a tail of intermediate and deep ones
+    depth = np.where(rng.random(n_events) < 0.85,
+                     rng.exponential(12.0, n_events),
+                     rng.uniform(70.0, 650.0, n_events))
+    # Gutenberg-Richter distributed magnitudes (b = 1) above a completeness of 1.0
+    mag = 1.0 + rng.exponential(np.log10(np.e), n_events)
+    updated = times + rng.integers(60000, 30 * 86400000, size=n_events)
+
+    mag_type_idx = weighted_choice(rng, MAG_TYPES, MAG_TYPE_WEIGHTS, n_events)
+    event_type_idx = weighted_choice(rng, EVENT_TYPES, EVENT_TYPE_WEIGHTS, n_events)
+    network_idx = rng.integers(0, len(NETWORKS), n_events)
+    town_idx = rng.integers(0, len(TOWNS), n_events)
+    direction_idx = rng.integers(0, len(DIRECTIONS), n_events)
+    distance = rng.integers(1, 150, n_events)
+    product_idx = np.minimum((mag - 1.0).astype(int), len(PRODUCT_TYPES) - 1)
+
+    # Null patterns: felt/cdi/mmi/alert are mostly missing except for larger events
+    has_felt = rng.random(n_events) < np.clip((mag - 2.0) / 4.0, 0.02, 0.9)
+    has_mmi = rng.random(n_events) < np.clip((mag - 3.5) / 3.0, 0.0, 0.95)
+    has_alert = has_mmi & (mag >= 4.5)
+    has_place = rng.random(n_events) > 0.005
+    has_nst = rng.random(n_events) > 0.3
+    reviewed = rng.random(n_events) < 0.7
+    ocean = lon < -170.0
+    tsunami = (mag >= 6.5) & (ocean | (rng.random(n_events) < 0.5))
+
+    features = []
+    for i in range(n_events):
+        network = NETWORKS[network_idx[i]]
+        code = f"{7000000 + id_offset + i:08d}"
+        event_id = network + code
+        m = round(float(mag[i]), 2)
+
+        suffix = PLACE_REGIONS[region_idx[i]][0]
+        if not has_place[i]:
+            place = None
+        elif suffix.startswith(","):
+            place = f"{distance[i]} km {DIRECTIONS[direction_idx[i]]} of {TOWNS[town_idx[i]]}{suffix}"
+        else:
+            place = suffix
+
+        alert = None
+        if has_alert[i]:
+            alert = ALERTS[min(int(m - 4.5), 3)]
+
+        properties = {
+            "mag": m,
+            "place": place,
+            "time": int(times[i]),
+            "updated": int(updated[i]),
+            "tz": None,
+            "url": f"https://earthquake.usgs.gov/earthquakes/eventpage/{event_id}",
+            "detail": f"https://earthquake.usgs.gov/fdsnws/event/1/query?eventid={event_id}&format=geojson",
+            "felt": int(rng.integers(1, 500)) if has_felt[i] else None,
+            "cdi": round(float(rng.uniform(1.0, 8.0)), 1) if has_felt[i] else None,
+            "mmi": round(float(rng.uniform(1.0, 9.0)), 3) if has_mmi[i] else None,
+            "alert": alert,
+            "status": "reviewed" if reviewed[i] else "automatic",
+            "tsunami": int(tsunami[i]),
+            "sig": int(min(m * 100, 3000)),
+            "net": network,
+            "code": code,
+            "ids": f",{event_id},",
+            "sources": f",{network},",
+            "types": PRODUCT_TYPES[product_idx[i]],
+            "nst": int(rng.integers(3, 200)) if has_nst[i] else None,
+            "dmin": round(float(rng.exponential(0.5)), 4),
+            "rms": round(float(rng.uniform(0.01, 1.5)), 2),
+            "gap": round(float(rng.uniform(10.0, 300.0)), 1),
+            "magType": MAG_TYPES[mag_type_idx[i]],
+            "type": EVENT_TYPES[event_type_idx[i]],
+            "title": f"M {m} - {place}",
+        }
+        features.append({
+            "type": "Feature",
+            "properties": properties,
+            "geometry": {
+                "type": "Point",
+                "coordinates": [round(float(lon[i]), 4), round(float(lat[i]), 4), round(float(depth[i]), 2)],
+            },
+            "id": event_id,
+        })
+
+    return {
+        "type": "FeatureCollection",
+        "metadata": {"generated": int(SYNTHETIC_END.timestamp() * 1000), "count": n_events},
+        "features": features,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic USGS GeoJSON payload")
+    parser.add_argument("n_events", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="-")
+    args = parser.parse_args()
+
+    payload = generate_payload(args.n_events, seed=args.seed)
+    if args.out == "-":
+        print(json.dumps(payload))
+    else:
+        with open(args.out, "w") as f:
+            json.dump(payload, f)
@@ -0,0 +1,18 @@
+from pandas.testing import assert_frame_equal
+
+import lambda_function
+from parallel_transform import parallel_transform
+from synthetic_usgs import generate_payload
+
+# The process-pool path against the in-process path of the same transform
+
+
+def test_pool_path_matches_in_process_path():
+    df = lambda_function.clean_data(generate_payload(2000, seed=0))
+    # a non-default index, which both paths keep
+    df.index = df.index + 100
+    transform = lambda_function.data_processing_transformation
+
+    in_process = parallel_transform(df.copy(), transform, workers=1)
+    pooled = parallel_transform(df.copy(), transform, workers=2, min_rows=0)
+    assert_frame_equal(pooled, in_process)
@@ -0,0 +1,183 @@
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+from botocore.exceptions import ClientError
+
+import write_behind
+from local_dynamodb import LocalTable
+from write_behind import INITIAL_RATE, RATE_DECREASE, WriteBehind
+
+# Write-behind log against the local table stand-in; write_capacity makes
+# the table throttle like a provisioned one (one second of burst)
+
+
+# Events of the layout process_data_for_dynamodb returns, newest first like
+# the USGS feed; time_epoch of event i is 1000 * (n - i)
+def events(n, version=1, start=0):
+    return pd.DataFrame({
+        "id": [f"ev{i}" for i in range(start, start + n)],
+        "time_epoch": [Decimal(1000 * (start + n - i)) for i in range(start, start + n)],
+        "magnitude": [Decimal("4.5") for _ in range(n)],
+        "version": [Decimal(version) for _ in range(n)],
+    })
+
+def spill(table, tmp_path, **kwargs):
+    return WriteBehind(table, profile="full", path=str(tmp_path / "spill.sqlite3"), **kwargs)
+
+
+def test_unprocessed_items_stay_in_log(tmp_path):
+    table = LocalTable(write_capacity=1)
+    buffer = spill(table, tmp_path)
+    buffer.append(events(5))
+
+    assert buffer.drain_batch()
+    # one WCU of burst: one item written, four returned unprocessed
+    assert len(table.items) == 1
+    assert table.unprocessed_items == 4
+    assert buffer.pending() == 4
+    assert buffer.written == 1
+    assert buffer.throttled == 1
+    assert buffer.bucket.rate == INITIAL_RATE * RATE_DECREASE
+
+
+def test_throttling_error_keeps_batch(tmp_path):
+    table = LocalTable(write_capacity=1)
+    buffer = spill(table, tmp_path)
+    buffer.append(events(5))
+    buffer.drain_batch()
+
+    # the burst is spent, so the whole request is rejected with a ClientError
+    assert buffer.drain_batch()
+    assert table.throttled_requests == 1
+    assert buffer.pending() == 4
+    assert buffer.written == 1
+    assert buffer.throttled == 2
+    assert buffer.bucket.rate == INITIAL_RATE * RATE_DECREASE ** 2
+
+
+def test_drains_oldest_event_first(tmp_path, monkeypatch):
+    monkeypatch.setattr(write_behind, "BATCH_ITEMS", 2)
+    table = LocalTable()
+    buffer = spill(table, tmp_path)
+    buffer.append(events(5))
+    assert buffer.oldest_pending() == 1000
+
+    buffer.drain_batch()
+    assert set(table.items) == {"ev3", "ev4"}
+    assert buffer.oldest_pending() == 3000
+    assert buffer.drain() == 0
+    assert buffer.oldest_pending() is None
+
+
+def test_close_stops_at_deadline(tmp_path):
+    table = LocalTable(write_capacity=1)
+    buffer = spill(table, tmp_path)
+    buffer.append(events(20))
+    buffer.start()
+
+    left = buffer.close(timeout=0.2)
+    assert buffer._thread is None
+    assert 0 < left == buffer.pending()
+    assert len(table.items) + left == 20
+
+
+def test_resumes_existing_log(tmp_path):
+    first = spill(LocalTable(write_capacity=1), tmp_path)
+    first.append(events(10))
+    first.drain_batch()
+    left = first.pending()
+    first.connection.close()
+
+    table = LocalTable()
+    second = spill(table, tmp_path)
+    assert second.pending() == left
+    assert second.drain() == 0
+    assert len(table.items) == left
+
+
+def test_resumes_log_without_time_column(tmp_path):
+    path = tmp_path / "spill.sqlite3"
+    buffer = spill(LocalTable(), tmp_path)
+    buffer.connection.executescript("DROP TABLE spill; CREATE TABLE spill "
+                                    "(seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT NOT NULL, item TEXT NOT NULL)")
+    buffer.connection.execute("INSERT INTO spill (id, item) VALUES (?, ?)",
+                              ("old", write_behind.encode_item({"id": "old", "time_epoch": Decimal(5)})))
+    buffer.connection.commit()
+    buffer.connection.close()
+
+    table = LocalTable()
+    resumed = WriteBehind(table, profile="full", path=str(path))
+    resumed.append(events(2))
+    assert resumed.drain() == 0
+    assert set(table.items) == {"old", "ev0", "ev1"}
+
+
+def test_append_replaces_waiting_version(tmp_path):
+    table = LocalTable()
+    buffer = spill(table, tmp_path)
+    buffer.append(events(3, version=1))
+    buffer.append(events(3, version=2))
+
+    assert buffer.pending() == 3
+    assert buffer.drain() == 0
+    assert {item["version"] for item in table.items.values()} == {Decimal(2)}
+
+
+def test_drain_batch_writes_last_version_once(tmp_path):
+    table = LocalTable()
+    buffer = spill(table, tmp_path)
+    # two versions of one event in the same request, as older logs hold them
+    with buffer.connection:
+        buffer.connection.executemany(
+            "INSERT INTO spill (id, item, time_epoch) VALUES (?, ?, ?)",
+            [("ev0", write_behind.encode_item(item), 1000)
+             for item in events(1, version=1).to_dict("records") + events(1, version=2).to_dict("records")])
+
+    assert buffer.drain_batch()
+    assert table.items["ev0"]["version"] == Decimal(2)
+    assert buffer.written == 1
+    assert buffer.pending() == 0
+
+
+@pytest.mark.parametrize("error", [
+    ClientError({"Error": {"Code": "ValidationException", "Message": "bad item"}}, "BatchWriteItem"),
+    TypeError("Float types are not supported. Use Decimal types instead."),
+])
+def test_rejected_item_moves_to_dead_letter(tmp_path, monkeypatch, error):
+    table = LocalTable()
+    buffer = spill(table, tmp_path)
+    buffer.append(events(5))
+    write = table.meta.client.batch_write_item
+
+    def reject_ev2(RequestItems):
+        if any(request["PutRequest"]["Item"]["id"] == "ev2" for request in RequestItems[table.name]):
+            raise error
+        return write(RequestItems=RequestItems)
+    monkeypatch.setattr(table.meta.client, "batch_write_item", reject_ev2)
+
+    # ev2 sits in the middle of the first request; the items after it are still written
+    assert buffer.drain() == 0
+    assert set(table.items) == {"ev0", "ev1", "ev3", "ev4"}
+    assert buffer.written == 4
+    assert buffer.rejected == 1
+    dead = buffer.connection.execute("SELECT id, time_epoch, error FROM dead_letter").fetchall()
+    assert dead == [("ev2", 3000, repr(error))]
+    assert buffer.oldest_pending() is None
+
+
+def test_close_raises_drain_error(tmp_path, monkeypatch):
+    table = LocalTable()
+    buffer = spill(table, tmp_path)
+    buffer.append(events(3))
+
+    def fail(RequestItems):
+        raise ClientError({"Error": {"Code": "ResourceNotFoundException", "Message": "no table"}}, "BatchWriteItem")
+    monkeypatch.setattr(table.meta.client, "batch_write_item", fail)
+    buffer.start()
+
+    with pytest.raises(ClientError):
+        buffer.close()
+    assert buffer.pending() == 3
+    # the error is raised once
+    assert buffer.close() == 3
@@ -0,0 +1,361 @@
+import argparse
+import base64
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from functools import lru_cache
+
+from item_profiles import DEFAULT_PROFILE, item_size, persisted_items, write_capacity_units
+
+# Write-behind stage between the pipelines and DynamoDB. Transformed batches
+# are appended to a local SQLite spill log, which returns as soon as the
+# items are on disk, and a background thread drains the log to the table in
+# BatchWriteItem requests of BATCH_ITEMS. Fetching and transforming the next
+# batch therefore never waits for write capacity, and a throttled or failed
+# write loses nothing: the items stay in the log until DynamoDB took them.
+#
+# The drain rate follows an adaptive token bucket in WCU per second: every
+# fully written request raises it by RATE_INCREASE, every throttled request
+# (a throttling error or UnprocessedItems) multiplies it by RATE_DECREASE.
+#
+# The log holds one version of every event: appending an event replaces the
+# version still waiting. Items are drained oldest event (time_epoch) first,
+# and the lambda fetches from the oldest event still in the log when that is
+# older than the newest stored one (see oldest_pending), so the fetch
+# watermark does not move past spilled events.
+#
+# The log survives the process. Whatever an invocation did not drain before
+# its deadline is drained by the next one that opens the same file. The
+# lambda keeps it in /tmp, which only outlives warm invocations, so an
+# invocation that ends with items left fails (and is retried) rather than
+# returning success; EARTHQUAKE_SPILL_PATH can point the log at storage that
+# outlives the container, such as an EFS mount.
+#
+# A request DynamoDB rejects for its items (ValidationException, or an item
+# the serializer refuses, e.g. a float NaN) is retried one item at a time,
+# and the items rejected on their own move to the dead_letter table of the
+# same file, with their error, so one bad item never holds up the items
+# behind it. Other drain errors (e.g. a missing table) stop the drain and
+# are raised by close().
+#
+# A throttled run against the local table stand-in, checked against the
+# items written directly (the drain starts at INITIAL_RATE, so the table
+# has to provision less than that to throttle):
+#
+#   python write_behind.py --simulate 2000 --write-capacity 50
+
+SPILL_PATH = os.path.join(tempfile.gettempdir(), "earthquake_spill.sqlite3")
+BATCH_ITEMS = 25
+INITIAL_RATE = 100.0
+MIN_RATE = 5.0
+MAX_RATE = 4000.0
+RATE_INCREASE = 10.0
+RATE_DECREASE = 0.5
+# Tokens the bucket holds at most, in seconds of the current rate
+BURST_SECONDS = 1.0
+# Wait of the drain thread when the log is empty
+IDLE_SECONDS = 0.5
+THROTTLE_CODES = {"ProvisionedThroughputExceededException", "ThrottlingException", "RequestLimitExceeded"}
+# Errors of requests DynamoDB rejects for their items, which no retry fixes
+REJECT_CODES = {"ValidationException", "SerializationException"}
+
+
+# Items go to the log as JSON; Decimal numbers and binary values are tagged
+def encode_value(value):
+    if isinstance(value, Decimal):
+        return {"$N": str(value)}
+    if isinstance(value, (bytes, bytearray)):
+        return {"$B": base64.b64encode(value).decode("ascii")}
+    if hasattr(value, "value"):  # boto3 Binary
+        return encode_value(value.value)
+    raise TypeError(f"Cannot spill {type(value).__name__} values")
+
+def decode_value(obj):
+    if obj.keys() == {"$N"}:
+        return Decimal(obj["$N"])
+    if obj.keys() == {"$B"}:
+        return base64.b64decode(obj["$B"])
+    return obj
+
+def encode_item(item):
+    return json.dumps(item, default=encode_value)
+
+# Drain order of an item; items without a time go first
+def item_time(item):
+    value = item.get("time_epoch")
+    return None if value is None else int(value)
+
+def decode_item(text):
+    return json.loads(text, object_hook=decode_value)
+
+
+# Token bucket whose rate adapts to throttling (additive increase,
+# multiplicative decrease)
+class AdaptiveTokenBucket:
+    def __init__(self, rate=INITIAL_RATE, min_rate=MIN_RATE, max_rate=MAX_RATE):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.tokens = rate * BURST_SECONDS
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.rate * BURST_SECONDS, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # Waits until units can be spent; a request larger than the bucket waits
+    # for a full bucket and leaves it in debt
+    def take(self, units):
+        self._refill()
+        needed = min(units, self.rate * BURST_SECONDS)
+        while self.tokens < needed:
+            time.sleep((needed - self.tokens) / self.rate)
+            self._refill()
+        self.tokens -= units
+
+    def succeeded(self):
+        self.rate = min(self.max_rate, self.rate + RATE_INCREASE)
+
+    def throttled(self):
+        self.rate = max(self.min_rate, self.rate * RATE_DECREASE)
+        self.tokens = min(self.tokens, 0.0)
+
+
+class WriteBehind:
+    def __init__(self, table, profile=DEFAULT_PROFILE, path=SPILL_PATH, bucket=None):
+        self.table = table
+        self.profile = profile
+        self.path = path
+        self.bucket = bucket or AdaptiveTokenBucket()
+        # one connection shared by the pipeline and the drain thread, under a lock
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS spill (seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                                "id TEXT NOT NULL, item TEXT NOT NULL, time_epoch INTEGER)")
+        if "time_epoch" not in [row[1] for row in self.connection.execute("PRAGMA table_info(spill)")]:
+            # a log written before the drain went oldest first; its items drain first
+            self.connection.execute("ALTER TABLE spill ADD COLUMN time_epoch INTEGER")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS spill_time ON spill (time_epoch, seq)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS spill_id ON spill (id)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS dead_letter (seq INTEGER PRIMARY KEY, "
+                                "id TEXT NOT NULL, item TEXT NOT NULL, time_epoch INTEGER, error TEXT NOT NULL)")
+        self.connection.commit()
+        self.lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._closing = threading.Event()
+        self.written = 0
+        self.throttled = 0
+        self.rejected = 0
+        self.error = None
+
+    # Appends the events of df (as returned by process_data_for_dynamodb) to
+    # the log, replacing the versions of the same events still waiting;
+    # returns the number of items
+    def append(self, df):
+        # the last version of an event in df wins
+        rows = {str(item["id"]): (str(item["id"]), encode_item(item), item_time(item))
+                for item in persisted_items(df, self.profile)}
+        with self.lock, self.connection:
+            self.connection.executemany("DELETE FROM spill WHERE id = ?", [(item_id,) for item_id in rows])
+            self.connection.executemany("INSERT INTO spill (id, item, time_epoch) VALUES (?, ?, ?)",
+                                        rows.values())
+        return len(rows)
+
+    def pending(self):
+        with self.lock:
+            return self.connection.execute("SELECT count(*) FROM spill").fetchone()[0]
+
+    # Smallest time_epoch among the items in the log, None when it is empty
+    def oldest_pending(self):
+        with self.lock:
+            return self.connection.execute("SELECT min(time_epoch) FROM spill").fetchone()[0]
+
+    # Writes the limit (default BATCH_ITEMS) oldest events of the log in one
+    # BatchWriteItem request and deletes the ones DynamoDB took; False when
+    # the log is empty
+    def drain_batch(self, limit=None):
+        from botocore.exceptions import ClientError, ParamValidationError
+
+        with self.lock:
+            rows = self.connection.execute("SELECT seq, id, item FROM spill ORDER BY time_epoch, seq LIMIT ?",
+                                           (limit or BATCH_ITEMS,)).fetchall()
+        if not rows:
+            return False
+        # a request cannot hold the same key twice; the last appended version
+        # wins (logs written before append replaced waiting versions)
+        latest = {}
+        for seq, item_id, text in rows:
+            if item_id not in latest or seq > latest[item_id][0]:
+                latest[item_id] = (seq, decode_item(text))
+        self.bucket.take(sum(write_capacity_units(item_size(item)) for _, item in latest.values()))
+
+        try:
+            response = self.table.meta.client.batch_write_item(
+                RequestItems={self.table.name: [{"PutRequest": {"Item": item}} for _, item in latest.values()]})
+        except ClientError as e:
+            code = e.response["Error"]["Code"]
+            if code in REJECT_CODES:
+                self._reject(rows, e)
+                return True
+            if code not in THROTTLE_CODES:
+                raise
+            self.bucket.throttled()
+            self.throttled += 1
+            return True
+        except (TypeError, ValueError, ParamValidationError) as e:
+            # the serializer refused an item
+            self._reject(rows, e)
+            return True
+
+        unprocessed = {str(request["PutRequest"]["Item"]["id"])
+                       for request in response.get("UnprocessedItems", {}).get(self.table.name, [])}
+        done = [(seq,) for seq, item_id, _ in rows if item_id not in unprocessed or seq != latest[item_id][0]]
+        with self.lock, self.connection:
+            self.connection.executemany("DELETE FROM spill WHERE seq = ?", done)
+        self.written += len(latest) - len(unprocessed)
+        if unprocessed:
+            self.bucket.throttled()
+            self.throttled += 1
+        else:
+            self.bucket.succeeded()
+        return True
+
+    # Items of a rejected request: retried one at a time, an item rejected
+    # on its own moves to the dead letter
+    def _reject(self, rows, error):
+        if len(rows) > 1:
+            for _ in rows:
+                self.drain_batch(limit=1)
+            return
+        seq, item_id, _ = rows[0]
+        with self.lock, self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO dead_letter (seq, id, item, time_epoch, error) "
+                                    "SELECT seq, id, item, time_epoch, ? FROM spill WHERE seq = ?",
+                                    (repr(error), seq))
+            self.connection.execute("DELETE FROM spill WHERE seq = ?", (seq,))
+        self.rejected += 1
+        print("Write-behind rejected", item_id, "to the dead letter:", repr(error))
+
+    # Drains in the calling thread until the log is empty or timeout
+    # seconds passed; returns the number of items left
+    def drain(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while (deadline is None or time.monotonic() < deadline) and self.drain_batch():
+            pass
+        return self.pending()
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                if not self.drain_batch():
+                    if self._closing.is_set():
+                        return
+                    self._stop.wait(IDLE_SECONDS)
+        except Exception as e:
+            # the items stay in the log for the next drain; close() raises
+            self.error = e
+            print("Write-behind drain failed:", repr(e))
+
+    # Starts draining in a background thread (which also resumes the items
+    # left by earlier runs)
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._closing.clear()
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    # Lets the background thread drain the log for up to timeout seconds
+    # (None: until it is empty), then stops it; returns the items left.
+    # Raises the error that stopped the drain, if any.
+    def close(self, timeout=None):
+        if self._thread is not None:
+            self._closing.set()
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                self._stop.set()
+                self._thread.join()
+            self._thread = None
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
+        return self.pending()
+
+
+# Write-behind buffer of the DynamoDB backend, one per process; None when
+# EARTHQUAKE_STORAGE selects a backend that is written directly
+@lru_cache(maxsize=None)
+def write_buffer():
+    from storage import DynamoDBBackend, get_backend
+    backend = get_backend()
+    if not isinstance(backend, DynamoDBBackend):
+        return None
+    return WriteBehind(backend.table, backend.profile, os.environ.get("EARTHQUAKE_SPILL_PATH", SPILL_PATH))
+
+
+# Two invocations against a throttled local table: the first appends the
+# batches while draining and stops at its deadline, the second resumes.
+# Returns True when the table holds the same items as a direct write.
+def simulate(n_events, batch_size, write_capacity, deadline_seconds, seed):
+    import lambda_function
+    from local_dynamodb import LocalTable
+    from synthetic_usgs import generate_payload
+
+    df = lambda_function.process_data_for_dynamodb(lambda_function.data_processing_transformation(
+        lambda_function.clean_data(generate_payload(n_events, seed=seed))))
+    table = LocalTable("earthquakes", write_capacity=write_capacity)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "spill.sqlite3")
+
+        start = time.perf_counter()
+        first = WriteBehind(table, path=path)
+        first.start()
+        for offset in range(0, len(df), batch_size):
+            first.append(df.iloc[offset:offset + batch_size])
+        appended = time.perf_counter() - start
+        left = first.close(timeout=max(deadline_seconds - appended, 0))
+        print(f"Invocation 1: appended {len(df):,} items in {appended:.2f} s, wrote {first.written:,}, "
+              f"{left:,} left in the log at the deadline, drain rate {first.bucket.rate:.0f} WCU/s")
+
+        second = WriteBehind(table, path=path)
+        second.start()
+        left = second.close()
+        seconds = time.perf_counter() - start
+        print(f"Invocation 2: wrote {second.written:,}, {left:,} left, drain rate {second.bucket.rate:.0f} WCU/s")
+
+    throttled = first.throttled + second.throttled
+    print(f"{len(table.items):,} items in the table after {seconds:.1f} s ({write_capacity:,} WCU/s provisioned); "
+          f"{throttled} throttled requests ({table.throttled_requests} rejected, "
+          f"{table.unprocessed_items:,} items returned unprocessed)")
+    expected = LocalTable("earthquakes")
+    for item in persisted_items(df):
+        expected.put_item(Item=item)
+    return table.items == expected.items
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drain the write-behind log, or simulate a throttled run")
+    parser.add_argument("--simulate", type=int, metavar="EVENTS", help="run a simulation with this many events")
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--write-capacity", type=int, default=50, help="WCU per second of the simulated table")
+    parser.add_argument("--deadline", type=float, default=5.0, help="seconds of the first simulated invocation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, help="drain the log of EARTHQUAKE_SPILL_PATH for at most this long")
+    args = parser.parse_args()
+
+    if args.simulate:
+        ok = simulate(args.simulate, args.batch_size, args.write_capacity, args.deadline, args.seed)
+        print("Table matches a direct write" if ok else "Table does NOT match a direct write")
+        raise SystemExit(0 if ok else 1)
+    buffer = write_buffer()
+    if buffer is None:
+        parser.error("EARTHQUAKE_STORAGE does not select DynamoDB")
+    print("Items left:", buffer.drain(args.timeout))